@@ -0,0 +1,3 @@
+from .registry import get, registered_pages
+# importing the page modules registers their pages
+from . import sign_in_page, sign_up_page
@@ -0,0 +1,89 @@
+from types import MappingProxyType
+from typing import Mapping
+from utils.custom_selenium_webdriver import CustomSeleniumWebDriver
+from utils.config_reader import load_config
+from utils.logger import setup_logger
+from .registry import register_page
+
+
+class BasePage:
+    """
+    Base class of the declarative page objects.
+
+    A page declares its registry ``name``, the config key of its URL (``url_key``), its expected ``title`` (checked
+    by the page smoke test) and a map of named locators, and implements its actions as methods. The declaration
+    is validated and registered when the class is defined, so a malformed locator fails at import rather than in
+    the middle of a test. Page objects are usually obtained through ``pages.get(name, driver)``, which reuses them
+    per driver.
+    """
+
+    name: str = None
+    url_key: str = None
+    title: str = None
+    locators: Mapping = MappingProxyType({})
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls.locators = MappingProxyType(dict(cls.locators))
+        if cls.name is not None:
+            register_page(cls)
+
+    def __init__(self, driver):
+        self.driver = CustomSeleniumWebDriver(driver, page_object=type(self).__name__)
+        self.logger = setup_logger()
+
+    @property
+    def url(self) -> str:
+        """
+        Retrieves the URL of the page from the configuration file.
+
+        :return: URL of the page, or None if it couldn't be retrieved.
+        """
+        try:
+            return load_config()[self.url_key]
+        except KeyError as e:
+            self.logger.error('"%s" not found in the configuration file. Error: %s', self.url_key, e)
+        except Exception as e:
+            self.logger.error('An error occurred while retrieving "%s" from the configuration file. Error: %s',
+                              self.url_key, e)
+
+    def locator(self, name: str) -> tuple:
+        """Returns the declared locator of the page with this name."""
+        return self.locators[name]
+
+    def open(self) -> None:
+        """
+        Navigates to the page.
+
+        :return: None.
+        """
+        self.driver.navigate_to_url(self.url)
+
+    def get_title(self) -> str:
+        """
+        Opens the page and retrieves its title.
+
+        :return: Title of the page.
+        :raises StepError: if the page couldn't be opened or its title read.
+        """
+        self.logger.info('********** %s() **********', self.get_title.__name__)
+        self.open()
+        return self.driver.get_title()
+
+    def fill(self, **values) -> None:
+        """
+        Fills the form fields given by locator name.
+
+        :param values: The text of each field, keyed by locator name.
+        :return: None.
+        """
+        self.driver.fill_form({self.locators[name]: text for name, text in values.items()})
+
+    def snapshot(self) -> dict:
+        """
+        Reads the title, URL and the state of every declared locator of the page in one WebDriver round-trip.
+
+        :return: The snapshot, see ``CustomSeleniumWebDriver.snapshot``.
+        :raises StepError: if the snapshot couldn't be taken.
+        """
+        return self.driver.snapshot(dict(self.locators))
@@ -0,0 +1,60 @@
+import weakref
+from selenium.webdriver.common.by import By
+
+_LOCATOR_STRATEGIES = frozenset(value for name, value in vars(By).items() if not name.startswith('_'))
+
+_page_classes = {}
+_instances = weakref.WeakKeyDictionary()
+
+
+def register_page(page_class) -> None:
+    """
+    Registers a page class under its ``name`` after validating its declaration.
+
+    :param page_class: The BasePage subclass.
+    :return: None.
+    :raises ValueError: If the name is taken, the URL key is missing or a locator is malformed.
+    """
+    name = page_class.name
+    if name in _page_classes and _page_classes[name] is not page_class:
+        raise ValueError(f'The page "{name}" is already registered by {_page_classes[name].__qualname__}.')
+    if not isinstance(page_class.url_key, str) or not page_class.url_key:
+        raise ValueError(f'The page "{name}" has no URL key.')
+    for locator_name, locator in page_class.locators.items():
+        if (not isinstance(locator, tuple) or len(locator) != 2 or locator[0] not in _LOCATOR_STRATEGIES
+                or not isinstance(locator[1], str) or not locator[1]):
+            raise ValueError(f'Invalid locator "{locator_name}" of the page "{name}": {locator!r}. '
+                             f'Expected (By.<strategy>, "<selector>").')
+    _page_classes[name] = page_class
+
+
+def get(name: str, driver):
+    """
+    Returns the page object registered under the name, bound to the driver.
+
+    The page object is created on the first call and reused for the same driver afterwards, so its
+    CustomSeleniumWebDriver wrapper (and smart wait) is only built once per browser.
+
+    :param name: The registered page name, e.g. "sign_in".
+    :param driver: The WebDriver instance (usually leased from the driver pool).
+    :return: The page object.
+    :raises KeyError: If no page is registered under the name.
+    """
+    if name not in _page_classes:
+        raise KeyError(f'Unknown page "{name}". Registered pages: {sorted(_page_classes)}.')
+    try:
+        pages = _instances.get(driver)
+        if pages is None:
+            pages = _instances[driver] = {}
+    except TypeError:
+        # objects that can't be weakly referenced get a fresh page object
+        return _page_classes[name](driver)
+    page = pages.get(name)
+    if page is None:
+        page = pages[name] = _page_classes[name](driver)
+    return page
+
+
+def registered_pages() -> dict:
+    """Returns the registered page classes keyed by name."""
+    return dict(_page_classes)
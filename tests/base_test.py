@@ -19,3 +19,38 @@ class BaseTest:
             f"{context} Assertion failed. "
             f"Expected title: '{expected_title}', Actual title: '{actual_title}'"
         )
+
+    @staticmethod
+    def diff_snapshot(snapshot, expected):
+        """
+        Compare a page snapshot with the expected state and return the differences.
+
+        The expected state has the shape of the snapshot and only lists what must match, e.g.
+        {'title': 'Customer Login', 'elements': {'email': {'visible': True, 'value': ''}}}.
+        """
+        differences = []
+        for key in ('title', 'url', 'ready_state'):
+            if key in expected and snapshot.get(key) != expected[key]:
+                differences.append(f"{key}: expected '{expected[key]}', actual '{snapshot.get(key)}'")
+        for name, expected_state in expected.get('elements', {}).items():
+            state = snapshot['elements'].get(name)
+            if state is None:
+                differences.append(f"{name}: not in the snapshot")
+                continue
+            for field, expected_value in expected_state.items():
+                if state.get(field) != expected_value:
+                    differences.append(f"{name}.{field}: expected {expected_value!r}, actual {state.get(field)!r}")
+        return differences
+
+    @classmethod
+    def assert_snapshot(cls, snapshot, expected, context=""):
+        """Assert that a page snapshot matches the expected state, reporting every difference at once."""
+        differences = cls.diff_snapshot(snapshot, expected)
+        logger.info('%s Snapshot of %s: %s differences', context, snapshot.get('url'), len(differences))
+        assert not differences, f"{context} Snapshot assertion failed:\n" + "\n".join(differences)
+
+    @classmethod
+    def assert_elements_visible(cls, snapshot, names, context=""):
+        """Assert that the named elements of a page snapshot are present and visible."""
+        cls.assert_snapshot(snapshot, {'elements': {name: {'present': True, 'visible': True} for name in names}},
+                            context)
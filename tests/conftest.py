@@ -1,149 +1,612 @@
+import json
+import time
+from pathlib import Path
 import pytest
 from utils.logger import setup_logger
-from utils.config_reader import load_config
-from selenium import webdriver
-from selenium.webdriver.chrome.service import Service as ChromeService
-from webdriver_manager.chrome import ChromeDriverManager
-from webdriver_manager.firefox import GeckoDriverManager
-from selenium.webdriver.firefox.service import Service as FirefoxService
-from webdriver_manager.microsoft import EdgeChromiumDriverManager
-from selenium.webdriver.edge.service import Service as EdgeService
-from selenium.webdriver.remote.webdriver import WebDriver
+from utils.config_reader import get_config, parse_override, set_cli_overrides
+from typing import TYPE_CHECKING
 from selenium.common.exceptions import WebDriverException
-from utils.random_data_generator import RandomDataGenerator
+from utils.random_data_generator import get_user_factory
+from utils.driver_pool import DriverLease, DriverPool
+from utils.browser_profiles import BrowserProfile, get_browser_profile
+from utils.driver_binary_cache import get_driver_binary_cache
+from utils.element_cache import get_element_cache
+from utils.smart_wait import get_wait_stats
+from utils.step_timer import step_recorder
+from utils.web_vitals import get_web_vitals_recorder
+from utils.screenshot import get_screenshot_manager, shutdown_screenshot_manager
+from utils.session_cache import get_origin, get_session_cache
+from utils.errors import TransientStepError
+from utils.test_history import get_test_history
+import pages
+
+if TYPE_CHECKING:
+    from selenium.webdriver.remote.webdriver import WebDriver
 
 logger = setup_logger()
 
+_UNIT_TESTS_DIR = Path(__file__).resolve().parent / 'unit'
+
+_fixture_server = None
+_http_cache_proxy = None
+_attempts = {}
+
+
+def pytest_addoption(parser):
+    parser.addoption('--config-override', action='append', default=[], metavar='KEY=VALUE',
+                     help='override a config.json value for this run, e.g. browser=firefox or driver_pool.size=2')
+    parser.addoption('--step-budget', action='append', default=[], metavar='ACTION=SECONDS',
+                     help='budget of a WebDriver step, e.g. click=2 (added to "step_budgets" of config.json)')
+    parser.addoption('--enforce-step-budgets', action='store_true', default=False,
+                     help='fail a test when one of its WebDriver steps exceeds its budget')
+    parser.addoption('--enforce-web-vitals', action='store_true', default=False,
+                     help='fail a test when a page it navigated to exceeded its "web_vitals" thresholds')
+    parser.addoption('--bulk-accounts', metavar='SOURCE',
+                     help='create accounts in bulk (tests/test_bulk_sign_up.py): a .csv/.jsonl file of users, or '
+                          '"generated"')
+    parser.addoption('--bulk-count', type=int, default=None,
+                     help='number of users to generate with --bulk-accounts generated')
+    parser.addoption('--bulk-workers', type=int, default=None, help='number of concurrent browsers of the bulk run')
+    parser.addoption('--bulk-results', default=None,
+                     help='results (and checkpoint) file of the bulk run; rerun with the same file to resume')
+    parser.addoption('--step-timings-json', default='reports/step_timings.json',
+                     help='path of the JSON export of the step timings')
+    parser.addoption('--changed-since', metavar='REF', default=None,
+                     help='only run the tests affected by the changes since this git revision (e.g., origin/main)')
+    parser.addoption('--test-plan', metavar='PATH', default=None,
+                     help='write the collected tests and their dependencies to a JSON file (used by the parallel '
+                          'runner to schedule the workers)')
+
+
+def pytest_configure(config):
+    global _fixture_server, _http_cache_proxy
+    config.addinivalue_line('markers', 'browser_profile(name): run the test class with a browser profile of '
+                                       'the "browser_profiles" section of config.json')
+    config.addinivalue_line('markers', 'bulk: bulk account creation run, only selected with --bulk-accounts')
+    config.addinivalue_line('markers', 'depends_on(*node_ids): the test (class) must run after these tests, in '
+                                       'the same session')
+    overrides = dict(parse_override(override) for override in config.getoption('--config-override'))
+    if overrides:
+        set_cli_overrides(overrides)
+    http_cache_mode = get_config().section('http_cache').get('mode', 'off')
+    if get_config().section('fixture_server').get('enabled') and _fixture_server is None:
+        # point the page objects at the local stand-in of the Magento pages
+        from utils.fixture_server import create_fixture_server
+        _fixture_server = create_fixture_server().start()
+        overrides['sign_up_page_url'] = _fixture_server.rewrite(get_config().sign_up_page_url)
+        overrides['sign_in_page_url'] = _fixture_server.rewrite(get_config().sign_in_page_url)
+        set_cli_overrides(overrides)
+    elif http_cache_mode != 'off' and _fixture_server is None and _http_cache_proxy is None:
+        # record or replay the responses of the application through the local caching proxy
+        from utils.http_cache_proxy import create_caching_proxy
+        _http_cache_proxy = create_caching_proxy().start()
+        overrides['sign_up_page_url'] = _http_cache_proxy.rewrite(get_config().sign_up_page_url)
+        overrides['sign_in_page_url'] = _http_cache_proxy.rewrite(get_config().sign_in_page_url)
+        set_cli_overrides(overrides)
+    step_recorder.budgets = dict(get_config().section('step_budgets'))
+    for budget in config.getoption('--step-budget'):
+        action, seconds = parse_override(budget)
+        step_recorder.budgets[action] = float(seconds)
+
+
+def pytest_unconfigure(config):
+    global _fixture_server, _http_cache_proxy
+    if _fixture_server is not None:
+        _fixture_server.stop()
+        _fixture_server = None
+    if _http_cache_proxy is not None:
+        _http_cache_proxy.stop()
+        if _http_cache_proxy.mode == 'record':
+            _http_cache_proxy.store.evict()
+        _http_cache_proxy = None
+
+
+def pytest_collection_modifyitems(config, items):
+    if config.getoption('--changed-since'):
+        _deselect_unaffected(config, items)
+    # empty (and no database is created) until a first outcome was recorded
+    quarantined = get_test_history().quarantined()
+    skip_bulk = pytest.mark.skip(reason='bulk account creation only runs with --bulk-accounts')
+    for item in items:
+        if 'bulk' in item.keywords and not config.getoption('--bulk-accounts'):
+            item.add_marker(skip_bulk)
+        if item.nodeid in quarantined:
+            # quarantined tests still run and feed the history, but their failures don't fail the run
+            item.add_marker(pytest.mark.xfail(reason=f'quarantined, {quarantined[item.nodeid]}', strict=False))
+
+
+def _deselect_unaffected(config, items) -> None:
+    """Deselects the tests the changes since --changed-since can't affect."""
+    from utils.test_impact import create_impact_analyzer
+    node_ids = [item.nodeid for item in items]
+    selected = set(create_impact_analyzer(config.getoption('--changed-since')).select(
+        node_ids, get_test_history().touches(), _get_dependencies(items)))
+    config.hook.pytest_deselected(items=[item for item in items if item.nodeid not in selected])
+    items[:] = [item for item in items if item.nodeid in selected]
+
+
+def _get_dependencies(items) -> dict:
+    """Returns the node ids declared by the depends_on markers of the items, keyed by item node id."""
+    dependencies = {}
+    for item in items:
+        targets = [target for marker in item.iter_markers('depends_on') for target in marker.args]
+        if targets:
+            dependencies[item.nodeid] = targets
+    return dependencies
+
+
+def pytest_collection_finish(session):
+    test_plan = session.config.getoption('--test-plan')
+    if test_plan:
+        Path(test_plan).parent.mkdir(parents=True, exist_ok=True)
+        with open(test_plan, 'w') as f:
+            json.dump({'tests': [item.nodeid for item in session.items],
+                       'dependencies': _get_dependencies(session.items)}, f, indent=2)
+
+
+def pytest_runtest_setup(item):
+    step_recorder.current_test = item.nodeid
+
+
+@pytest.hookimpl(wrapper=True)
+def pytest_runtest_call(item):
+    _attempts[item.nodeid] = 1
+    try:
+        result = yield
+    except TransientStepError as e:
+        result = _retry_on_fresh_driver(item, e)
+    violations = step_recorder.pop_violations(item.nodeid)
+    if violations and item.config.getoption('--enforce-step-budgets'):
+        details = ', '.join(f'{step["action"]}({step["locator"]}) took {step["duration"]:.2f}s '
+                            f'> {step_recorder.budgets[step["action"]]}s' for step in violations)
+        pytest.fail(f'{len(violations)} step(s) exceeded their budget: {details}')
+    web_vitals_recorder = get_web_vitals_recorder()
+    if web_vitals_recorder is not None:
+        page_violations = web_vitals_recorder.pop_violations(item.nodeid)
+        if page_violations and item.config.getoption('--enforce-web-vitals'):
+            pytest.fail(f'Page performance thresholds exceeded: {", ".join(page_violations)}')
+    return result
+
+
+@pytest.hookimpl(wrapper=True)
+def pytest_runtest_makereport(item, call):
+    report = yield
+    if _is_unit_test(item):
+        # the unit tests run on fake browsers: their outcomes and touches must not feed the history of the suite
+        return report
+    if report.when == 'setup' and report.failed:
+        get_test_history().record(item.nodeid, 'error', report.duration, error=_short_error(report))
+    if report.when != 'call':
+        return report
+    attempts = _attempts.pop(item.nodeid, 1)
+    report.user_properties.append(('attempts', attempts))
+    outcome = 'failed' if report.failed or hasattr(report, 'wasxfail') and report.skipped else report.outcome
+    get_test_history().record(item.nodeid, outcome, report.duration, attempts,
+                              _short_error(report) if outcome == 'failed' else None)
+    # a test that failed early may not have reached all of its pages, so its previous touches are kept
+    get_test_history().record_touches(item.nodeid, step_recorder.pop_touches(item.nodeid),
+                                      replace=report.passed)
+    screenshot_manager = get_screenshot_manager()
+    web_driver = item.funcargs.get('logged_in_driver') or item.funcargs.get('driver')
+    if web_driver is not None and (screenshot_manager.mode == 'always'
+                                   or (screenshot_manager.mode == 'on-failure' and report.failed)):
+        # waits for the frame to be written, so the report never links a near-duplicate that was skipped
+        screenshot_path = screenshot_manager.capture(web_driver, item.nodeid, 'failure' if report.failed else 'end',
+                                                     wait=True)
+        if screenshot_path is not None:
+            report.sections.append(('screenshot', str(screenshot_path)))
+    return report
+
+
+def _is_unit_test(item) -> bool:
+    """Returns whether the item is a unit test of the framework (tests/unit), which runs without a browser."""
+    return Path(item.path).resolve().is_relative_to(_UNIT_TESTS_DIR)
+
+
+def _retry_on_fresh_driver(item, error: TransientStepError):
+    """
+    Runs the test again on a fresh pooled browser, with exponential back-off, as long as it fails with a transient
+    step error and the "retry.max_attempts" aren't used up.
+
+    :param item: the pytest test item.
+    :param error: the transient error of the first attempt.
+    :return: the result of the successful attempt.
+    :raises StepError: the error of the last attempt.
+    """
+    settings = get_config().section('retry')
+    max_attempts = settings.get('max_attempts', 3)
+    delay = settings.get('backoff', 1.0)
+    lease = item.funcargs.get('driver')
+    while isinstance(lease, DriverLease) and _attempts[item.nodeid] < max_attempts:
+        logger.warning('%s failed with a transient error (%s), retrying on a fresh browser in %.1fs (attempt %s/%s).',
+                       item.nodeid, error, delay, _attempts[item.nodeid] + 1, max_attempts)
+        time.sleep(delay)
+        delay *= settings.get('backoff_factor', 2)
+        _attempts[item.nodeid] += 1
+        try:
+            lease.renew()
+            if 'logged_in_driver' in item.funcargs:
+                _sign_in(lease, item.funcargs['generated_data'], item.funcargs['session_cache'])
+            return item.runtest()
+        except TransientStepError as e:
+            error = e
+    raise error
+
+
+def _short_error(report) -> str:
+    """Returns the last line of the failure of a report, e.g. the exception and its message."""
+    lines = str(report.longrepr).strip().splitlines() if report.longrepr else []
+    return lines[-1][:500] if lines else None
+
+
+def pytest_sessionfinish(session):
+    shutdown_screenshot_manager()
+    get_wait_stats().save()
+    if step_recorder.steps:
+        step_recorder.export_json(session.config.getoption('--step-timings-json'))
+
+
+@pytest.hookimpl(optionalhook=True)
+def pytest_html_results_summary(prefix, summary, postfix):
+    if step_recorder.steps:
+        postfix.extend([step_recorder.html_table('action'), step_recorder.html_table('page_object'),
+                        step_recorder.html_table('locator')])
+
+
+@pytest.fixture(scope='session')
+def driver_pools():
+    """
+    Holds the session-wide pools of pre-warmed WebDrivers, one per browser profile. A pool is created the first
+    time a test class asks for its profile.
+    :return:
+    """
+    logger.info('********** %s() **********', driver_pools.__name__)
+    pools = {}
+    yield pools
+    for pool in pools.values():
+        pool.shutdown()
+    logger.info('Driver binary resolution timings: %s', get_driver_binary_cache().timings)
+
+
+@pytest.fixture(scope='session')
+def driver_pool(driver_pools):
+    """
+    Returns the session-wide driver pool of the default browser profile.
+    :return:
+    """
+    return _get_driver_pool(driver_pools, get_browser_profile())
+
 
 @pytest.fixture(scope='class')
-def driver():
+def driver(request, driver_pools):
     """
-    Initializes and yields the WebDriver based on the specified browser in the config file.
+    Leases a WebDriver from the driver pool of the test class's browser profile and returns it to the pool once
+    the test class finished. The WebDriver is wrapped in a DriverLease, so that a test failing with a transient
+    error can be retried on a fresh browser.
+
+    The profile is chosen with the ``browser_profile`` marker or a ``browser_profile`` class attribute, and
+    defaults to the "browser_profile" setting of the config file.
     :return:
     """
-    logger.info(f'********** {driver.__name__}() **********')
+    logger.info('********** %s() **********', driver.__name__)
     web_driver = None
+    driver_pool = None
     try:
         logger.info('Starting setup stage ...')
-        browser = _get_specified_browser()
-        web_driver = _initialize_web_driver(browser)
-        web_driver.maximize_window()
+        driver_pool = _get_driver_pool(driver_pools, get_browser_profile(_get_profile_name(request)))
+        web_driver = driver_pool.checkout()
         yield web_driver
-    except WebDriverException as e:
-        logger.error(f'An error occurred while initializing the web driver. Error: {e}')
+    except (WebDriverException, RuntimeError, ValueError) as e:
+        logger.error('An error occurred while leasing the web driver. Error: %s', e)
     finally:
         logger.info('The tearDown stage is finishing ...')
         if web_driver is not None:
-            web_driver.quit()
+            web_driver.release()
         logger.info('The tearDown stage finished successfully.')
 
 
+def _get_profile_name(request):
+    """
+    Returns the browser profile requested by the ``browser_profile`` marker or class attribute, if any.
+
+    :param request: the pytest fixture request.
+    :return: the profile name, or None for the default profile.
+    """
+    marker = request.node.get_closest_marker('browser_profile')
+    if marker is not None and marker.args:
+        return marker.args[0]
+    return getattr(request.cls, 'browser_profile', None)
+
+
+def _get_driver_pool(driver_pools, profile: BrowserProfile) -> DriverPool:
+    """
+    Returns the driver pool of the browser profile, creating (and warming up) it on first use.
+
+    :param driver_pools: the session-wide pools keyed by profile name.
+    :param profile: the browser profile.
+    :return: the DriverPool of the profile.
+    """
+    if profile.name not in driver_pools:
+        browser = _get_specified_browser()
+        pool_settings = get_config().driver_pool
+        logger.info('Creating the driver pool of the %s browser profile: %s', profile.name, profile)
+        pool = DriverPool(
+            factory=lambda: _start_web_driver(browser, profile),
+            size=pool_settings.size,
+            max_leases=pool_settings.max_leases,
+        )
+        if pool_settings.warm_up:
+            pool.warm_up()
+        driver_pools[profile.name] = pool
+    return driver_pools[profile.name]
+
+
+@pytest.fixture(scope='session')
+def bulk_driver_pool(request):
+    """
+    Creates a dedicated driver pool with one browser per worker of the bulk account run.
+    :return:
+    """
+    logger.info('********** %s() **********', bulk_driver_pool.__name__)
+    browser = _get_specified_browser()
+    profile = get_browser_profile(get_config().section('bulk_accounts').get('browser_profile'))
+    workers = request.config.getoption('--bulk-workers') or get_config().section('bulk_accounts').get('workers', 4)
+    pool = DriverPool(
+        factory=lambda: _start_web_driver(browser, profile),
+        size=workers,
+        max_leases=get_config().driver_pool.max_leases,
+    )
+    pool.warm_up()
+    yield pool
+    pool.shutdown()
+
+
+@pytest.fixture(autouse=True)
+def element_cache_report(request):
+    """
+    Logs how many find_element round-trips the element cache saved during the test.
+    :return:
+    """
+    if 'driver' not in request.fixturenames:
+        yield
+        return
+    web_driver = request.getfixturevalue('driver')
+    element_cache = get_element_cache(web_driver)
+    hits_before, misses_before = element_cache.hits, element_cache.misses
+    yield
+    logger.info('Element cache for %s: %s hits (saved round-trips), %s misses. Totals: %s', request.node.name,
+                element_cache.hits - hits_before, element_cache.misses - misses_before, element_cache.stats())
+
+
+def _start_web_driver(browser, profile: BrowserProfile) -> 'WebDriver':
+    """
+    Starts a new WebDriver for the driver pool, sized and configured by the browser profile.
+
+    :param browser: the browser type (e.g., 'chrome', 'firefox', 'edge').
+    :param profile: the browser profile.
+    :return: the initialized webdriver object.
+    """
+    web_driver = _initialize_web_driver(browser, profile)
+    if web_driver is not None:
+        profile.apply_to_driver(web_driver)
+    return web_driver
+
+
 def _get_specified_browser() -> str:
     """
-    Gets the specified browser type from the config.json file.
+    Gets the specified browser type from the configuration (config.json, LUMA_BROWSER or --config-override).
 
     :return: the browser specified in the configuration.
-    :raises ValueError: if the browser isn't found.
-    :raises Exception: if An error occurred while loading the config.json file.
     """
-    logger.info(f'********** {_get_specified_browser.__name__}() **********')
-    try:
-        logger.info('Loading config file...')
-        config = load_config()
-        logger.info('Getting the specified browser from the config.json')
-        browser = config['browser'].lower()
-        logger.info(f'The specified browser is {browser}')
-        return browser
-    except KeyError as e:
-        logger.error(f'Missing "browser" key in the config.json file. Error: {e}')
-    except Exception as e:
-        logger.error(f'An error occurred while loading the config.json file. Error: {e}')
+    logger.info('********** %s() **********', _get_specified_browser.__name__)
+    browser = get_config().browser
+    logger.info('The specified browser is %s', browser)
+    return browser
 
 
-def _initialize_web_driver(browser) -> WebDriver:
+def _initialize_web_driver(browser, profile: BrowserProfile) -> 'WebDriver':
     """
     Initializes the WebDriver based on the specified browser.
 
     :param browser: the browser type (e.g., 'chrome', 'firefox', 'edge').
+    :param profile: the browser profile.
     :return: the initialized webdriver object.
     :raises ValueError: if the browser isn't supported.
     :raises Exception: if an error occurred while initializing the webdriver.
     """
-    logger.info(f'********** {_initialize_web_driver.__name__}() **********')
+    logger.info('********** %s() **********', _initialize_web_driver.__name__)
     try:
+        remote_url = get_config().remote_url
+        if remote_url:
+            return _initialize_remote_driver(browser, remote_url, profile)
         if browser == 'chrome':
-            return _initialize_chrome_driver()
+            return _initialize_chrome_driver(profile)
         elif browser == 'firefox':
-            return _initialize_firefox_driver()
+            return _initialize_firefox_driver(profile)
         elif browser == 'edge':
-            return _initialize_edge_driver()
+            return _initialize_edge_driver(profile)
         else:
             logger.error('Specified browser is not supported.')
             raise ValueError(f'Unsupported browser: {browser}')
     except ValueError as e:
-        logger.error(f'Unsupported browser: {browser}. Error: {e}')
+        logger.error('Unsupported browser: %s. Error: %s', browser, e)
     except Exception as e:
-        logger.error(f'An error occurred while initializing the webdriver. Error: {e}')
+        logger.error('An error occurred while initializing the webdriver. Error: %s', e)
 
 
-def _initialize_chrome_driver() -> WebDriver:
+def _initialize_chrome_driver(profile: BrowserProfile) -> 'WebDriver':
     """
     Initializes a Chrome WebDriver instance.
 
+    :param profile: the browser profile.
     :return: the initialized chrome webdriver object.
     :raises WebDriverException: if an error occurred while initializing the chrome webdriver.
     """
-    logger.info(f'********** {_initialize_chrome_driver.__name__}() **********')
+    logger.info('********** %s() **********', _initialize_chrome_driver.__name__)
+    from selenium.webdriver import Chrome
+    from selenium.webdriver.chrome.service import Service as ChromeService
     try:
         logger.info('Initializing Chrome WebDriver...')
-        chrome_webdriver = webdriver.Chrome(service=ChromeService(ChromeDriverManager().install()))
+        chrome_webdriver = Chrome(service=ChromeService(_resolve_driver_path('chrome')),
+                                  options=_build_browser_options('chrome', profile))
         logger.info('The chrome webdriver initialized successfully.')
         return chrome_webdriver
     except WebDriverException as e:
-        logger.error(f'An error occurred while initializing the chrome webdriver. Error: {e}')
+        logger.error('An error occurred while initializing the chrome webdriver. Error: %s', e)
 
 
-def _initialize_firefox_driver():
+def _initialize_firefox_driver(profile: BrowserProfile):
     """
     Initializes a Firefox WebDriver instance.
 
+    :param profile: the browser profile.
     :return: the initialized firefox webdriver object.
     :raises WebDriverException: if an error occurred while initializing the firefox webdriver.
     """
-    logger.info(f'********** {_initialize_firefox_driver.__name__}() **********')
+    logger.info('********** %s() **********', _initialize_firefox_driver.__name__)
+    from selenium.webdriver import Firefox
+    from selenium.webdriver.firefox.service import Service as FirefoxService
     try:
         logger.info('Initializing Firefox WebDriver...')
-        firefox_webdriver = webdriver.Firefox(service=FirefoxService(GeckoDriverManager().install()))
+        firefox_webdriver = Firefox(service=FirefoxService(_resolve_driver_path('firefox')),
+                                    options=_build_browser_options('firefox', profile))
         logger.info('The Firefox webdriver is initialized successfully.')
         return firefox_webdriver
     except WebDriverException as e:
-        logger.error(f'An error occurred while initializing the Firefox webdriver. Error: {e}')
+        logger.error('An error occurred while initializing the Firefox webdriver. Error: %s', e)
 
 
-def _initialize_edge_driver():
+def _initialize_edge_driver(profile: BrowserProfile):
     """
     Initializes an Edge WebDriver instance.
 
+    :param profile: the browser profile.
     :return: the initialized edge webdriver object.
     :raises WebDriverException: if an error occurred while initializing the edge webdriver.
     """
-    logger.info(f'********** {_initialize_edge_driver.__name__}() **********')
+    logger.info('********** %s() **********', _initialize_edge_driver.__name__)
+    from selenium.webdriver import Edge
+    from selenium.webdriver.edge.service import Service as EdgeService
     try:
         logger.info('Initializing Edge WebDriver')
-        edge_webdriver = webdriver.Edge(service=EdgeService(EdgeChromiumDriverManager().install()))
+        edge_webdriver = Edge(service=EdgeService(_resolve_driver_path('edge')),
+                              options=_build_browser_options('edge', profile))
         logger.info('The Edge webdriver is initialized successfully.')
         return edge_webdriver
     except WebDriverException as e:
-        logger.error(f'An error occurred while initializing the edge webdriver. Error: {e}')
+        logger.error('An error occurred while initializing the edge webdriver. Error: %s', e)
+
+
+def _resolve_driver_path(browser) -> str:
+    """
+    Resolves the driver binary of the browser through the local driver binary cache.
+
+    :param browser: the browser type (e.g., 'chrome', 'firefox', 'edge').
+    :return: the path of the driver binary.
+    """
+    return get_driver_binary_cache(get_config().driver_cache).resolve(browser)
+
+
+def _initialize_remote_driver(browser, remote_url, profile: BrowserProfile) -> 'WebDriver':
+    """
+    Initializes a Remote WebDriver instance against a WebDriver hub (e.g., a local Selenium Grid).
+
+    :param browser: the browser type (e.g., 'chrome', 'firefox', 'edge').
+    :param remote_url: the URL of the WebDriver hub.
+    :param profile: the browser profile.
+    :return: the initialized remote webdriver object.
+    :raises WebDriverException: if an error occurred while initializing the remote webdriver.
+    """
+    logger.info('********** %s() **********', _initialize_remote_driver.__name__)
+    from selenium.webdriver import Remote
+    try:
+        logger.info('Initializing Remote %s WebDriver on %s...', browser, remote_url)
+        remote_webdriver = Remote(command_executor=remote_url, options=_build_browser_options(browser, profile))
+        logger.info('The remote webdriver is initialized successfully.')
+        return remote_webdriver
+    except WebDriverException as e:
+        logger.error('An error occurred while initializing the remote webdriver. Error: %s', e)
+
+
+def _build_browser_options(browser, profile: BrowserProfile):
+    """
+    Builds the browser options of the browser profile (headless mode, window size, page load strategy, images
+    and extensions).
+
+    :param browser: the browser type (e.g., 'chrome', 'firefox', 'edge').
+    :param profile: the browser profile.
+    :return: the options object of the browser.
+    :raises ValueError: if the browser isn't supported.
+    """
+    # only the backend of the selected browser is imported
+    if browser == 'chrome':
+        from selenium.webdriver import ChromeOptions as Options
+    elif browser == 'firefox':
+        from selenium.webdriver import FirefoxOptions as Options
+    elif browser == 'edge':
+        from selenium.webdriver import EdgeOptions as Options
+    else:
+        raise ValueError(f'Unsupported browser: {browser}')
+    options = Options()
+    profile.apply_to_options(options, browser)
+    if _http_cache_proxy is not None:
+        _http_cache_proxy.apply_to_options(options, browser)
+    return options
 
 
 @pytest.fixture(scope='session')
 def generated_data():
-    faker = RandomDataGenerator()
-    data = {
-        "first_name": faker.generate_random_first_name(),
-        "last_name": faker.generate_random_last_name(),
-        "email": faker.generate_random_email(),
-        "password": faker.generate_random_password(),
-    }
-    return data
+    """
+    Draws a unique user from the pre-generated user pool.
+    :return:
+    """
+    return get_user_factory().next_user()
+
+
+@pytest.fixture(scope='session')
+def session_cache():
+    """
+    Returns the on-disk cache of authenticated sessions.
+    :return:
+    """
+    return get_session_cache()
+
+
+@pytest.fixture
+def logged_in_driver(driver, generated_data, session_cache):
+    """
+    Returns the leased WebDriver logged in as the generated_data user.
+
+    The cached session of the user is injected when there's one and the server still accepts it, otherwise the
+    user signs in through the UI once and the resulting session is captured for the next tests.
+    :return:
+    """
+    logger.info('********** %s() **********', logged_in_driver.__name__)
+    _sign_in(driver, generated_data, session_cache)
+    return driver
+
+
+def _sign_in(driver, generated_data, session_cache) -> None:
+    """
+    Logs the browser in as the generated_data user, from the session cache or through the UI.
+
+    :param driver: the (leased) WebDriver.
+    :param generated_data: the user to log in.
+    :param session_cache: the on-disk cache of authenticated sessions.
+    :return: None.
+    """
+    sign_in_page_url = get_config().sign_in_page_url
+    base_url = get_origin(sign_in_page_url)
+    account_page_url = base_url + get_config().section('session_cache').get('account_page_path', '/customer/account/')
+    email = generated_data['email']
+    if session_cache.restore(driver, email, base_url):
+        if session_cache.is_signed_in(driver, account_page_url, sign_in_page_url):
+            return
+        logger.warning('The server rejected the cached session of %s, dropping it.', email)
+        session_cache.invalidate(email, base_url)
+        driver.delete_all_cookies()
+    logger.info('Signing in %s through the UI to capture the session...', email)
+    pages.get('sign_in', driver).sign_in(email=email, password=generated_data['password'])
+    # only a session the server accepts is cached, not the state of a failed sign-in
+    if session_cache.is_signed_in(driver, account_page_url, sign_in_page_url):
+        session_cache.capture(driver, email, base_url)
@@ -0,0 +1,24 @@
+import pytest
+from utils.bulk_accounts import create_bulk_runner, user_records
+from utils.logger import setup_logger
+
+logger = setup_logger()
+
+
+@pytest.mark.bulk
+def test_bulk_sign_up(request, bulk_driver_pool):
+    """
+    Create accounts in bulk and report the sign-up throughput.
+
+    Only runs with --bulk-accounts, e.g.:
+    pytest tests/test_bulk_sign_up.py --bulk-accounts generated --bulk-count 5000 --bulk-workers 8
+    pytest tests/test_bulk_sign_up.py --bulk-accounts users.csv --bulk-results reports/bulk_accounts/users.jsonl
+    Rerunning with the same results file resumes the run.
+    """
+    source = request.config.getoption('--bulk-accounts')
+    runner = create_bulk_runner(bulk_driver_pool, request.config.getoption('--bulk-results'),
+                                request.config.getoption('--bulk-workers'))
+    records = user_records(runner, None if source == 'generated' else source, request.config.getoption('--bulk-count'))
+    summary = runner.run(records)
+    logger.info('Bulk sign-up throughput: %s', summary)
+    assert summary['created'] + summary['skipped'] > 0, f'No account could be created: {summary}'
@@ -0,0 +1,22 @@
+import pytest
+import pages
+from utils.logger import setup_logger
+from utils.custom_selenium_webdriver import CustomSeleniumWebDriver
+from tests.base_test import BaseTest
+
+logger = setup_logger()
+
+
+@pytest.mark.browser_profile('fast')
+class TestPageSmoke(BaseTest):
+
+    def test_page_titles(self, driver):
+        """Verify the title and status of every registered page, loading them concurrently in tabs."""
+        self.log_test_start(self.test_page_titles.__name__)
+        page_objects = [pages.get(name, driver) for name, page in pages.registered_pages().items() if page.title]
+        web_driver = CustomSeleniumWebDriver(driver)
+        results = web_driver.check_pages([page.url for page in page_objects])
+        for page, result in zip(page_objects, results):
+            assert result['error'] is None, f"{page.name} page: {result['requested_url']} failed ({result['error']})"
+            assert result['status'] in (None, 200), f"{page.name} page: HTTP status {result['status']}"
+            self.assert_page_title(result['title'], page.title, context=f"{page.name} page")
@@ -1,28 +1,57 @@
 import pytest
-from pages.sign_in_page import SignInPage
+import pages
 from utils.logger import setup_logger
 from utils.custom_selenium_webdriver import CustomSeleniumWebDriver
 from tests.base_test import BaseTest
+from utils.config_reader import get_config
+from utils.session_cache import get_origin
 
 logger = setup_logger()
 
 
+@pytest.mark.depends_on('tests/test_sign_up_page.py::TestSignUpPage')
 class TestSignInPage(BaseTest):
 
     def test_sign_in_page_title(self, driver):
         """Verify that the title of the sign-in page is correct."""
         self.log_test_start(self.test_sign_in_page_title.__name__)
-        sign_in_page = SignInPage(driver)
+        sign_in_page = pages.get('sign_in', driver)
         actual_title = sign_in_page.get_sign_in_title_page()
         expected_title = 'Customer Login'
         self.assert_page_title(actual_title, expected_title, context="Sign-In Page")
 
+    def test_sign_in_form(self, driver):
+        """Verify the title and the empty, visible sign-in form with one snapshot of the page."""
+        self.log_test_start(self.test_sign_in_form.__name__)
+        sign_in_page = pages.get('sign_in', driver)
+        sign_in_page.open()
+        snapshot = sign_in_page.snapshot()
+        self.assert_snapshot(snapshot, {
+            'title': 'Customer Login',
+            'elements': {'email': {'value': ''}, 'password': {'value': ''}, 'sign_in_button': {'enabled': True}},
+        }, context="Sign-In Form")
+        self.assert_elements_visible(snapshot, sign_in_page.locators, context="Sign-In Form")
+
     def test_sign_in_process(self, driver, generated_data):
         """Verify the sign-in process and the resulting page title."""
         self.log_test_start(self.test_sign_in_process.__name__)
-        sign_in_page = SignInPage(driver)
+        sign_in_page = pages.get('sign_in', driver)
         sign_in_page.sign_in(email=generated_data['email'], password=generated_data['password'])
         web_driver = CustomSeleniumWebDriver(driver)
         actual_title = web_driver.get_title()
         expected_title = 'My Account'
         self.assert_page_title(actual_title, expected_title, context="After Sign-In")
+
+    def test_restored_session_opens_my_account(self, logged_in_driver, generated_data, session_cache):
+        """Verify that a restored session gives access to the customer account page without signing in."""
+        self.log_test_start(self.test_restored_session_opens_my_account.__name__)
+        # logged_in_driver cached the session: a freshly reset browser must be signed in by the restore alone
+        logged_in_driver.renew()
+        restored = session_cache.restore(logged_in_driver, generated_data['email'],
+                                         get_origin(get_config().sign_in_page_url))
+        assert restored, "Restored Session: no cached session of the user could be restored"
+        web_driver = CustomSeleniumWebDriver(logged_in_driver)
+        web_driver.navigate_to_url(f'{get_origin(get_config().sign_in_page_url)}/customer/account/')
+        actual_title = web_driver.get_title()
+        expected_title = 'My Account'
+        self.assert_page_title(actual_title, expected_title, context="Restored Session")
@@ -0,0 +1,25 @@
+import pytest
+from utils import smart_wait, test_history, web_vitals
+from utils.config_reader import get_config
+from utils.smart_wait import WaitStats
+from utils.step_timer import step_recorder
+from utils.test_history import TestHistory
+from utils.web_vitals import WebVitalsRecorder
+
+
+@pytest.fixture(autouse=True)
+def isolated_stats(tmp_path, monkeypatch):
+    """
+    Points the shared readiness stats, test history, web vitals and step timings at the temporary directory of the
+    test, so that the fake browsers of the unit tests never feed the learned timeouts, the quarantine or the test
+    selection of the real runs.
+    :return:
+    """
+    monkeypatch.setattr(smart_wait, '_shared_stats', WaitStats(tmp_path / 'wait_stats.json'))
+    monkeypatch.setattr(test_history, '_shared_history', TestHistory(tmp_path / 'test_history.sqlite'))
+    monkeypatch.setattr(web_vitals, '_shared_recorder', WebVitalsRecorder(
+        get_config().section('web_vitals').get('thresholds'), tmp_path / 'web_vitals', 'unit'))
+    for name in ('steps', '_violations', '_touches'):
+        monkeypatch.setattr(step_recorder, name, type(getattr(step_recorder, name))())
+    yield
+    test_history.get_test_history().close()
@@ -0,0 +1,16 @@
+from utils.benchmark import compare
+
+BASELINE = {'click': {'p50_us': 40.0, 'peak_alloc_bytes': 4000, 'log_records': 4.0, 'log_bytes': 233.0,
+                      'driver_calls': 4.0}}
+
+
+def test_counts_are_always_compared_exactly():
+    results = {'click': {**BASELINE['click'], 'driver_calls': 5.0}}
+    assert compare(results, BASELINE, 0.5, timings=False) == ['click.driver_calls: 5.0 > 4.0 (baseline 4.0)']
+
+
+def test_times_are_only_compared_on_the_baseline_host():
+    results = {'click': {**BASELINE['click'], 'p50_us': 100.0}}
+    assert compare(results, BASELINE, 0.5, timings=False) == []
+    assert compare(results, BASELINE, 0.5) == ['click.p50_us: 100.0 > 60.0 (baseline 40.0)']
+    assert compare({'click': {**BASELINE['click'], 'p50_us': 41.0}}, BASELINE, 0.01) == []
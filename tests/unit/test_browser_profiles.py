@@ -0,0 +1,57 @@
+import logging
+from selenium.webdriver import FirefoxOptions
+from utils.browser_profiles import BrowserProfile
+from utils.custom_selenium_webdriver import CustomSeleniumWebDriver
+from utils.driver_pool import DriverPool
+from utils.fake_webdriver import FakeWebDriver
+
+PAGES = {f'https://shop.test/page{index}': {'title': f'Page {index}', 'elements': {}} for index in range(3)}
+BLOCKED_URLS = ('*google-analytics.com*', '*doubleclick.net*')
+
+
+class _Chromium(FakeWebDriver):
+    """Fake Chromium browser recording the CDP commands sent to each tab, and the URL each tab was on."""
+
+    def __init__(self):
+        super().__init__(PAGES)
+        self.cdp_commands = []
+
+    def execute_cdp_cmd(self, cmd: str, cmd_args: dict) -> dict:
+        self.cdp_commands.append((self.current_window_handle, self.current_url, cmd, cmd_args))
+        return {}
+
+
+def _blocked_tabs(browser: _Chromium) -> dict:
+    return {handle: (url, args['urls']) for handle, url, cmd, args in browser.cdp_commands
+            if cmd == 'Network.setBlockedURLs'}
+
+
+def test_the_tabs_of_page_checks_block_the_urls_before_they_navigate():
+    def factory():
+        browser = _Chromium()
+        BrowserProfile(name='fast', headless=True, blocked_urls=BLOCKED_URLS).apply_to_driver(browser)
+        return browser
+
+    pool = DriverPool(factory)
+    with pool.lease() as browser:
+        results = CustomSeleniumWebDriver(browser).check_pages(list(PAGES), timeout=5)
+        assert [result['title'] for result in results] == ['Page 0', 'Page 1', 'Page 2']
+        blocked_tabs = _blocked_tabs(browser)
+        assert len(blocked_tabs) == 4
+        assert all(blocked == list(BLOCKED_URLS) for _, blocked in blocked_tabs.values())
+        assert [url for handle, (url, _) in blocked_tabs.items() if handle != 'window-0'] == ['about:blank'] * 3
+    pool.shutdown()
+
+
+def test_a_browser_without_a_profile_opens_the_pages_directly():
+    browser = _Chromium()
+    results = CustomSeleniumWebDriver(browser).check_pages(list(PAGES), timeout=5)
+    assert all(result['error'] is None for result in results)
+    assert browser.cdp_commands == []
+
+
+def test_disable_extensions_is_reported_as_unsupported_on_firefox(caplog):
+    options = FirefoxOptions()
+    with caplog.at_level(logging.WARNING):
+        BrowserProfile(name='fast', disable_extensions=True).apply_to_options(options, 'firefox')
+    assert "Firefox doesn't support" in caplog.text
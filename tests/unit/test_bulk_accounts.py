@@ -0,0 +1,94 @@
+import json
+import pytest
+from utils.bulk_accounts import BulkAccountRunner, read_user_records
+from utils.config_reader import get_config
+from utils.driver_pool import DriverPool
+from utils.fake_webdriver import FakeWebDriver
+
+
+def _user(index: int) -> dict:
+    return {'first_name': 'Ada', 'last_name': 'Lovelace', 'email': f'ada.{index}@example.com', 'password': 'Pa55word!'}
+
+
+@pytest.fixture
+def driver_pool():
+    pool = DriverPool(lambda: FakeWebDriver.magento(get_config().sign_in_page_url, get_config().sign_up_page_url),
+                      size=2)
+    yield pool
+    pool.shutdown()
+
+
+def _results(runner: BulkAccountRunner) -> list:
+    results = []
+    with open(runner.results_path) as f:
+        for line in f:
+            try:
+                results.append(json.loads(line))
+            except ValueError:
+                results.append(None)
+    return results
+
+
+def test_a_run_resumes_from_its_results_file(tmp_path, driver_pool):
+    results_path = tmp_path / 'results.jsonl'
+    results_path.write_text('{"index": 0, "email": "ada.0@example.com", "status": "created"}\n'
+                            '{"index": 1, "email": "ada.1@example.com", "status": "failed"}\n'
+                            '{"index": 2, "email": "ada.2@exa')
+    runner = BulkAccountRunner(driver_pool, results_path, workers=2)
+    summary = runner.run(_user(index) for index in range(5))
+    assert (summary['skipped'], summary['attempted'], summary['created']) == (2, 3, 3)
+    results = _results(runner)
+    assert results[2] is None
+    assert sorted(result['index'] for result in results[3:]) == [2, 3, 4]
+    assert json.loads(runner.summary_path.read_text()) == summary
+
+
+def test_retry_failed_attempts_the_failed_records_again(tmp_path, driver_pool):
+    results_path = tmp_path / 'results.jsonl'
+    results_path.write_text('{"index": 0, "email": "ada.0@example.com", "status": "created"}\n'
+                            '{"index": 1, "email": "ada.1@example.com", "status": "failed"}\n')
+    runner = BulkAccountRunner(driver_pool, results_path, workers=2, retry_failed=True)
+    assert runner.completed_indexes() == {0}
+    assert runner.run(_user(index) for index in range(3))['created'] == 2
+
+
+def test_malformed_records_fail_alone(tmp_path, driver_pool):
+    source = tmp_path / 'users.jsonl'
+    source.write_text('\n'.join([json.dumps(_user(0)), json.dumps({**_user(1), 'password': ''}), '{not json',
+                                 json.dumps(_user(3))]))
+    runner = BulkAccountRunner(driver_pool, tmp_path / 'results.jsonl', workers=2)
+    summary = runner.run(read_user_records(source))
+    assert (summary['attempted'], summary['created'], summary['failed']) == (4, 2, 2)
+    results = {result['index']: result for result in _results(runner)}
+    assert 'misses' in results[1]['error'] and results[1]['email'] == 'ada.1@example.com'
+    assert 'not an object' in results[2]['error'] and results[2]['email'] is None
+    assert results[3]['status'] == 'created'
+
+
+def test_an_unreadable_source_stops_the_run(tmp_path, driver_pool):
+    def records():
+        yield _user(0)
+        raise OSError('disk error')
+
+    runner = BulkAccountRunner(driver_pool, tmp_path / 'results.jsonl', workers=2)
+    with pytest.raises(OSError):
+        runner.run(records())
+    assert json.loads(runner.summary_path.read_text())['created'] == 1
+
+
+def test_read_user_records_checks_the_file_up_front(tmp_path):
+    with pytest.raises(ValueError):
+        read_user_records(tmp_path / 'users.txt')
+    with pytest.raises(FileNotFoundError):
+        read_user_records(tmp_path / 'users.csv')
+    source = tmp_path / 'users.csv'
+    source.write_text('first_name,last_name,email,password\nAda,Lovelace,ada@example.com,Pa55word!\n')
+    assert list(read_user_records(source)) == [{**_user(0), 'email': 'ada@example.com'}]
+
+
+def test_the_results_file_belongs_to_one_source(tmp_path, driver_pool):
+    runner = BulkAccountRunner(driver_pool, tmp_path / 'results.jsonl')
+    meta = runner.load_meta(None, seed=7)
+    assert runner.load_meta(None, seed=8) == meta
+    with pytest.raises(ValueError):
+        runner.load_meta('users.csv')
@@ -0,0 +1,111 @@
+import json
+import os
+import pytest
+from utils import config_reader
+from utils.config_reader import get_config, load_config, parse_override, reload_config, set_cli_overrides
+
+CONFIG = {
+    'browser': 'Chrome',
+    'sign_in_page_url': 'https://shop.test/customer/account/login/',
+    'driver_pool': {'size': 1, 'max_leases': 25},
+    'retry': {'max_attempts': 3},
+}
+
+
+@pytest.fixture
+def config_file(tmp_path, monkeypatch):
+    for name in list(os.environ):
+        if name.startswith('LUMA_') and name != 'LUMA_CONFIG_FILE':
+            monkeypatch.delenv(name)
+    cli_overrides = dict(config_reader._cli_overrides)
+    path = tmp_path / 'config.json'
+    _write(path, CONFIG)
+    yield str(path)
+    set_cli_overrides(cli_overrides)
+
+
+def _write(path, data, mtime_ns: int = None):
+    with open(path, 'w') as f:
+        json.dump(data, f)
+    if mtime_ns is not None:
+        os.utime(path, ns=(mtime_ns, mtime_ns))
+
+
+def test_the_config_is_typed_and_read_only(config_file):
+    config = get_config(config_file)
+    assert config.browser == 'chrome'
+    assert config.driver_pool.max_leases == 25
+    assert config.driver_pool.warm_up is True
+    assert config.section('retry')['max_attempts'] == 3
+    assert config.section('missing') == {}
+    with pytest.raises(TypeError):
+        load_config(config_file)['browser'] = 'firefox'
+
+
+def test_the_config_is_parsed_again_only_when_its_mtime_changes(config_file):
+    config = get_config(config_file)
+    mtime_ns = os.stat(config_file).st_mtime_ns
+    _write(config_file, {**CONFIG, 'browser': 'firefox'}, mtime_ns)
+    assert get_config(config_file) is config
+    _write(config_file, {**CONFIG, 'browser': 'firefox'}, mtime_ns + 10 ** 9)
+    assert get_config(config_file).browser == 'firefox'
+
+
+def test_reload_config_parses_the_file_again(config_file):
+    config = get_config(config_file)
+    reload_config()
+    assert get_config(config_file) is not config
+    assert get_config(config_file) == config
+
+
+def test_environment_overrides(config_file, monkeypatch):
+    monkeypatch.setenv('LUMA_BROWSER', 'edge')
+    monkeypatch.setenv('LUMA_DRIVER_POOL__SIZE', '4')
+    monkeypatch.setenv('LUMA_RETRY__BACKOFF', '0.5')
+    monkeypatch.setenv('LUMA_NOT_A_CONFIG_KEY', '1')
+    reload_config()
+    config = get_config(config_file)
+    assert config.browser == 'edge'
+    assert config.driver_pool.size == 4
+    assert config.section('retry') == {'max_attempts': 3, 'backoff': 0.5}
+    assert 'not_a_config_key' not in load_config(config_file)
+
+
+def test_environment_aliases(config_file, monkeypatch):
+    monkeypatch.setenv('LUMA_DRIVER_OFFLINE', '1')
+    reload_config()
+    assert get_config(config_file).driver_cache.offline == 1
+    monkeypatch.setenv('LUMA_DRIVER_CACHE__OFFLINE', 'false')
+    reload_config()
+    assert get_config(config_file).driver_cache.offline is False
+
+
+def test_the_run_and_worker_ids_come_from_the_environment(config_file, monkeypatch):
+    assert (get_config(config_file).run_id, get_config(config_file).worker_id) == (None, 'main')
+    monkeypatch.setenv('LUMA_RUN_ID', '1e400000')
+    monkeypatch.setenv('LUMA_WORKER_ID', 'chrome-0')
+    reload_config()
+    assert load_config(config_file)['test_data'] == {'run_id': '1e400000', 'worker_id': 'chrome-0'}
+    assert (get_config(config_file).run_id, get_config(config_file).worker_id) == ('1e400000', 'chrome-0')
+
+
+def test_cli_overrides_take_precedence_over_the_environment(config_file, monkeypatch):
+    monkeypatch.setenv('LUMA_BROWSER', 'edge')
+    set_cli_overrides(dict([parse_override('browser=firefox'), parse_override('driver_pool.warm_up=false')]))
+    config = get_config(config_file)
+    assert config.browser == 'firefox'
+    assert config.driver_pool.warm_up is False
+
+
+def test_an_invalid_file_keeps_the_last_good_config(config_file):
+    config = get_config(config_file)
+    with open(config_file, 'a') as f:
+        f.write('{')
+    os.utime(config_file, ns=(os.stat(config_file).st_mtime_ns + 10 ** 9,) * 2)
+    assert get_config(config_file).browser == config.browser
+    assert get_config('missing/config.json') == config_reader.Config()
+
+
+def test_parse_override_rejects_a_missing_separator():
+    with pytest.raises(ValueError):
+        parse_override('browser')
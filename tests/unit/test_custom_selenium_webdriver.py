@@ -0,0 +1,103 @@
+from types import SimpleNamespace
+import pytest
+from selenium.webdriver.common.by import By
+from utils.custom_selenium_webdriver import CustomSeleniumWebDriver
+from utils.driver_pool import DriverPool
+from utils.errors import ElementNotFoundError, StepTimeoutError, TransientStepError
+from utils.fake_webdriver import FakeWebDriver
+from tests import conftest
+
+PAGE_URL = 'https://shop.test/page'
+MISSING = (By.ID, 'missing')
+HIDDEN = (By.ID, 'hidden')
+
+
+def _fake_browser():
+    browser = FakeWebDriver({PAGE_URL: {'title': 'Page', 'elements': {HIDDEN: {'displayed': False}}}})
+    browser.get(PAGE_URL)
+    return browser
+
+
+@pytest.fixture
+def lease():
+    pool = DriverPool(_fake_browser, size=2)
+    lease = pool.checkout()
+    yield lease
+    lease.release()
+    pool.shutdown()
+
+
+def _run_call_hook(lease, step):
+    """Runs the test call hook of conftest around a test whose body is ``step``, returning its runs and error."""
+    runs = []
+
+    def runtest():
+        runs.append(lease.web_driver)
+        step()
+
+    item = SimpleNamespace(nodeid=f'tests/unit/test_step.py::{step.__name__}', funcargs={'driver': lease},
+                           config=SimpleNamespace(getoption=lambda name: False), runtest=runtest)
+    hook = conftest.pytest_runtest_call(item)
+    next(hook)
+    try:
+        step()
+    except Exception as e:
+        first_error = e
+    with pytest.raises(type(first_error)) as error:
+        hook.throw(first_error)
+    return runs, error.value
+
+
+def test_missing_locator_raises_element_not_found(lease):
+    web_driver = CustomSeleniumWebDriver(lease, page_object='Test')
+    with pytest.raises(ElementNotFoundError) as error:
+        web_driver.get_element(MISSING, timeout=0.05)
+    assert not isinstance(error.value, TransientStepError)
+    with pytest.raises(ElementNotFoundError):
+        web_driver.click(MISSING, timeout=0.05)
+
+
+def test_present_but_not_clickable_element_times_out(lease):
+    web_driver = CustomSeleniumWebDriver(lease, page_object='Test')
+    with pytest.raises(StepTimeoutError):
+        web_driver.click(HIDDEN, timeout=0.05)
+
+
+def test_missing_locator_is_not_retried(lease, monkeypatch):
+    monkeypatch.setattr(conftest.time, 'sleep', lambda seconds: None)
+
+    def click_missing():
+        lease.get(PAGE_URL)
+        CustomSeleniumWebDriver(lease, page_object='Test').click(MISSING, timeout=0.05)
+
+    runs, error = _run_call_hook(lease, click_missing)
+    assert isinstance(error, ElementNotFoundError)
+    assert runs == []
+    assert lease.renewals == 0
+
+
+def test_element_that_never_becomes_clickable_is_retried_on_a_fresh_browser(lease, monkeypatch):
+    monkeypatch.setattr(conftest.time, 'sleep', lambda seconds: None)
+
+    def click_hidden():
+        lease.get(PAGE_URL)
+        CustomSeleniumWebDriver(lease, page_object='Test').click(HIDDEN, timeout=0.05)
+
+    runs, error = _run_call_hook(lease, click_hidden)
+    max_attempts = conftest.get_config().section('retry').get('max_attempts', 3)
+    assert isinstance(error, StepTimeoutError)
+    assert len(runs) == max_attempts - 1
+    assert lease.renewals == max_attempts - 1
+
+
+
+def test_check_pages_waits_for_the_navigation_of_a_new_tab(lease):
+    lease.web_driver.tab_load_polls = 2
+    web_driver = CustomSeleniumWebDriver(lease, page_object='Test')
+    [result] = web_driver.check_pages([PAGE_URL], timeout=5)
+    assert (result['url'], result['title'], result['error']) == (PAGE_URL, 'Page', None)
+    lease.web_driver.tab_load_polls = 1000
+    [result] = web_driver.check_pages([PAGE_URL], timeout=0.05)
+    assert (result['ready_state'], result['error']) == ('loading', 'timeout')
+    assert 'title' not in result
+    assert lease.window_handles == [lease.current_window_handle]
@@ -0,0 +1,153 @@
+import pytest
+from selenium.common.exceptions import NoSuchWindowException
+from utils.custom_selenium_webdriver import _OPEN_TAB_SCRIPT
+from utils.driver_pool import DriverLease, DriverPool
+from utils.element_cache import get_element_cache
+from utils.fake_webdriver import FakeWebDriver
+
+PAGE_URL = 'https://shop.test/page'
+
+
+class _FakeBrowser(FakeWebDriver):
+    """Fake browser whose session can be killed, which fails the liveness probe of the pool."""
+
+    def __init__(self):
+        self.dead = False
+        super().__init__({PAGE_URL: {'title': 'Page', 'elements': {}}})
+
+    @property
+    def current_window_handle(self) -> str:
+        if self.dead:
+            raise NoSuchWindowException('The browser session is gone')
+        return self._handle
+
+    @current_window_handle.setter
+    def current_window_handle(self, handle: str) -> None:
+        self._handle = handle
+
+
+@pytest.fixture
+def browsers():
+    return []
+
+
+@pytest.fixture
+def pool(browsers):
+    def factory():
+        browsers.append(_FakeBrowser())
+        return browsers[-1]
+
+    pool = DriverPool(factory, size=2, max_leases=3)
+    yield pool
+    pool.shutdown()
+
+
+def test_acquire_starts_browsers_up_to_the_pool_size(pool, browsers):
+    first, second = pool.acquire(), pool.acquire()
+    assert browsers == [first, second]
+    with pytest.raises(TimeoutError):
+        pool.acquire(timeout=0.01)
+    pool.release(first)
+    assert pool.acquire(timeout=0.01) is first
+    assert len(browsers) == 2
+
+
+def test_release_resets_the_browser_state(pool):
+    web_driver = pool.acquire()
+    web_driver.get(PAGE_URL)
+    web_driver.execute_script(_OPEN_TAB_SCRIPT, PAGE_URL, '_blank')
+    assert len(web_driver.window_handles) == 2
+    pool.release(web_driver)
+    assert web_driver.window_handles == ['window-0']
+    assert web_driver.current_url == 'about:blank'
+    assert web_driver.calls['delete_all_cookies'] == 1
+    assert pool.stats()['resets'] == 1
+
+
+def test_a_browser_is_recycled_after_max_leases(pool, browsers):
+    for _ in range(3):
+        with pool.lease() as web_driver:
+            assert web_driver is browsers[0]
+    assert browsers[0].calls['quit'] == 1
+    assert pool.stats()['recycled'] == 1
+    with pool.lease() as web_driver:
+        assert web_driver is browsers[1]
+
+
+def test_a_dead_browser_is_recycled_on_acquire(pool, browsers):
+    with pool.lease():
+        pass
+    browsers[0].dead = True
+    web_driver = pool.acquire()
+    assert web_driver is browsers[1]
+    assert browsers[0].calls['quit'] == 1
+    pool.release(web_driver)
+
+
+def test_a_browser_failing_its_reset_is_recycled(pool, browsers):
+    web_driver = pool.acquire()
+    web_driver.dead = True
+    pool.release(web_driver)
+    assert pool.stats()['recycled'] == 1
+    with pool.lease() as web_driver:
+        assert web_driver is browsers[1]
+
+
+def test_renew_swaps_the_browser_behind_the_lease(pool, browsers):
+    lease = pool.checkout()
+    assert isinstance(lease, DriverLease)
+    first = lease.web_driver
+    lease.get(PAGE_URL)
+    element_cache = get_element_cache(lease)
+    element_cache.put(('id', 'email'), object())
+    other = pool.acquire()
+    lease.renew()
+    assert lease.renewals == 1
+    assert lease.web_driver is first
+    assert lease.current_url == 'about:blank'
+    assert element_cache.get(('id', 'email')) is None
+    pool.release(other)
+    lease.release()
+    assert lease.web_driver is None
+    assert pool.stats()['checkouts'] == 3
+
+
+def test_close_closes_the_tab_and_keeps_the_lease(pool):
+    lease = pool.checkout()
+    lease.execute_script(_OPEN_TAB_SCRIPT, PAGE_URL, '_blank')
+    lease.switch_to.window(lease.window_handles[-1])
+    lease.close()
+    assert lease.web_driver is not None
+    assert lease.window_handles == ['window-0']
+    lease.release()
+
+
+def test_shutdown_quits_idle_browsers_and_refuses_leases(pool, browsers):
+    idle, leased = pool.acquire(), pool.acquire()
+    pool.release(idle)
+    pool.shutdown()
+    assert idle.calls['quit'] == 1
+    with pytest.raises(RuntimeError):
+        pool.acquire()
+    pool.release(leased)
+    assert leased.calls['quit'] == 1
+
+
+def test_a_failed_replacement_frees_its_slot(browsers):
+    def factory():
+        if browsers:
+            raise NoSuchWindowException('The browser failed to start')
+        browsers.append(_FakeBrowser())
+        return browsers[-1]
+
+    pool = DriverPool(factory, size=1)
+    with pool.lease():
+        pass
+    browsers[0].dead = True
+    with pytest.raises(RuntimeError):
+        pool.acquire(timeout=0.01)
+    assert pool.stats()['recycled'] == 1
+    browsers.clear()
+    assert pool.acquire(timeout=0.01) is browsers[0]
+    pool.release(object())
+    pool.shutdown()
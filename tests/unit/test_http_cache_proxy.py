@@ -0,0 +1,86 @@
+import json
+import os
+import time
+import pytest
+from utils import http_cache_proxy
+from utils.http_cache_proxy import CachingProxy, ContentStore
+
+UPSTREAM = 'https://shop.test'
+FORM = [('Content-Type', 'application/x-www-form-urlencoded'), ('Cookie', 'PHPSESSID=abc; form_key=xyz')]
+
+
+@pytest.fixture
+def store(tmp_path):
+    return ContentStore(store_dir=tmp_path, max_age_seconds=3600, max_bytes=10)
+
+
+def _put(store, key: str, body: bytes, last_access: float, stored_at: float = None):
+    store.put(key, f'{UPSTREAM}/{key}', 200, [], body)
+    entry_path = store._entry_path(key)
+    if stored_at is not None:
+        entry = json.loads(entry_path.read_text())
+        entry_path.write_text(json.dumps({**entry, 'stored_at': stored_at}))
+    os.utime(entry_path, (last_access, last_access))
+
+
+def test_evict_drops_expired_entries_then_the_least_recently_used(store):
+    now = time.time()
+    _put(store, 'aa01', b'1234', now - 10)
+    _put(store, 'aa02', b'5678', now - 30)
+    _put(store, 'aa03', b'abcd', now - 20)
+    _put(store, 'aa04', b'efgh', now, stored_at=now - 7200)
+    stats = store.evict()
+    assert stats == {'entries': 2, 'bytes': 8, 'evicted_entries': 2, 'evicted_objects': 2}
+    assert store.get('aa01')[2] == b'1234'
+    assert store.get('aa03')[2] == b'abcd'
+    assert store.get('aa02') is None
+    assert store.get('aa04') is None
+
+
+def test_a_body_shared_by_several_entries_is_counted_once(store):
+    now = time.time()
+    _put(store, 'aa01', b'12345678', now - 10)
+    _put(store, 'aa02', b'12345678', now - 20)
+    _put(store, 'aa03', b'abcd', now - 30)
+    assert store.evict() == {'entries': 2, 'bytes': 8, 'evicted_entries': 1, 'evicted_objects': 1}
+    assert store.get('aa02')[2] == b'12345678'
+
+
+@pytest.fixture
+def upstream(monkeypatch):
+    requests = []
+
+    def request_upstream(method, url, headers, body):
+        requests.append((method, url, body))
+        return 302, [('Location', f'{UPSTREAM}/customer/account/')], f'response {len(requests)}'.encode()
+
+    monkeypatch.setattr(http_cache_proxy, '_request_upstream', request_upstream)
+    return requests
+
+
+def _proxy(mode: str, store) -> CachingProxy:
+    return CachingProxy(mode, UPSTREAM, store)
+
+
+def test_form_posts_are_recorded_and_replayed(store, upstream):
+    url = f'{UPSTREAM}/customer/account/loginPost/'
+    recorded = _proxy('record', store).fetch('POST', url, FORM, b'form_key=k1&login%5Busername%5D=a%40b.test')
+    replay = _proxy('replay', store)
+    status, headers, body = replay.fetch('POST', url, FORM, b'form_key=k2&login%5Busername%5D=a%40b.test')
+    assert (status, [tuple(header) for header in headers], body) == recorded
+    status, _, body = replay.fetch('POST', url, FORM, b'form_key=k2&login%5Busername%5D=c%40d.test')
+    assert status == 504
+    assert b'test_data.seed' in body
+    assert len(upstream) == 1
+
+
+def test_the_key_depends_on_the_body_and_the_cookies(store):
+    proxy = _proxy('replay', store)
+    url = f'{UPSTREAM}/customer/account/'
+    anonymous = proxy.key_of('GET', url, [('Cookie', 'PHPSESSID=abc')], b'')
+    assert proxy.key_of('GET', url, [('Cookie', 'PHPSESSID=def')], b'') == anonymous
+    signed_in = proxy.key_of('GET', url, [('Cookie', 'PHPSESSID=abc; X-Magento-Vary=v1')], b'')
+    assert signed_in != anonymous
+    assert proxy.key_of('GET', url, [('Cookie', 'X-Magento-Vary=v2; PHPSESSID=abc')], b'') != signed_in
+    assert proxy.key_of('POST', url, [], b'a=1') != proxy.key_of('POST', url, [], b'a=2')
+    assert proxy.key_of('POST', url, [], b'') != proxy.key_of('GET', url, [], b'')
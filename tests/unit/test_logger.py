@@ -0,0 +1,41 @@
+from decimal import Decimal
+from fractions import Fraction
+import logging
+import queue
+from utils.logger import _LazyQueueHandler
+
+
+def _prepared(msg: str, args) -> logging.LogRecord:
+    record = logging.LogRecord('test', logging.INFO, __file__, 1, msg, args, None)
+    return _LazyQueueHandler(queue.Queue()).prepare(record)
+
+
+def test_mutable_arguments_are_frozen_when_logged():
+    stats = {'hits': 1}
+    steps = ['click']
+    record = _prepared('Stats: %s, steps: %r', (stats, steps))
+    stats['hits'] = 2
+    steps.append('type_text')
+    assert record.getMessage() == "Stats: {'hits': 1}, steps: ['click']"
+
+
+def test_immutable_arguments_are_formatted_by_the_listener():
+    locator = ('id', 'email')
+    record = _prepared('%s took %.3fs (%d attempts)', (locator, 0.5, 2))
+    assert record.args[0] is locator
+    assert record.getMessage() == "('id', 'email') took 0.500s (2 attempts)"
+
+
+def test_mapping_arguments_are_frozen():
+    stats = {'pages': [1]}
+    record = _prepared('%(pages)s', (stats,))
+    stats['pages'].append(2)
+    assert record.getMessage() == '[1]'
+
+
+def test_numeric_placeholders_work_with_any_number():
+    record = _prepared('%d pages, %.2f s, %x', (Decimal('3'), Fraction(1, 4), 255))
+    assert record.args[0] == Decimal('3')
+    assert record.getMessage() == '3 pages, 0.25 s, ff'
+    record = _prepared('%d of %s', (Decimal('3'), ['a']))
+    assert (record.getMessage(), record.args) == ("3 of ['a']", None)
@@ -0,0 +1,53 @@
+import re
+from concurrent.futures import ThreadPoolExecutor
+from utils.config_reader import reload_config
+from utils.random_data_generator import UserDataFactory
+
+
+def _emails(users) -> list:
+    return [user['email'] for user in users]
+
+
+def test_emails_are_unique_across_workers_with_the_same_seed():
+    workers = [UserDataFactory(seed=42, batch_size=10, run_id='run1', worker_id=f'gw{index}') for index in range(4)]
+    emails = [email for factory in workers for email in _emails(factory.generate_users(25))]
+    assert len(set(emails)) == len(emails) == 100
+    assert all('.run1.gw' in email and email.endswith('@example.com') for email in emails)
+
+
+def test_emails_are_unique_across_threads_of_a_worker():
+    factory = UserDataFactory(seed=42, batch_size=7, run_id='run1', worker_id='main')
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        emails = _emails(executor.map(lambda _: factory.next_user(), range(200)))
+    assert len(set(emails)) == 200
+
+
+def test_emails_differ_between_runs(monkeypatch):
+    monkeypatch.delenv('LUMA_RUN_ID', raising=False)
+    reload_config()
+    first = UserDataFactory(seed=42, worker_id='main').generate_users(5)
+    second = UserDataFactory(seed=42, worker_id='main').generate_users(5)
+    assert not set(_emails(first)) & set(_emails(second))
+
+
+def test_a_seed_and_run_id_reproduce_the_same_users():
+    first = UserDataFactory(seed=7, run_id='run1', worker_id='main').generate_users(5)
+    second = UserDataFactory(seed=7, run_id='run1', worker_id='main').generate_users(5)
+    assert first == second
+
+
+def test_next_user_serves_the_pool_in_batches():
+    factory = UserDataFactory(seed=7, batch_size=3, run_id='run1', worker_id='main', email_domain='shop.test')
+    users = [factory.next_user() for _ in range(4)]
+    assert [email.split('@')[0].rsplit('.', 1)[1] for email in _emails(users)] == ['1', '2', '3', '4']
+    assert len(factory._pool) == 2
+    assert all(email.endswith('@shop.test') for email in _emails(users))
+    assert {'first_name', 'last_name', 'email', 'password'} == set(users[0])
+
+
+def test_emails_of_non_latin_names_are_valid():
+    for locale in ('ru_RU', 'ja_JP', 'el_GR'):
+        emails = _emails(UserDataFactory(locale=locale, seed=3, run_id='run1', worker_id='main').generate_users(20))
+        local_parts = [email.split('@')[0] for email in emails]
+        assert all(re.fullmatch(r'[a-z0-9]+(\.[a-z0-9]+)*', local_part) for local_part in local_parts), local_parts
+        assert not any(local_part.startswith('user.run1') for local_part in local_parts)
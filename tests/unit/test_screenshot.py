@@ -0,0 +1,71 @@
+import hashlib
+import threading
+from types import SimpleNamespace
+from utils import screenshot
+from utils.screenshot import ScreenshotManager
+
+TEST = 'tests/test_page.py::TestPage::test_step'
+
+
+class _Browser:
+    """Returns the given frames, one per screenshot."""
+
+    def __init__(self, *frames: bytes):
+        self.frames = list(frames)
+
+    def get_screenshot_as_png(self) -> bytes:
+        return self.frames.pop(0)
+
+
+def _capture(manager, browser, count: int) -> list:
+    paths = [manager.capture(browser, TEST, f'step{index}') for index in range(count)]
+    manager.shutdown()
+    return paths
+
+
+def test_consecutive_identical_frames_are_skipped(tmp_path):
+    manager = ScreenshotManager(output_dir=tmp_path, mode='on-step', max_workers=1)
+    paths = _capture(manager, _Browser(b'a', b'a', b'a', b'b', b'a'), 5)
+    assert [path.exists() for path in paths] == [True, False, False, True, True]
+    assert manager.skipped == 2
+
+
+def test_frames_are_compared_in_capture_order_when_hashed_out_of_order(tmp_path, monkeypatch):
+    last_frame_hashed = threading.Event()
+    hashed_frames = []
+
+    def sha1(data: bytes):
+        # the first frame is hashed last, after the two others
+        hashed_frames.append(data)
+        if hashed_frames == [b'first']:
+            last_frame_hashed.wait(5)
+        elif data == b'second':
+            last_frame_hashed.set()
+        return hashlib.sha1(data)
+
+    monkeypatch.setattr(screenshot, 'hashlib', SimpleNamespace(sha1=sha1))
+    manager = ScreenshotManager(output_dir=tmp_path, mode='on-step', max_workers=3)
+    paths = [manager.capture(_Browser(frame), TEST, f'step{index}')
+             for index, frame in enumerate((b'first', b'first', b'second'))]
+    manager.shutdown()
+    assert [path.exists() for path in paths] == [True, False, True]
+    assert manager.skipped == 1
+
+
+def test_waiting_returns_the_file_showing_the_frame(tmp_path):
+    manager = ScreenshotManager(output_dir=tmp_path, mode='always')
+    browser = _Browser(b'a', b'a', b'b')
+    first = manager.capture(browser, TEST, 'step', wait=True)
+    assert first.exists()
+    assert manager.capture(browser, TEST, 'end', wait=True) == first
+    last = manager.capture(browser, TEST, 'end', wait=True)
+    assert last != first and last.exists()
+    manager.shutdown()
+    assert manager.skipped == 1
+
+
+def test_dedupe_can_be_disabled(tmp_path):
+    manager = ScreenshotManager(output_dir=tmp_path, mode='always', dedupe=False)
+    paths = _capture(manager, _Browser(b'a', b'a'), 2)
+    assert all(path.exists() for path in paths)
+    assert manager.skipped == 0
@@ -0,0 +1,94 @@
+import pytest
+from utils.config_reader import get_config
+from utils.fake_webdriver import FakeWebDriver
+from utils.session_cache import _READ_STORAGE_SCRIPT, SessionCache, get_origin
+from tests import conftest
+
+USER = {'email': 'ada@example.com', 'password': 'Pa55word!'}
+
+
+class _Shop(FakeWebDriver):
+    """Fake browser of a shop that redirects to the sign-in page unless the session cookie is one it accepts."""
+
+    def __init__(self, accepted_sessions: set):
+        super().__init__({})
+        self.accepted_sessions = accepted_sessions
+        self.cookies = []
+
+    def get(self, url: str) -> None:
+        account_page_url = get_origin(get_config().sign_in_page_url) + '/customer/account/'
+        if url == account_page_url and not {cookie['value'] for cookie in self.cookies} & self.accepted_sessions:
+            url = get_config().sign_in_page_url.rstrip('/') + '/referer/aHR0cHM6/'
+        super().get(url)
+
+    def add_cookie(self, cookie: dict) -> None:
+        self.cookies.append(cookie)
+
+    def get_cookies(self) -> list:
+        return list(self.cookies)
+
+    def delete_all_cookies(self) -> None:
+        super().delete_all_cookies()
+        self.cookies = []
+
+    def execute_script(self, script: str, *args):
+        if script == _READ_STORAGE_SCRIPT:
+            return {'local': {}, 'session': {}}
+        return super().execute_script(script, *args)
+
+
+@pytest.fixture
+def session_cache(tmp_path):
+    return SessionCache(tmp_path)
+
+
+@pytest.fixture
+def sign_in_form(monkeypatch):
+    """Signs in through the UI by giving the browser the session cookie of the sign-in, or none when it fails."""
+    sign_ins = []
+
+    class SignInPage:
+        def __init__(self, driver):
+            self.driver = driver
+
+        def sign_in(self, email, password):
+            sign_ins.append(email)
+            if password == USER['password']:
+                self.driver.add_cookie({'name': 'PHPSESSID', 'value': 'new'})
+            self.driver.get(get_config().sign_in_page_url)
+
+    monkeypatch.setattr(conftest.pages, 'get', lambda name, driver: SignInPage(driver))
+    return sign_ins
+
+
+def _base_url() -> str:
+    return get_origin(get_config().sign_in_page_url)
+
+
+def test_a_session_rejected_by_the_server_is_dropped_and_replaced(session_cache, sign_in_form):
+    browser = _Shop({'old'})
+    browser.add_cookie({'name': 'PHPSESSID', 'value': 'old'})
+    session_cache.capture(browser, USER['email'], _base_url())
+    browser.accepted_sessions = {'new'}
+    browser.cookies = []
+    conftest._sign_in(browser, USER, session_cache)
+    assert sign_in_form == [USER['email']]
+    assert browser.get_cookies() == [{'name': 'PHPSESSID', 'value': 'new'}]
+    assert session_cache._load(USER['email'], _base_url())['cookies'] == [{'name': 'PHPSESSID', 'value': 'new'}]
+
+
+def test_an_accepted_session_is_restored_without_signing_in(session_cache, sign_in_form):
+    browser = _Shop({'old'})
+    browser.add_cookie({'name': 'PHPSESSID', 'value': 'old'})
+    session_cache.capture(browser, USER['email'], _base_url())
+    browser.cookies = []
+    conftest._sign_in(browser, USER, session_cache)
+    assert sign_in_form == []
+    assert browser.current_url == _base_url() + '/customer/account/'
+
+
+def test_a_failed_sign_in_is_not_cached(session_cache, sign_in_form):
+    browser = _Shop({'new'})
+    conftest._sign_in(browser, {**USER, 'password': 'wrong'}, session_cache)
+    assert sign_in_form == [USER['email']]
+    assert session_cache._load(USER['email'], _base_url()) is None
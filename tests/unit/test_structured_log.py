@@ -0,0 +1,95 @@
+import gzip
+import json
+import logging
+import pytest
+from utils import structured_log
+from utils.structured_log import RecordFilter, StructuredLogHandler, aggregate, iter_records, read_indexes
+from utils.step_timer import STEP_LOGGER_NAME
+
+TEST = 'tests/test_sign_in_page.py::TestSignInPage::test_sign_in'
+
+
+def _record(message: str, level: int = logging.INFO, created: float = 1000.0, step: bool = False, **tags):
+    record = logging.LogRecord(STEP_LOGGER_NAME if step else 'test', level, __file__, 1, message, None, None)
+    record.created = created
+    record.__dict__.update({'test': None, 'action': None, 'page_object': None, 'locator': None, **tags})
+    return record
+
+
+@pytest.fixture
+def log_dir(tmp_path):
+    handler = StructuredLogHandler(tmp_path, run_id='run1', worker_id='gw0', max_bytes=600)
+    for second in range(6):
+        handler.handle(_record(f'step {second}', created=1000.0 + second, step=True, test=TEST, action='click',
+                               page_object='SignInPage', locator='id=email', duration=0.1 * (second + 1)))
+    handler.handle(_record('slow page', logging.WARNING, 1010.0, test=TEST, page_object='SignInPage'))
+    handler.handle(_record('session ended', created=1020.0))
+    handler.close()
+    return tmp_path
+
+
+def test_segments_rotate_after_max_bytes_and_are_indexed(log_dir):
+    segments = list(read_indexes(log_dir, 'run1'))
+    assert [segment.name for segment, _ in segments] == ['gw0-0001.jsonl.gz', 'gw0-0002.jsonl.gz',
+                                                          'gw0-0003.jsonl.gz']
+    first_index = segments[0][1]
+    assert first_index['records'] == 3 and first_index['bytes'] >= 600
+    assert (first_index['first_ts'], first_index['last_ts']) == (1000.0, 1002.0)
+    assert first_index['levels'] == {'INFO': 3}
+    assert first_index['locator'] == ['id=email'] and first_index['test'] == [TEST]
+    assert sum(index['records'] for _, index in segments) == 8
+    with gzip.open(segments[0][0], 'rt') as f:
+        assert json.loads(f.readline())['duration'] == 0.1
+
+
+def test_a_resumed_run_appends_new_segments(log_dir):
+    handler = StructuredLogHandler(log_dir, run_id='run1', worker_id='gw0')
+    handler.handle(_record('resumed'))
+    handler.close()
+    assert [segment.name for segment, _ in read_indexes(log_dir, 'run1')][-1] == 'gw0-0004.jsonl.gz'
+
+
+def test_records_are_filtered(log_dir):
+    assert [entry['message'] for entry in iter_records(log_dir, RecordFilter(level='warn'))] == ['slow page']
+    assert len(list(iter_records(log_dir, RecordFilter(test='test_sign_in', kind='step', since=1002)))) == 4
+    assert [entry['message'] for entry in iter_records(log_dir, RecordFilter(grep='ended'))] == ['session ended']
+    assert list(iter_records(log_dir, RecordFilter(run_id='other'))) == []
+
+
+def test_segments_that_cannot_match_are_not_read(log_dir, monkeypatch):
+    opened = []
+
+    def gzip_open(path, *args, **kwargs):
+        opened.append(path.name)
+        return gzip.GzipFile(path)
+
+    monkeypatch.setattr(structured_log.gzip, 'open', gzip_open)
+    list(iter_records(log_dir, RecordFilter(level='WARNING')))
+    assert opened == ['gw0-0003.jsonl.gz']
+
+
+def test_a_segment_cut_by_an_interrupted_run_is_read_up_to_its_last_line(log_dir):
+    segment = log_dir / 'run1' / 'gw0-0001.jsonl.gz'
+    (log_dir / 'run1' / 'gw0-0001.idx.json').unlink()
+    segment.write_bytes(segment.read_bytes()[:-10])
+    messages = [entry['message'] for entry in iter_records(log_dir)]
+    assert messages[-5:] == ['step 3', 'step 4', 'step 5', 'slow page', 'session ended']
+
+
+def test_step_records_are_aggregated(log_dir):
+    groups = aggregate(iter_records(log_dir), by='locator')
+    assert list(groups) == ['click id=email']
+    assert (groups['click id=email']['steps'], groups['click id=email']['max_ms']) == (6, 600.0)
+    groups = aggregate(iter_records(log_dir), by='page_object')
+    assert (groups['SignInPage']['count'], groups['SignInPage']['steps']) == (7, 6)
+    assert groups['-'] == {'count': 1, 'levels': {'INFO': 1}, 'steps': 0}
+
+
+def test_an_unknown_level_is_rejected(log_dir, capsys):
+    with pytest.raises(ValueError):
+        RecordFilter(level='verbose')
+    with pytest.raises(SystemExit):
+        structured_log.main(['--dir', str(log_dir), 'records', '--level', 'verbose'])
+    assert 'Unknown log level: verbose' in capsys.readouterr().err
+    assert structured_log.main(['--dir', str(log_dir), 'records', '--level', 'warn', '--json']) == 0
+    assert json.loads(capsys.readouterr().out)['message'] == 'slow page'
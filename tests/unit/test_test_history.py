@@ -0,0 +1,71 @@
+import pytest
+from utils.test_history import TestHistory
+
+TEST = 'tests/test_page.py::TestPage::test_step'
+
+
+@pytest.fixture
+def history(tmp_path):
+    history = TestHistory(db_path=tmp_path / 'history.sqlite', window=20, min_runs=5, flip_rate=0.2,
+                          release_after=10)
+    yield history
+    history.close()
+
+
+def _record(history, *outcomes, attempts: int = 1):
+    for outcome in outcomes:
+        history.record(TEST, outcome, 1.0, attempts)
+
+
+def test_reading_an_empty_history_does_not_create_the_database(history):
+    assert history.quarantined() == {}
+    assert history.touches() == {}
+    assert history.durations() == {}
+    assert history.flakiness(TEST)['runs'] == 0
+    assert not history.db_path.exists()
+    _record(history, 'passed')
+    assert history.db_path.exists()
+
+
+def test_a_retried_pass_quarantines_only_after_min_runs(history):
+    _record(history, 'passed', 'passed', 'passed')
+    _record(history, 'passed', attempts=2)
+    assert history.flakiness(TEST)['retried_passes'] == 1
+    assert history.quarantined() == {}
+    _record(history, 'passed')
+    assert history.flakiness(TEST)['flaky']
+    assert TEST in history.quarantined()
+
+
+def test_outcome_flips_quarantine_at_the_flip_rate(history):
+    _record(history, *['passed'] * 9, 'failed')
+    assert history.flakiness(TEST)['flip_rate'] == pytest.approx(1 / 9, abs=0.001)
+    assert history.quarantined() == {}
+    _record(history, 'passed')
+    assert history.flakiness(TEST)['flip_rate'] == 0.2
+    assert 'flip rate 0.2' in history.quarantined()[TEST]
+
+
+def test_skipped_runs_are_ignored(history):
+    _record(history, 'passed', 'failed', 'passed', 'failed')
+    _record(history, *['skipped'] * 5)
+    assert history.flakiness(TEST)['runs'] == 4
+    assert history.quarantined() == {}
+
+
+def test_a_quarantined_test_is_released_after_release_after_clean_runs(history):
+    _record(history, 'passed', 'failed', 'passed', 'failed', 'passed')
+    assert TEST in history.quarantined()
+    _record(history, *['passed'] * 8)
+    assert TEST in history.quarantined()
+    _record(history, 'passed')
+    assert history.flakiness(TEST)['clean_streak'] == 10
+    assert history.quarantined() == {}
+
+
+def test_touches_are_replaced_by_a_complete_run_and_added_by_a_failed_one(history):
+    history.record_touches(TEST, {('SignInPage', 'email'), ('SignInPage', None)})
+    history.record_touches(TEST, {('AccountPage', None)}, replace=False)
+    assert history.touches()[TEST] == {('SignInPage', 'email'), ('SignInPage', None), ('AccountPage', None)}
+    history.record_touches(TEST, {('SignUpPage', 'email')})
+    assert history.touches() == {TEST: {('SignUpPage', 'email')}}
@@ -0,0 +1,81 @@
+from pathlib import Path
+import pytest
+from utils import test_impact
+from utils.test_impact import ImpactAnalyzer, _declared_locators, schedule
+
+PAGE_MODULE = 'pages/sign_in_page.py'
+SIGN_IN = 'tests/test_sign_in_page.py::TestSignInPage::test_sign_in'
+SIGN_IN_FORM = 'tests/test_sign_in_page.py::TestSignInPage::test_sign_in_form'
+SIGN_UP = 'tests/test_sign_up_page.py::TestSignUpPage::test_sign_up'
+NEW_TEST = 'tests/test_page_smoke.py::TestPageSmoke::test_page_titles'
+NODE_IDS = [SIGN_IN, SIGN_IN_FORM, SIGN_UP, NEW_TEST]
+TOUCHES = {
+    SIGN_IN: {('SignInPage', 'id=email'), ('SignInPage', 'id=pass')},
+    SIGN_IN_FORM: {('SignInPage', None)},
+    SIGN_UP: {('SignUpPage', 'id=email_address')},
+}
+SOURCE = (Path(__file__).resolve().parents[2] / PAGE_MODULE).read_text()
+
+
+def _analyzer(monkeypatch, changed: dict) -> ImpactAnalyzer:
+    """Returns an analyzer seeing the {path: (old source, new source)} changes."""
+    analyzer = ImpactAnalyzer('main')
+    monkeypatch.setattr(analyzer, 'changed_files', lambda: sorted(changed))
+    monkeypatch.setattr(test_impact, '_git_show', lambda ref, path: changed[path][0])
+    monkeypatch.setattr(test_impact, '_read', lambda path: changed[str(path.relative_to(test_impact._PROJECT_ROOT))][1])
+    return analyzer
+
+
+def test_a_changed_locator_selects_the_tests_that_touched_it(monkeypatch):
+    changed = {PAGE_MODULE: (SOURCE, SOURCE.replace("(By.ID, 'pass')", "(By.ID, 'password')"))}
+    assert _analyzer(monkeypatch, changed).select(NODE_IDS, TOUCHES) == [SIGN_IN, NEW_TEST]
+
+
+def test_another_change_of_a_page_module_selects_the_tests_of_its_pages(monkeypatch):
+    changed = {PAGE_MODULE: (SOURCE, SOURCE.replace("title = 'Customer Login'", "title = 'Sign In'"))}
+    assert _analyzer(monkeypatch, changed).select(NODE_IDS, TOUCHES) == [SIGN_IN, SIGN_IN_FORM, NEW_TEST]
+
+
+def test_the_framework_selects_every_test(monkeypatch):
+    changed = {'utils/smart_wait.py': ('', '')}
+    assert _analyzer(monkeypatch, changed).select(NODE_IDS, TOUCHES) == NODE_IDS
+
+
+def test_dependencies_of_the_selected_tests_are_selected(monkeypatch):
+    changed = {'tests/test_sign_up_page.py': ('', '')}
+    dependencies = {SIGN_UP: ['tests/test_sign_in_page.py::TestSignInPage']}
+    assert _analyzer(monkeypatch, changed).select(NODE_IDS, TOUCHES, dependencies) == NODE_IDS[:3] + [NEW_TEST]
+
+
+def test_locators_are_read_without_running_the_module():
+    source = '''
+class Page:
+    locators = {
+        'email': (By.ID, 'email'),
+        'computed': (By.ID, __import__('os').getcwd()),
+        'unknown': (By.NOWHERE, 'x'),
+    }
+'''
+    skeleton, declared = _declared_locators(source)
+    assert declared == {'Page': {'email': 'id=email'}}
+    assert 'getcwd' in skeleton and 'NOWHERE' in skeleton and "'email'" not in skeleton
+    assert _declared_locators(source.replace("'email')", "'mail')"))[0] == skeleton
+    assert _declared_locators('class Page(') is None
+
+
+@pytest.mark.parametrize('workers, expected', [
+    (1, [['a::T::1', 'a::T::2', 'b::T::1', 'c::1', 'd::1']]),
+    (2, [['a::T::1', 'a::T::2', 'd::1'], ['b::T::1', 'c::1']]),
+    (3, [['a::T::1', 'a::T::2'], ['b::T::1'], ['c::1', 'd::1']]),
+])
+def test_schedule_packs_the_longest_groups_first(workers, expected):
+    durations = {'a::T::1': 4, 'a::T::2': 2, 'b::T::1': 5, 'c::1': 1}
+    bins = schedule(['a::T::1', 'a::T::2', 'b::T::1', 'c::1', 'd::1'], durations, workers, default_duration=0.5)
+    assert [sorted(tests) for tests in bins] == expected
+
+
+def test_schedule_keeps_dependent_classes_together_dependencies_first():
+    node_ids = ['a::T::1', 'b::T::1', 'b::T::2', 'c::1']
+    bins = schedule(node_ids, {'a::T::1': 1, 'b::T::1': 1, 'b::T::2': 1, 'c::1': 1}, 2, {'a::T::1': ['b::T']})
+    assert bins == [['b::T::1', 'b::T::2', 'a::T::1'], ['c::1']]
+    assert schedule([], {}, 2) == []
@@ -0,0 +1,332 @@
+"""
+Framework-overhead benchmarks.
+
+Runs the page objects and the CustomSeleniumWebDriver steps against the in-process FakeWebDriver, which answers
+instantly, so that everything measured is spent in the framework itself: the wrapper, smart wait, element cache,
+step timer, web vitals bookkeeping, logging and configuration. For every case it measures the time per call,
+the peak memory allocated per call, the log records and bytes per call and the WebDriver round-trips per call,
+and compares them with the baseline file.
+
+The log records and bytes and the WebDriver round-trips don't depend on the machine: any increase fails the check.
+The times, allocations and import time do: the baseline records the host it was measured on, and they are only
+checked on that host (or with ``--check-timings``); elsewhere they are printed for information. To move the
+timing check to another machine (e.g. the CI runner), regenerate the baseline there with ``--update-baseline``
+and commit it.
+
+The ``import_conftest`` case measures with ``python -X importtime`` what importing tests/conftest.py (the
+framework, page objects and fixtures) adds to the startup of pytest, e.g. to ``pytest --collect-only``, and
+checks it against the "benchmark.import_budget_ms" budget as well (when the times are checked).
+
+Usage::
+
+    python -m utils.benchmark                              # exit code 1 when a case regressed
+    python -m utils.benchmark --cases click type_text --iterations 2000
+    python -m utils.benchmark --update-baseline            # after an intended change, on the reference host
+    python -m utils.benchmark --check-timings              # check the times against a baseline from another host
+"""
+import argparse
+import json
+import logging
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+import pages
+from .config_reader import get_config, load_config, set_cli_overrides
+from .custom_selenium_webdriver import CustomSeleniumWebDriver
+from .fake_webdriver import FakeWebDriver
+from .logger import setup_logger, stop_logging
+from .step_timer import percentile, step_recorder
+
+_PROJECT_ROOT = Path(__file__).resolve().parent.parent
+
+# metrics that don't depend on the machine: any increase is a regression
+_EXACT_METRICS = ('log_records', 'log_bytes', 'driver_calls')
+# metrics compared with the tolerance, and the increase under which a difference is noise
+_TOLERATED_METRICS = {'p50_us': 2.0, 'peak_alloc_bytes': 256, 'import_ms': 10.0}
+
+_IMPORT_CASE = 'import_conftest'
+# key of the baseline file holding the host the times were measured on
+_HOST_KEY = '_host'
+
+_USER = {'first_name': 'Ada', 'last_name': 'Lovelace', 'email': 'ada.lovelace@example.com', 'password': 'Pa55word!'}
+
+
+class _LogCounter(logging.Handler):
+    """Counts the records (and the bytes of their messages) logged while it's attached to the root logger."""
+
+    def __init__(self):
+        super().__init__()
+        self.records = 0
+        self.bytes = 0
+
+    def emit(self, record):
+        self.records += 1
+        self.bytes += len(record.getMessage())
+
+
+def _benchmark_cases() -> dict:
+    """
+    Returns the benchmark cases {name: setup}. A setup takes a fresh FakeWebDriver and returns the callable that is
+    measured.
+    """
+    def sign_in(driver):
+        sign_in_page = pages.get('sign_in', driver)
+        return lambda: sign_in_page.sign_in(_USER['email'], _USER['password'])
+
+    def create_account(driver):
+        sign_up_page = pages.get('sign_up', driver)
+        return lambda: sign_up_page.create_account(**_USER)
+
+    sign_in_locators = pages.registered_pages()['sign_in'].locators
+
+    def on_sign_in_page(step):
+        def setup(driver):
+            web_driver = CustomSeleniumWebDriver(driver, page_object='Benchmark')
+            web_driver.navigate_to_url(get_config().sign_in_page_url)
+            return lambda: step(web_driver)
+        return setup
+
+    return {
+        'sign_in': sign_in,
+        'create_account': create_account,
+        'click': on_sign_in_page(lambda web_driver: web_driver.click(sign_in_locators['email'])),
+        'type_text': on_sign_in_page(
+            lambda web_driver: web_driver.type_text(sign_in_locators['email'], _USER['email'])),
+        'get_elements': on_sign_in_page(lambda web_driver: web_driver.get_elements(sign_in_locators['email'])),
+        'snapshot': on_sign_in_page(lambda web_driver: web_driver.snapshot(sign_in_locators)),
+        'check_pages': on_sign_in_page(lambda web_driver: web_driver.check_pages(
+            [get_config().sign_in_page_url, get_config().sign_up_page_url])),
+        'setup_logger': lambda driver: setup_logger,
+        'load_config': lambda driver: load_config,
+    }
+
+
+def run_case(setup, iterations: int = 1000, warmup: int = 50, profile_iterations: int = 50, rounds: int = 5) -> dict:
+    """
+    Measures one benchmark case.
+
+    The timed calls run without instrumentation, in ``rounds`` rounds; the reported p50 is the one of the fastest
+    round, which filters out most of the noise of the machine. The allocations, log volume and WebDriver
+    round-trips are measured by a second, shorter pass.
+
+    :param setup: A callable taking a FakeWebDriver and returning the callable to measure.
+    :param iterations: The number of timed calls (over all rounds).
+    :param warmup: The number of calls before the timed ones.
+    :param profile_iterations: The number of calls of the instrumented pass.
+    :param rounds: The number of rounds the timed calls are split into.
+    :return: A dictionary of per-call metrics.
+    """
+    driver = FakeWebDriver.magento(get_config().sign_in_page_url, get_config().sign_up_page_url)
+    call = setup(driver)
+    for _ in range(warmup):
+        call()
+    round_p50s = []
+    durations_us = []
+    for _ in range(max(1, rounds)):
+        round_durations = []
+        for _ in range(max(1, iterations // max(1, rounds))):
+            started = time.perf_counter_ns()
+            call()
+            round_durations.append((time.perf_counter_ns() - started) / 1000)
+        round_p50s.append(percentile(round_durations, 50))
+        durations_us.extend(round_durations)
+    log_counter = _LogCounter()
+    calls_before = sum(driver.calls.values())
+    peaks = []
+    root_logger = logging.getLogger()
+    root_logger.addHandler(log_counter)
+    tracemalloc.start()
+    try:
+        for _ in range(profile_iterations):
+            tracemalloc.reset_peak()
+            baseline, _ = tracemalloc.get_traced_memory()
+            call()
+            peaks.append(tracemalloc.get_traced_memory()[1] - baseline)
+    finally:
+        tracemalloc.stop()
+        root_logger.removeHandler(log_counter)
+    step_recorder.steps.clear()
+    return {
+        'iterations': len(durations_us),
+        'mean_us': round(sum(durations_us) / len(durations_us), 2),
+        'p50_us': round(min(round_p50s), 2),
+        'p95_us': round(percentile(durations_us, 95), 2),
+        'peak_alloc_bytes': round(percentile(peaks, 50)),
+        'log_records': round(log_counter.records / profile_iterations, 2),
+        'log_bytes': round(log_counter.bytes / profile_iterations, 2),
+        'driver_calls': round((sum(driver.calls.values()) - calls_before) / profile_iterations, 2),
+    }
+
+
+def measure_import_time(module: str = 'tests.conftest', preload: tuple = ('pytest',), repeat: int = 3,
+                        top: int = 10, env: dict = None) -> dict:
+    """
+    Measures how long importing a module takes in a fresh interpreter, with ``python -X importtime``.
+
+    :param module: The module to import.
+    :param preload: Modules imported first, whose import time isn't counted (pytest is already loaded when it
+                    imports the conftest).
+    :param repeat: The number of interpreters started; the fastest import is kept.
+    :param top: The number of heaviest direct imports of the module to report.
+    :param env: Extra environment variables of the interpreters.
+    :return: A dictionary {import_ms, heaviest_imports: [[module, ms], ...]}.
+    :raises RuntimeError: If the module couldn't be imported.
+    """
+    statement = '; '.join(f'import {name}' for name in (*preload, module))
+    best = None
+    for _ in range(max(1, repeat)):
+        completed = subprocess.run([sys.executable, '-X', 'importtime', '-c', statement], cwd=_PROJECT_ROOT,
+                                   env=dict(os.environ, **(env or {})), capture_output=True, text=True)
+        if completed.returncode != 0:
+            raise RuntimeError(f'Importing {module} failed:\n{completed.stderr[-2000:]}')
+        entries = []
+        for line in completed.stderr.splitlines():
+            if line.startswith('import time:') and line.count('|') == 2:
+                _, cumulative, name = line.split('|')
+                if cumulative.strip().isdigit():
+                    entries.append((name.rstrip(), int(cumulative)))
+        # the imports of the module are listed between the last preloaded module and the module itself
+        start = max((index for index, (name, _) in enumerate(entries) if name.strip() in preload), default=-1)
+        end = next(index for index, (name, _) in enumerate(entries) if name.strip() == module)
+        if best is None or entries[end][1] < best[0][1]:
+            best = entries[end], [entry for entry in entries[start + 1:end] if entry[0].startswith('   ')
+                                  and not entry[0].startswith('     ')]
+    (_, cumulative), children = best
+    heaviest = sorted(children, key=lambda entry: entry[1], reverse=True)[:top]
+    return {
+        'import_ms': round(cumulative / 1000, 1),
+        'heaviest_imports': [[name.strip(), round(microseconds / 1000, 1)] for name, microseconds in heaviest],
+    }
+
+
+def compare(results: dict, baseline: dict, tolerance: float, timings: bool = True) -> list:
+    """
+    Compares the results with the baseline.
+
+    :param results: The results {case: metrics}.
+    :param baseline: The baseline {case: metrics}.
+    :param tolerance: The allowed relative increase of the time and allocation metrics (e.g., 0.5 for 50%).
+    :param timings: Whether to compare the time and allocation metrics, or only the exact ones.
+    :return: A list of human-readable regressions.
+    """
+    regressions = []
+    metric_names = (*_EXACT_METRICS, *_TOLERATED_METRICS) if timings else _EXACT_METRICS
+    for case, metrics in results.items():
+        expected = baseline.get(case)
+        if expected is None:
+            continue
+        for metric in metric_names:
+            if metric not in expected:
+                continue
+            limit = expected[metric]
+            if metric in _TOLERATED_METRICS:
+                limit = max(limit * (1 + tolerance), limit + _TOLERATED_METRICS[metric])
+            if metrics[metric] > limit:
+                regressions.append(f'{case}.{metric}: {metrics[metric]} > {round(limit, 2)} '
+                                   f'(baseline {expected[metric]})')
+    return regressions
+
+
+def host_fingerprint() -> str:
+    """Returns a description of the machine and the interpreter the times depend on."""
+    return (f'{platform.node()} ({platform.system()} {platform.machine()}, {os.cpu_count()} CPUs, '
+            f'Python {platform.python_version()})')
+
+
+def run_benchmarks(cases: list = None, iterations: int = None, warmup: int = None) -> dict:
+    """
+    Runs the benchmark cases configured by the "benchmark" section of config.json.
+
+    :param cases: The names of the cases to run (default is all of them).
+    :param iterations: The number of timed calls per case, overriding "benchmark.iterations".
+    :param warmup: The number of warm-up calls per case, overriding "benchmark.warmup".
+    :return: The results {case: metrics}.
+    :raises KeyError: If a case doesn't exist.
+    """
+    settings = get_config().section('benchmark')
+    available = _benchmark_cases()
+    results = {}
+    for name in cases or [*available, _IMPORT_CASE]:
+        if name == _IMPORT_CASE:
+            results[name] = measure_import_time(env={'LUMA_LOGGING__CONSOLE': 'false',
+                                                     'LUMA_LOGGING__DIR': get_config().section('logging').get('dir')})
+            continue
+        results[name] = run_case(available[name], iterations or settings.get('iterations', 1000),
+                                 settings.get('warmup', 50) if warmup is None else warmup,
+                                 settings.get('profile_iterations', 50), settings.get('rounds', 5))
+    return results
+
+
+def main(argv: list = None) -> int:
+    # the benchmarks mustn't flood the console nor the logs and web vitals of the test runs
+    scratch_dir = tempfile.mkdtemp(prefix='benchmark-')
+    set_cli_overrides({'logging.console': False, 'logging.dir': scratch_dir,
+                       'web_vitals.time_series_dir': scratch_dir})
+    settings = get_config().section('benchmark')
+    parser = argparse.ArgumentParser(description='Measure the overhead of the framework against a fake WebDriver.')
+    parser.add_argument('--cases', nargs='+', choices=sorted([*_benchmark_cases(), _IMPORT_CASE]), default=None)
+    parser.add_argument('--iterations', type=int, default=None)
+    parser.add_argument('--warmup', type=int, default=None)
+    parser.add_argument('--tolerance', type=float, default=settings.get('tolerance', 0.5))
+    parser.add_argument('--import-budget-ms', type=float, default=settings.get('import_budget_ms'))
+    parser.add_argument('--baseline', default=settings.get('baseline_file', 'config_files/benchmark_baseline.json'))
+    parser.add_argument('--output', default=settings.get('output_file', 'reports/benchmarks.json'))
+    parser.add_argument('--update-baseline', action='store_true', help='store the results as the new baseline')
+    parser.add_argument('--check-timings', action='store_true',
+                        help='check the times even when the baseline was measured on another host')
+    args = parser.parse_args(argv)
+    results = run_benchmarks(args.cases, args.iterations, args.warmup)
+    stop_logging()
+    baseline_path = _PROJECT_ROOT / args.baseline
+    output_path = _PROJECT_ROOT / args.output
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(output_path, 'w') as f:
+        json.dump(results, f, indent=2)
+    for name, metrics in results.items():
+        if name == _IMPORT_CASE:
+            heaviest = ', '.join(f'{module} {ms} ms' for module, ms in metrics['heaviest_imports'][:5])
+            print(f'{name:<16} {metrics["import_ms"]:>9.1f} ms  (heaviest: {heaviest})')
+            continue
+        print(f'{name:<16} p50 {metrics["p50_us"]:>9.1f} us  p95 {metrics["p95_us"]:>9.1f} us  '
+              f'alloc {metrics["peak_alloc_bytes"]:>8} B  logs {metrics["log_records"]:>5} ({metrics["log_bytes"]} B)'
+              f'  driver calls {metrics["driver_calls"]}')
+    if args.update_baseline:
+        try:
+            with open(baseline_path) as f:
+                baseline = json.load(f)
+        except FileNotFoundError:
+            baseline = {}
+        baseline.update(results)
+        baseline[_HOST_KEY] = host_fingerprint()
+        with open(baseline_path, 'w') as f:
+            json.dump(baseline, f, indent=2)
+            f.write('\n')
+        print(f'Baseline updated: {baseline_path}')
+        return 0
+    try:
+        with open(baseline_path) as f:
+            baseline = json.load(f)
+    except FileNotFoundError:
+        print(f'No baseline at {baseline_path}, run with --update-baseline to create it.')
+        baseline = {}
+    timings = args.check_timings or baseline.get(_HOST_KEY) == host_fingerprint()
+    if not timings:
+        print(f'The baseline times were measured on {baseline.get(_HOST_KEY) or "another host"}: only the log '
+              f'records and the WebDriver round-trips are checked (see --check-timings).')
+    regressions = []
+    import_ms = results.get(_IMPORT_CASE, {}).get('import_ms')
+    if timings and args.import_budget_ms is not None and import_ms is not None and import_ms > args.import_budget_ms:
+        regressions.append(f'{_IMPORT_CASE}.import_ms: {import_ms} > budget of {args.import_budget_ms}')
+    regressions += compare(results, baseline, args.tolerance, timings)
+    for regression in regressions:
+        print(f'REGRESSION {regression}')
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
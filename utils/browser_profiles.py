@@ -0,0 +1,160 @@
+import weakref
+from dataclasses import dataclass, fields
+from typing import Optional
+from selenium.common.exceptions import WebDriverException
+from .config_reader import get_config
+from .logger import setup_logger
+
+DEFAULT_PROFILE = 'default'
+
+# the URL patterns blocked in each browser, applied again to the tabs it opens later on
+_blocked_urls = weakref.WeakKeyDictionary()
+
+
+@dataclass(frozen=True)
+class BrowserProfile:
+    """
+    Named set of browser start-up options from the "browser_profiles" section of config.json.
+
+    ``blocked_urls`` are URL patterns (``*`` wildcards) blocked through CDP, so they only apply to Chromium
+    browsers (Chrome and Edge, local or remote); the other browsers ignore them. CDP blocks them per tab: the tabs
+    opened by the framework (see :func:`block_urls`) get them too, tabs opened by the pages themselves don't.
+    ``disable_extensions`` only applies to Chromium browsers as well.
+    """
+
+    name: str = DEFAULT_PROFILE
+    headless: bool = False
+    window_size: Optional[str] = None
+    page_load_strategy: str = 'normal'
+    disable_images: bool = False
+    disable_extensions: bool = False
+    blocked_urls: tuple = ()
+
+    @property
+    def window_dimensions(self):
+        """Returns the (width, height) of ``window_size`` ("1366x768"), or None to maximize the window."""
+        if not self.window_size:
+            return None
+        width, _, height = str(self.window_size).lower().partition('x')
+        return int(width), int(height)
+
+    def apply_to_options(self, options, browser: str) -> None:
+        """
+        Applies the start-up part of the profile to the options of the browser.
+
+        :param options: The ChromeOptions, FirefoxOptions or EdgeOptions object.
+        :param browser: The browser type (e.g., 'chrome', 'firefox', 'edge').
+        :return: None.
+        """
+        if self.headless:
+            options.add_argument('-headless' if browser == 'firefox' else '--headless=new')
+        options.page_load_strategy = self.page_load_strategy
+        dimensions = self.window_dimensions
+        if browser == 'firefox':
+            if dimensions:
+                options.add_argument(f'--width={dimensions[0]}')
+                options.add_argument(f'--height={dimensions[1]}')
+            if self.disable_images:
+                options.set_preference('permissions.default.image', 2)
+            if self.disable_extensions:
+                setup_logger().warning('The %s profile disables the extensions, which Firefox doesn\'t support; '
+                                       'they stay enabled.', self.name)
+            return
+        if dimensions:
+            options.add_argument(f'--window-size={dimensions[0]},{dimensions[1]}')
+        if self.disable_images:
+            options.add_argument('--blink-settings=imagesEnabled=false')
+            options.add_experimental_option('prefs', {'profile.managed_default_content_settings.images': 2})
+        if self.disable_extensions:
+            options.add_argument('--disable-extensions')
+
+    def apply_to_driver(self, driver) -> None:
+        """
+        Applies the run-time part of the profile to a started browser: the window size and the blocked URLs.
+
+        :param driver: The WebDriver instance.
+        :return: None.
+        """
+        logger = setup_logger()
+        dimensions = self.window_dimensions
+        try:
+            if dimensions:
+                driver.set_window_size(*dimensions)
+            elif not self.headless:
+                driver.maximize_window()
+        except WebDriverException as e:
+            logger.warning('The window of the %s profile could not be sized. Error: %s', self.name, e)
+        if not self.blocked_urls:
+            return
+        if not hasattr(driver, 'execute_cdp_cmd'):
+            logger.info('The %s profile blocks URLs through CDP, which this browser lacks; nothing is blocked.',
+                        self.name)
+            return
+        _blocked_urls[driver] = list(self.blocked_urls)
+        if block_urls(driver):
+            logger.info('The %s profile blocks %s URL patterns.', self.name, len(self.blocked_urls))
+
+
+def blocks_urls(driver) -> bool:
+    """
+    Returns whether the profile of the browser blocks URLs, which new tabs must then apply with :func:`block_urls`.
+
+    :param driver: The WebDriver instance, or a DriverLease of it.
+    :return: True if URLs are blocked in the browser.
+    """
+    return bool(_profile_blocked_urls(driver))
+
+
+def block_urls(driver) -> bool:
+    """
+    Blocks the URLs of the browser's profile in its current tab. CDP keeps one list of blocked URLs per tab, so it's
+    needed for every tab the framework opens, before the tab navigates.
+
+    :param driver: The WebDriver instance, or a DriverLease of it.
+    :return: True if the URLs are blocked, False if there's nothing to block or they couldn't be blocked.
+    """
+    urls = _profile_blocked_urls(driver)
+    if not urls:
+        return False
+    try:
+        driver.execute_cdp_cmd('Network.enable', {})
+        driver.execute_cdp_cmd('Network.setBlockedURLs', {'urls': urls})
+        return True
+    except WebDriverException as e:
+        setup_logger().warning('The URLs of the browser profile could not be blocked. Error: %s', e)
+        return False
+
+
+def _profile_blocked_urls(driver):
+    try:
+        return _blocked_urls.get(getattr(driver, 'web_driver', driver))
+    except TypeError:
+        # objects that can't be weakly referenced weren't started with a profile
+        return None
+
+
+def get_browser_profile(name: str = None) -> BrowserProfile:
+    """
+    Returns a browser profile from the "browser_profiles" section of config.json.
+
+    The top-level "headless" setting (or LUMA_HEADLESS) forces every profile to run headless.
+
+    :param name: The profile name (default is the "browser_profile" setting, or "default").
+    :return: The BrowserProfile object.
+    :raises ValueError: If the profile isn't configured.
+    """
+    config = get_config()
+    name = name or config.raw.get('browser_profile') or DEFAULT_PROFILE
+    profiles = config.section('browser_profiles')
+    if name not in profiles:
+        if name != DEFAULT_PROFILE:
+            raise ValueError(f'Unknown browser profile: {name}. Expected one of {sorted(profiles)}.')
+        settings = {}
+    else:
+        settings = profiles[name]
+    names = {profile_field.name for profile_field in fields(BrowserProfile)}
+    values = {key: value for key, value in settings.items() if key in names}
+    values['name'] = name
+    values['blocked_urls'] = tuple(values.get('blocked_urls') or ())
+    values['headless'] = bool(values.get('headless', False)) or config.headless
+    return BrowserProfile(**values)
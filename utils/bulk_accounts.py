@@ -0,0 +1,316 @@
+import csv
+import json
+import os
+import random
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import Iterable, Iterator
+from selenium.common.exceptions import WebDriverException
+import pages
+from .config_reader import get_config
+from .errors import StepError
+from .logger import setup_logger
+from .random_data_generator import UserDataFactory
+from .step_timer import percentile
+
+_PROJECT_ROOT = Path(__file__).resolve().parent.parent
+_USER_FIELDS = ('first_name', 'last_name', 'email', 'password')
+
+
+def read_user_records(source: str) -> Iterator[dict]:
+    """
+    Streams the user records of a CSV (with a header row) or JSON-lines file.
+
+    The records aren't checked here: :class:`BulkAccountRunner` reports a malformed record (a missing field, or a
+    line that isn't a JSON object) as a failed result and goes on with the next ones.
+
+    :param source: Path of the .csv or .jsonl file.
+    :return: An iterator of dictionaries with the first_name, last_name, email and password of each user.
+    :raises ValueError: If the file type isn't supported.
+    :raises FileNotFoundError: If the file doesn't exist.
+    """
+    path = Path(source)
+    if path.suffix.lower() not in ('.csv', '.jsonl', '.ndjson'):
+        raise ValueError(f'Unsupported user records file: {source}. Expected a .csv or .jsonl file.')
+    if not path.is_file():
+        raise FileNotFoundError(f'The user records file was not found: {source}')
+    return _read_csv(path) if path.suffix.lower() == '.csv' else _read_json_lines(path)
+
+
+def _read_csv(path: Path) -> Iterator[dict]:
+    with open(path, newline='') as f:
+        yield from csv.DictReader(f)
+
+
+def _read_json_lines(path: Path) -> Iterator:
+    with open(path) as f:
+        for line in f:
+            if line.strip():
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    # reported by the runner, like the records missing a field
+                    yield line.strip()
+
+
+def generate_user_records(count: int, seed: int, run_id: str, locale: str = 'en_US',
+                          email_domain: str = 'example.com') -> Iterator[dict]:
+    """
+    Streams ``count`` generated users. The same seed and run id produce the same users, which is what lets an
+    interrupted generated run resume.
+
+    :return: An iterator of user dictionaries.
+    """
+    factory = UserDataFactory(locale=locale, seed=seed, run_id=run_id, worker_id='bulk', email_domain=email_domain)
+    for _ in range(count):
+        yield factory.next_user()
+
+
+def _check_record(record) -> dict:
+    if not isinstance(record, dict):
+        raise ValueError(f'The user record is not an object: {record!r}')
+    missing = [name for name in _USER_FIELDS if not record.get(name)]
+    if missing:
+        raise ValueError(f'The user record misses {missing}: {record}')
+    return {name: record[name] for name in _USER_FIELDS}
+
+
+class BulkAccountRunner:
+    """
+    Creates accounts in bulk through ``SignUpPage.create_account`` with ``workers`` concurrent browsers leased
+    from a driver pool.
+
+    Every attempt is appended to the JSON-lines results file as soon as it finished (a malformed record is
+    appended as a failed attempt without using a browser); that file is also the checkpoint: a resumed run skips
+    the records whose index already has a "created" result (and, unless ``retry_failed`` is set, the failed ones
+    too). The source and the generator seed/run id are kept next to it in ``<results>.meta.json`` so that a
+    generated run resumes with the same users, and the throughput summary is written to
+    ``<results>.summary.json``.
+    """
+
+    def __init__(self, driver_pool, results_file: str, workers: int = 4, retry_failed: bool = False,
+                 expected_title: str = 'My Account', progress_every: int = 50):
+        self.driver_pool = driver_pool
+        self.results_path = Path(results_file)
+        self.workers = max(1, workers)
+        self.retry_failed = retry_failed
+        self.expected_title = expected_title
+        self.progress_every = max(1, progress_every)
+        self.logger = setup_logger()
+        self._lock = threading.Lock()
+        self._durations = []
+        self._counts = {'created': 0, 'failed': 0}
+        self._source_error = None
+
+    @property
+    def meta_path(self) -> Path:
+        return self.results_path.with_name(f'{self.results_path.stem}.meta.json')
+
+    @property
+    def summary_path(self) -> Path:
+        return self.results_path.with_name(f'{self.results_path.stem}.summary.json')
+
+    def load_meta(self, source: str = None, seed: int = None) -> dict:
+        """
+        Returns the metadata of the run stored next to the results, creating it for a new run.
+
+        :param source: The records file, or None for generated users.
+        :param seed: The seed of the generated users (random for a new run when None).
+        :return: A dictionary {source, seed, run_id, created_at}.
+        :raises ValueError: If the results belong to a run with another source.
+        """
+        try:
+            with open(self.meta_path) as f:
+                meta = json.load(f)
+        except FileNotFoundError:
+            meta = {'source': source, 'seed': seed if seed is not None else random.randrange(2 ** 31),
+                    'run_id': uuid.uuid4().hex[:8], 'created_at': time.time()}
+            self.meta_path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.meta_path, 'w') as f:
+                json.dump(meta, f, indent=2)
+            return meta
+        if meta['source'] != source:
+            raise ValueError(f'{self.results_path} belongs to a run of {meta["source"]!r}, not {source!r}. '
+                             f'Use another results file.')
+        return meta
+
+    def completed_indexes(self) -> set:
+        """
+        Reads the results file and returns the indexes of the records that don't need another attempt.
+
+        :return: A set of record indexes.
+        """
+        done = set()
+        failed = set()
+        try:
+            with open(self.results_path) as f:
+                for line in f:
+                    try:
+                        result = json.loads(line)
+                    except ValueError:
+                        # the last line of an interrupted run may be truncated
+                        continue
+                    (done if result['status'] == 'created' else failed).add(result['index'])
+        except FileNotFoundError:
+            pass
+        return done if self.retry_failed else done | failed
+
+    def run(self, records: Iterable[dict]) -> dict:
+        """
+        Creates an account for every record that wasn't processed by a previous run of the same results file.
+
+        :param records: The user records, in a stable order (their position is the resume index).
+        :return: The throughput summary, see :meth:`summary`.
+        :raises Exception: The error that stopped reading the records, once the records read so far were processed
+                           (the summary is still written).
+        """
+        self.logger.info('********** %s() **********', self.run.__name__)
+        skipped = self.completed_indexes()
+        if skipped:
+            self.logger.info('Resuming: %s records were already processed.', len(skipped))
+        pending = ((index, record) for index, record in enumerate(records) if index not in skipped)
+        self.results_path.parent.mkdir(parents=True, exist_ok=True)
+        self._end_truncated_line()
+        started = time.monotonic()
+        with open(self.results_path, 'a') as results_file:
+            threads = [threading.Thread(target=self._work, args=(pending, results_file, started),
+                                        name=f'bulk-accounts-{number}') for number in range(self.workers)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        summary = self.summary(time.monotonic() - started, len(skipped))
+        with open(self.summary_path, 'w') as f:
+            json.dump(summary, f, indent=2)
+        if self._source_error is not None:
+            self.logger.error('Bulk account creation stopped, the records could not be read: %s', summary)
+            raise self._source_error
+        self.logger.info('Bulk account creation finished: %s', summary)
+        return summary
+
+    def summary(self, elapsed: float, skipped: int = 0) -> dict:
+        """
+        Returns the throughput of the run.
+
+        :param elapsed: The wall-clock duration of the run in seconds.
+        :param skipped: The number of records processed by previous runs.
+        :return: A dictionary with the counts, accounts per minute, error rate and p50/p95 account durations.
+        """
+        with self._lock:
+            attempted = self._counts['created'] + self._counts['failed']
+            durations = list(self._durations)
+            return {
+                'attempted': attempted,
+                'created': self._counts['created'],
+                'failed': self._counts['failed'],
+                'skipped': skipped,
+                'workers': self.workers,
+                'elapsed_s': round(elapsed, 2),
+                'accounts_per_minute': round(self._counts['created'] / elapsed * 60, 2) if elapsed else 0.0,
+                'error_rate': round(self._counts['failed'] / attempted, 4) if attempted else 0.0,
+                'p50_s': round(percentile(durations, 50), 3),
+                'p95_s': round(percentile(durations, 95), 3),
+            }
+
+    def _end_truncated_line(self) -> None:
+        """Ends the truncated last line of an interrupted run, so that the first new result isn't appended to it."""
+        try:
+            with open(self.results_path, 'rb+') as f:
+                if f.seek(0, os.SEEK_END) == 0:
+                    return
+                f.seek(-1, os.SEEK_END)
+                if f.read(1) != b'\n':
+                    f.write(b'\n')
+        except FileNotFoundError:
+            pass
+
+    def _work(self, pending: Iterator, results_file, started: float) -> None:
+        while True:
+            with self._lock:
+                try:
+                    item = next(pending, None) if self._source_error is None else None
+                except Exception as e:
+                    # the records can't be read any further: stop every worker rather than report a complete run
+                    self.logger.error('An error occurred while reading the user records. Error: %s', e)
+                    self._source_error = e
+                    item = None
+            if item is None:
+                return
+            index, record = item
+            attempt_started = time.monotonic()
+            result = {'index': index, 'email': record.get('email') if isinstance(record, dict) else None}
+            try:
+                record = _check_record(record)
+            except ValueError as e:
+                result.update(status='failed', error=str(e), duration_s=0.0)
+                self._record(result, results_file, started)
+                continue
+            try:
+                with self.driver_pool.lease() as web_driver:
+                    sign_up_page = pages.get('sign_up', web_driver)
+                    sign_up_page.create_account(**record)
+                    title = sign_up_page.driver.get_title()
+                result['status'] = 'created' if title == self.expected_title else 'failed'
+                if result['status'] == 'failed':
+                    result['error'] = f'Unexpected page title after sign-up: {title!r}'
+            except (StepError, WebDriverException, RuntimeError, TimeoutError) as e:
+                result['status'] = 'failed'
+                result['error'] = f'{type(e).__name__}: {e}'
+            result['duration_s'] = round(time.monotonic() - attempt_started, 3)
+            self._record(result, results_file, started)
+
+    def _record(self, result: dict, results_file, started: float) -> None:
+        with self._lock:
+            results_file.write(json.dumps(result) + '\n')
+            results_file.flush()
+            self._durations.append(result['duration_s'])
+            self._counts[result['status']] += 1
+            attempted = self._counts['created'] + self._counts['failed']
+        if result['status'] == 'failed':
+            self.logger.warning('The account of %s could not be created: %s', result['email'], result['error'])
+        if attempted % self.progress_every == 0:
+            elapsed = time.monotonic() - started
+            self.logger.info('%s accounts attempted (%.1f accounts/min, %s failed).', attempted,
+                             self._counts['created'] / elapsed * 60, self._counts['failed'])
+
+
+def create_bulk_runner(driver_pool, results_file: str = None, workers: int = None) -> BulkAccountRunner:
+    """
+    Creates a bulk account runner configured by the "bulk_accounts" section of config.json.
+
+    :param driver_pool: The DriverPool the browsers are leased from (at least ``workers`` large).
+    :param results_file: The results file, overriding "bulk_accounts.results_file".
+    :param workers: The number of concurrent browsers, overriding "bulk_accounts.workers".
+    :return: The BulkAccountRunner instance.
+    """
+    settings = get_config().section('bulk_accounts')
+    results_file = results_file or settings.get('results_file', 'reports/bulk_accounts/results.jsonl')
+    return BulkAccountRunner(
+        driver_pool,
+        results_file=results_file if os.path.isabs(results_file) else _PROJECT_ROOT / results_file,
+        workers=workers or settings.get('workers', 4),
+        retry_failed=settings.get('retry_failed', False),
+        progress_every=settings.get('progress_every', 50),
+    )
+
+
+def user_records(runner: BulkAccountRunner, source: str = None, count: int = None) -> Iterator[dict]:
+    """
+    Returns the records of a bulk run: the records file, or ``count`` generated users with the seed and run id
+    of the run's metadata.
+
+    :param runner: The BulkAccountRunner whose results file identifies the run.
+    :param source: The .csv or .jsonl records file, or None to generate users.
+    :param count: The number of users to generate (default is "bulk_accounts.count").
+    :return: An iterator of user records.
+    """
+    settings = get_config().section('bulk_accounts')
+    meta = runner.load_meta(source, settings.get('seed'))
+    if source:
+        return read_user_records(source)
+    test_data = get_config().section('test_data')
+    return generate_user_records(count or settings.get('count', 1000), meta['seed'], meta['run_id'],
+                                 test_data.get('locale', 'en_US'), test_data.get('email_domain', 'example.com'))
+
@@ -1,27 +1,263 @@
 import json
+import os
+import threading
+from dataclasses import dataclass, field, fields
 from pathlib import Path
+from types import MappingProxyType
+from typing import Mapping, Optional
 from logging import getLogger
 
 logger = getLogger(__name__)
 
+_PROJECT_ROOT = Path(__file__).resolve().parent.parent
+_DEFAULT_CONFIG_FILE = 'config_files/config.json'
+_ENV_PREFIX = 'LUMA_'
+_ENV_NESTING_SEPARATOR = '__'
+# short environment variables of frequently overridden nested keys (the LUMA_<SECTION>__<KEY> name wins)
+_ENV_ALIASES = {
+    'LUMA_DRIVER_OFFLINE': 'driver_cache.offline',
+    # set by the parallel runner for each worker process
+    'LUMA_RUN_ID': 'test_data.run_id',
+    'LUMA_WORKER_ID': 'test_data.worker_id',
+}
+# identifiers that stay strings even when they look like JSON numbers (e.g. a run id of "1e400000")
+_STRING_KEYS = {'test_data.run_id', 'test_data.worker_id'}
 
-def load_config(config_file : str = 'config_files/config.json') -> dict:
+
+@dataclass(frozen=True)
+class DriverPoolSettings:
+    size: int = 1
+    max_leases: int = 25
+    warm_up: bool = True
+
+
+@dataclass(frozen=True)
+class DriverCacheSettings:
+    dir: Optional[str] = None
+    ttl_hours: float = 168
+    offline: bool = False
+
+
+@dataclass(frozen=True)
+class ParallelSettings:
+    browsers: tuple = ('chrome',)
+    workers_per_browser: int = 1
+    max_processes: Optional[int] = None
+    report_dir: str = 'reports/parallel'
+
+
+@dataclass(frozen=True)
+class Config:
+    """Immutable, typed view of config.json after the environment-variable and CLI overrides were applied."""
+
+    browser: str = 'chrome'
+    sign_up_page_url: Optional[str] = None
+    sign_in_page_url: Optional[str] = None
+    headless: bool = False
+    remote_url: Optional[str] = None
+    driver_pool: DriverPoolSettings = DriverPoolSettings()
+    driver_cache: DriverCacheSettings = DriverCacheSettings()
+    parallel: ParallelSettings = ParallelSettings()
+    raw: Mapping = field(default_factory=lambda: MappingProxyType({}), repr=False)
+
+    def section(self, name: str) -> Mapping:
+        """
+        Returns a read-only section of the configuration that has no typed counterpart.
+
+        :param name: The top-level key of the section.
+        :return: The section, or an empty mapping if it is missing.
+        """
+        return self.raw.get(name) or MappingProxyType({})
+
+    @property
+    def run_id(self) -> Optional[str]:
+        """The id shared by every worker of a run ("test_data.run_id" or LUMA_RUN_ID), or None."""
+        run_id = self.section('test_data').get('run_id')
+        return str(run_id) if run_id is not None else None
+
+    @property
+    def worker_id(self) -> str:
+        """The id of this worker process ("test_data.worker_id" or LUMA_WORKER_ID), "main" outside parallel runs."""
+        worker_id = self.section('test_data').get('worker_id')
+        return str(worker_id) if worker_id is not None else 'main'
+
+
+class _ConfigCache:
+    """Parsed configuration of one file, re-parsed only when the file's mtime changes."""
+
+    def __init__(self, config_path: Path):
+        self.config_path = config_path
+        self.mtime_ns = None
+        self.raw = None
+        self.config = None
+
+
+_caches = {}
+_resolved_paths = {}
+_cli_overrides = {}
+_lock = threading.Lock()
+
+
+def load_config(config_file: str = None) -> Mapping:
     """
      Loads and returns the configuration from a JSON file.
 
-    :return: A dictionary containing the configuration data.
+    The file is parsed once per process and re-parsed only when its modification time changes. The
+    environment-variable (``LUMA_<KEY>`` / ``LUMA_<SECTION>__<KEY>``) and CLI overrides are applied on top.
+
+    :param config_file: Path of the configuration file relative to the project root
+                        (default is LUMA_CONFIG_FILE or config_files/config.json).
+    :return: A read-only mapping containing the configuration data.
     :raises FileNotFoundError: If the configuration file does not exist.
     """
-    logger.info(f'********** {load_config.__name__}() **********')
+    cache = _get_cache(config_file)
+    return cache.raw if cache is not None else None
+
+
+def get_config(config_file: str = None) -> Config:
+    """
+    Returns the typed configuration, see :func:`load_config`.
+
+    :param config_file: Path of the configuration file relative to the project root.
+    :return: The immutable Config object, or the defaults if the file couldn't be loaded.
+    """
+    cache = _get_cache(config_file)
+    return cache.config if cache is not None else Config()
+
+
+def set_cli_overrides(overrides: dict) -> None:
+    """
+    Sets the command-line overrides (e.g., from ``--config-override browser=firefox``) and drops the parsed
+    configuration so that the next read applies them.
+
+    :param overrides: Mapping of dotted keys (e.g., ``driver_pool.size``) to raw string or JSON values.
+    :return: None.
+    """
+    with _lock:
+        _cli_overrides.clear()
+        _cli_overrides.update(overrides)
+        _caches.clear()
+
+
+def parse_override(override: str) -> tuple:
+    """
+    Parses a ``key=value`` override.
+
+    :param override: The override string, e.g. ``sign_in_page_url=http://localhost:8000/login``.
+    :return: A tuple (key, value).
+    :raises ValueError: If the override doesn't contain "=".
+    """
+    key, separator, value = override.partition('=')
+    if not separator or not key.strip():
+        raise ValueError(f'Invalid config override "{override}", expected key=value.')
+    return key.strip(), value
+
+
+def reload_config() -> None:
+    """
+    Forces the configuration files to be parsed again on the next read.
+
+    :return: None.
+    """
+    with _lock:
+        _caches.clear()
+
+
+def _get_cache(config_file: str = None):
+    config_file = config_file or os.environ.get('LUMA_CONFIG_FILE', _DEFAULT_CONFIG_FILE)
+    config_path = _resolved_paths.get(config_file)
+    if config_path is None:
+        config_path = _resolved_paths[config_file] = (_PROJECT_ROOT / config_file).resolve()
     try:
-        current_dir = Path(__file__).parent
-        config_path = (current_dir / ".." / config_file).resolve()
-        logger.info(f'Loading configuration from: {config_path}')
-        with open(config_path) as f:
-            config = json.load(f)
-        logger.info('The configuration file loaded successfully.')
-        return config
+        mtime_ns = os.stat(config_path).st_mtime_ns
     except FileNotFoundError as e:
-        logger.error(f'The configuration file was not found. Error: {e}')
-    except Exception as e:
-        logger.error(f'An error occurred while loading the configuration file. Error: {e}')
+        logger.error('The configuration file was not found. Error: %s', e)
+        return None
+    cache = _caches.get(config_path)
+    if cache is not None and cache.mtime_ns == mtime_ns:
+        return cache
+    with _lock:
+        cache = _caches.setdefault(config_path, _ConfigCache(config_path))
+        if cache.mtime_ns != mtime_ns:
+            logger.info('********** %s() **********', load_config.__name__)
+            logger.info('Loading configuration from: %s', config_path)
+            try:
+                with open(config_path) as f:
+                    data = json.load(f)
+                _apply_overrides(data, _env_overrides(data))
+                _apply_overrides(data, _cli_overrides)
+                cache.raw = _freeze(data)
+                cache.config = _build_config(cache.raw)
+                cache.mtime_ns = mtime_ns
+                logger.info('The configuration file loaded successfully.')
+            except Exception as e:
+                logger.error('An error occurred while loading the configuration file. Error: %s', e)
+                if cache.raw is None:
+                    _caches.pop(config_path, None)
+                    return None
+        return cache
+
+
+def _env_overrides(data: dict) -> dict:
+    """
+    Collects LUMA_<KEY> and LUMA_<SECTION>__<KEY> environment variables matching keys of the configuration, and the
+    aliases of ``_ENV_ALIASES``.
+    """
+    known_keys = set(data) | {config_field.name for config_field in fields(Config)}
+    overrides = {dotted_key: os.environ[name] for name, dotted_key in _ENV_ALIASES.items() if name in os.environ}
+    for name, value in os.environ.items():
+        if not name.startswith(_ENV_PREFIX) or name in _ENV_ALIASES:
+            continue
+        path = name[len(_ENV_PREFIX):].lower().split(_ENV_NESTING_SEPARATOR)
+        if path[0] in known_keys:
+            overrides['.'.join(path)] = value
+    return overrides
+
+
+def _apply_overrides(data: dict, overrides: dict) -> None:
+    for dotted_key, value in overrides.items():
+        *parents, key = dotted_key.split('.')
+        target = data
+        for parent in parents:
+            if not isinstance(target.get(parent), dict):
+                target[parent] = {}
+            target = target[parent]
+        target[key] = value if dotted_key in _STRING_KEYS else _parse_value(value)
+
+
+def _parse_value(value):
+    if not isinstance(value, str):
+        return value
+    try:
+        return json.loads(value)
+    except ValueError:
+        return value
+
+
+def _freeze(value):
+    if isinstance(value, dict):
+        return MappingProxyType({key: _freeze(item) for key, item in value.items()})
+    if isinstance(value, list):
+        return tuple(_freeze(item) for item in value)
+    return value
+
+
+def _build_section(section_type, data):
+    if not data:
+        return section_type()
+    names = {section_field.name for section_field in fields(section_type)}
+    return section_type(**{key: value for key, value in data.items() if key in names})
+
+
+def _build_config(raw: Mapping) -> Config:
+    return Config(
+        browser=str(raw.get('browser', 'chrome')).lower(),
+        sign_up_page_url=raw.get('sign_up_page_url'),
+        sign_in_page_url=raw.get('sign_in_page_url'),
+        headless=bool(raw.get('headless', False)),
+        remote_url=raw.get('remote_url'),
+        driver_pool=_build_section(DriverPoolSettings, raw.get('driver_pool')),
+        driver_cache=_build_section(DriverCacheSettings, raw.get('driver_cache')),
+        parallel=_build_section(ParallelSettings, raw.get('parallel')),
+        raw=raw,
+    )
@@ -1,160 +1,541 @@
-import os
-from datetime import datetime
-from selenium.webdriver.remote.webelement import WebElement
+import time
+from typing import TYPE_CHECKING
+from .browser_profiles import block_urls, blocks_urls
+from .config_reader import get_config
+from .element_cache import get_element_cache
+from .errors import step_error
 from .logger import setup_logger
+from .smart_wait import create_smart_wait, element_clickable, element_present, locator_key
+from .screenshot import get_screenshot_manager
+from .step_timer import step_recorder, timed_step
+from .web_vitals import _COLLECT_METRICS_SCRIPT, get_web_vitals_recorder
 from selenium.common.exceptions import (NoSuchElementException, WebDriverException, ElementNotInteractableException,
-                                        TimeoutException)
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
+                                        TimeoutException, StaleElementReferenceException)
+
+if TYPE_CHECKING:
+    from selenium.webdriver.remote.webelement import WebElement
+
+# Defines locate(strategy, value), which returns the elements matching a Selenium locator in document order, or
+# null for an unknown strategy.
+_LOCATE_JS = """
+const locate = (strategy, value) => {
+    switch (strategy) {
+        case 'id': return Array.from(document.querySelectorAll(`[id="${CSS.escape(value)}"]`));
+        case 'name': return Array.from(document.getElementsByName(value));
+        case 'css selector': return Array.from(document.querySelectorAll(value));
+        case 'class name': return Array.from(document.getElementsByClassName(value));
+        case 'tag name': return Array.from(document.getElementsByTagName(value));
+        case 'xpath': {
+            const result = document.evaluate(value, document, null, XPathResult.ORDERED_NODE_SNAPSHOT_TYPE, null);
+            return Array.from({length: result.snapshotLength}, (_, index) => result.snapshotItem(index));
+        }
+        case 'link text':
+            return Array.from(document.getElementsByTagName('a')).filter((link) => link.innerText.trim() === value);
+        case 'partial link text':
+            return Array.from(document.getElementsByTagName('a')).filter((link) => link.innerText.includes(value));
+        default: return null;
+    }
+};
+"""
+
+# Resolves and fills every field in one round-trip. Each field is [strategy, value, text]; the result holds one
+# status per field: "ok", "missing" (element not found) or "unsupported" (locator strategy or element type that
+# needs real keystrokes).
+_FILL_FORM_SCRIPT = _LOCATE_JS + """
+const results = [];
+for (const [strategy, value, text] of arguments[0]) {
+    const elements = locate(strategy, value);
+    if (elements === null) { results.push('unsupported'); continue; }
+    const element = elements[0];
+    if (!element) { results.push('missing'); continue; }
+    const prototype = element instanceof HTMLTextAreaElement ? HTMLTextAreaElement.prototype
+        : element instanceof HTMLInputElement ? HTMLInputElement.prototype : null;
+    if (!prototype || element.type === 'file' || element.disabled || element.readOnly) {
+        results.push('unsupported');
+        continue;
+    }
+    element.focus();
+    Object.getOwnPropertyDescriptor(prototype, 'value').set.call(element, text);
+    element.dispatchEvent(new Event('input', {bubbles: true}));
+    element.dispatchEvent(new Event('change', {bubbles: true}));
+    element.blur();
+    results.push('ok');
+}
+return results;
+"""
+
+# Reads the title, URL and ready state of the page and the state of every locator in one round-trip. arguments[0]
+# is a list of [name, strategy, value] and arguments[1] the maximum length of the texts. The state of a locator
+# describes its first element; the values of password fields are masked.
+_SNAPSHOT_SCRIPT = _LOCATE_JS + """
+const maxText = arguments[1];
+const elements = {};
+for (const [name, strategy, value] of arguments[0]) {
+    const state = {present: false, count: 0, visible: false, enabled: false, text: null, value: null};
+    elements[name] = state;
+    let found;
+    try {
+        found = locate(strategy, value);
+    } catch (e) {
+        state.error = String(e.message || e);
+        continue;
+    }
+    if (found === null) { state.error = 'unsupported locator strategy'; continue; }
+    state.count = found.length;
+    const element = found[0];
+    if (!element) continue;
+    state.present = true;
+    state.visible = element.checkVisibility
+        ? element.checkVisibility({opacityProperty: true, visibilityProperty: true})
+        : !!(element.offsetWidth || element.offsetHeight || element.getClientRects().length);
+    state.enabled = !element.disabled;
+    state.text = (element.innerText || element.textContent || '').trim().slice(0, maxText);
+    if (element.type === 'checkbox' || element.type === 'radio') {
+        state.value = element.checked;
+    } else if ('value' in element && ['INPUT', 'TEXTAREA', 'SELECT'].includes(element.tagName)) {
+        state.value = element.type === 'password' ? '*'.repeat(element.value.length) : element.value;
+    }
+}
+return {title: document.title, url: location.href, ready_state: document.readyState, elements: elements};
+"""
+
+# Opens a URL in a new tab without waiting for it to load; false when the browser blocked the tab.
+_OPEN_TAB_SCRIPT = 'return window.open(arguments[0], arguments[1]) !== null;'
+
+# Starts navigating the current tab to arguments[0] without waiting for the page to load.
+_NAVIGATE_SCRIPT = 'window.location.href = arguments[0];'
+
+# Returns the ready state of the page and, once it reached arguments[0] ("interactive" or "complete"), its title
+# and navigation metrics, so that polling a tab and collecting its results is a single round-trip. A new tab holds
+# a "complete" about:blank document until the navigation to arguments[1] commits, which still counts as loading.
+_PAGE_CHECK_SCRIPT = f"""
+const readyState = document.readyState;
+if (location.href === 'about:blank' && arguments[1] !== 'about:blank') {{
+    return {{ready_state: 'loading'}};
+}}
+if (readyState === 'loading' || (arguments[0] === 'complete' && readyState !== 'complete')) {{
+    return {{ready_state: readyState}};
+}}
+const metrics = (() => {{{_COLLECT_METRICS_SCRIPT}}})();
+metrics.ready_state = readyState;
+metrics.title = document.title;
+return metrics;
+"""
 
 
 class CustomSeleniumWebDriver:
 
-    def __init__(self, driver):
+    def __init__(self, driver, page_object: str = None):
         self.driver = driver
+        self.page_object = page_object
         self.logger = setup_logger()
+        self.element_cache = get_element_cache(driver)
+        self.wait = create_smart_wait(driver, page_object)
+        self.navigation_metrics = []
 
-    def get_element(self, locator: tuple) -> WebElement:
+    @timed_step
+    def get_element(self, locator: tuple, timeout: float = None) -> 'WebElement':
         """
-        Finds a WebElement using the provided locator.
+        Finds a WebElement using the provided locator, waiting for it to be present in the DOM.
+
+        The WebElement is served from the element cache when the locator was already resolved on the current page.
 
         :param locator: A tuple (By, value) for locating the WebElement.
+        :param timeout: Maximum time to wait for the WebElement (default is the timeout learned for the locator).
         :return: WebElement if found.
-        :raises NoSuchElementException: If the WebElement isn't found.
-        :raises WebDriverException: if an error occurs while trying to find the WebElement.
+        :raises ElementNotFoundError: If no WebElement matched the locator within the timeout.
+        :raises StepError: if another error occurs while trying to find the WebElement.
         """
-        self.logger.info(f'********** {self.get_element.__name__}() **********')
+        self.logger.info('********** %s() **********', self.get_element.__name__)
         try:
-            self.logger.info(f'Getting WebElement with this locator {locator}')
-            web_element = self.driver.find_element(*locator)
-            self.logger.info(f'The WebElement was get successfully with locator {locator}')
+            web_element = self.element_cache.get(locator)
+            if web_element is not None:
+                self.logger.info('The WebElement was served from the element cache with locator %s', locator)
+                return web_element
+            self.logger.info('Getting WebElement with this locator %s', locator)
+            web_element = self.wait.until(element_present(locator), locator_key(locator), timeout)
+            self.element_cache.put(locator, web_element)
+            self.logger.info('The WebElement was get successfully with locator %s', locator)
             return web_element
-        except NoSuchElementException as e:
-            self.logger.error(f'The WebElement was not found with this locator {locator}. Error: {e}')
+        except (NoSuchElementException, TimeoutException) as e:
+            self.logger.error('The WebElement was not found with this locator %s. Error: %s', locator, e)
+            raise step_error(e, 'get_element', locator) from e
         except WebDriverException as e:
-            self.logger.error(f'An error occurred while trying to find the WebElement. Error: {e}')
+            self.logger.error('An error occurred while trying to find the WebElement. Error: %s', e)
+            raise step_error(e, 'get_element', locator) from e
 
-    def get_elements(self, locator: tuple) -> list[WebElement]:
+    @timed_step
+    def get_elements(self, locator: tuple) -> list['WebElement']:
         """
         Finds a list of WebElements using the provided locator.
 
         :param locator: A tuple (By, value) for locating a list of WebElements.
-        :return: A list of WebElement objects.
-        :raises NoSuchElementException: If no elements are found.
-        :raises WebDriverException: If an error occurs while trying to find the WebElements.
+        :return: A list of WebElement objects (empty if no elements are found).
+        :raises StepError: If an error occurs while trying to find the WebElements.
         """
-        self.logger.info(f'********** {self.get_elements.__name__}() **********')
+        self.logger.info('********** %s() **********', self.get_elements.__name__)
         try:
-            self.logger.info(f'Getting WebElements with this locator: {locator}')
+            self.logger.info('Getting WebElements with this locator: %s', locator)
             web_elements = self.driver.find_elements(*locator)
             if web_elements:
-                self.logger.info(f'Found {len(web_elements)} WebElements with this locator: {locator}.')
+                self.logger.info('Found %s WebElements with this locator: %s.', len(web_elements), locator)
             else:
-                self.logger.warning(f'No WebElements were found with this locator: {locator}.')
+                self.logger.warning('No WebElements were found with this locator: %s.', locator)
             return web_elements
         except NoSuchElementException as e:
-            self.logger.error(f'No WebElements were found with this locator: {locator}. Error: {e}')
+            self.logger.error('No WebElements were found with this locator: %s. Error: %s', locator, e)
+            raise step_error(e, 'get_elements', locator) from e
         except WebDriverException as e:
-            self.logger.error(f'An error occurred while trying to find the WebElements. Error: {e}')
+            self.logger.error('An error occurred while trying to find the WebElements. Error: %s', e)
+            raise step_error(e, 'get_elements', locator) from e
 
-    def click(self, locator: tuple, timeout: int = 15) -> None:
+    @timed_step
+    def click(self, locator: tuple, timeout: float = None) -> None:
         """
         Clicks on a WebElement found by the locator.
 
         :param locator: A tuple (By, value) for locating the WebElement.
-        :param timeout: Maximum time to wait for the WebElement to be clickable (default is 15 seconds).
+        :param timeout: Maximum time to wait for the WebElement to be clickable (default is the timeout learned for
+                        the locator, at least 15 seconds).
         :return: None.
-        :raises ElementNotInteractableException: If the WebElement isn't interactable to be clicked.
-        :raises WebDriverException: if an error occurs while trying to click the WebElement.
+        :raises ElementNotInteractableError: If the WebElement isn't interactable to be clicked.
+        :raises ElementNotFoundError: If no WebElement matched the locator within the timeout.
+        :raises StepTimeoutError: If the WebElement was found but didn't become clickable within the timeout.
+        :raises StepError: if another error occurs while trying to click the WebElement.
         """
-        self.logger.info(f'********** {self.click.__name__}() **********')
+        self.logger.info('********** %s() **********', self.click.__name__)
         try:
-            self.logger.info(f'Waiting for the WebElement to be clickable with locator: {locator}')
-            web_element = WebDriverWait(self.driver, timeout).until(
-                EC.element_to_be_clickable(locator)
-            )
-            self.logger.info(f'Clicking the WebElement with this locator: {locator}')
-            web_element.click()
-            self.logger.info(f'The WebElement was clicked successfully with this locator: {locator}')
+            self.logger.info('Waiting for the WebElement to be clickable with locator: %s', locator)
+            web_element = self._wait_until_clickable(locator, timeout)
+            self.logger.info('Clicking the WebElement with this locator: %s', locator)
+            try:
+                web_element.click()
+            except StaleElementReferenceException:
+                self.element_cache.evict_stale(locator)
+                self._wait_until_clickable(locator, timeout).click()
+            # the click may have changed the document
+            self.element_cache.invalidate()
+            self.logger.info('The WebElement was clicked successfully with this locator: %s', locator)
+            self._capture_step('click')
+        except NoSuchElementException as e:
+            self.logger.error('The WebElement was not found with this locator %s. Error: %s', locator, e)
+            raise step_error(e, 'click', locator) from e
         except ElementNotInteractableException as e:
-            self.logger.error(f'The WebElement with this locator {locator} isn\'t interactable to be clicked. '
-                              f'Error: {e}')
+            self.logger.error('The WebElement with this locator %s isn\'t interactable to be clicked. '
+                              'Error: %s', locator, e)
+            raise step_error(e, 'click', locator) from e
         except TimeoutException as e:
-            self.logger.error(f'Timed out waiting for the WebElement to be clickable with locator: {locator}. '
-                              f'Error: {e}')
+            self.logger.error('Timed out waiting for the WebElement to be clickable with locator: %s. '
+                              'Error: %s', locator, e)
+            raise step_error(e, 'click', locator) from e
         except WebDriverException as e:
-            self.logger.error(f'An error occurred while trying to click the WebElement. Error: {e}')
+            self.logger.error('An error occurred while trying to click the WebElement. Error: %s', e)
+            raise step_error(e, 'click', locator) from e
+
+    def _wait_until_clickable(self, locator: tuple, timeout: float = None) -> 'WebElement':
+        """Waits until the (cached, if possible) WebElement is clickable and caches it."""
+        key = locator_key(locator)
+        web_element = self.element_cache.get(locator)
+        if web_element is not None:
+            try:
+                return self.wait.until(element_clickable(web_element), key, timeout)
+            except (StaleElementReferenceException, TimeoutException):
+                self.element_cache.evict_stale(locator)
+        web_element = self.wait.until(element_clickable(locator), key, timeout)
+        self.element_cache.put(locator, web_element)
+        return web_element
 
-    def type_text(self, locator: tuple, text: str) -> None:
+    @timed_step
+    def type_text(self, locator: tuple, text: str, timeout: float = None) -> None:
         """
         Sends text input to a WebElement found by the locator.
 
         :param locator: A tuple (By, value) for locating the WebElement.
         :param text: Text to send to the WebElement.
+        :param timeout: Maximum time to wait for the WebElement (default is the timeout learned for the locator).
         :return: None.
-        :raises ElementNotInteractableException: If the WebElement isn't interactable to be typed.
-        :raises WebDriverException: if an error occurs while trying to type the text.
+        :raises ElementNotInteractableError: If the WebElement isn't interactable to be typed.
+        :raises StepError: if another error occurs while trying to type the text.
         """
-        self.logger.info(f'********** {self.type_text.__name__}() **********')
+        self.logger.info('********** %s() **********', self.type_text.__name__)
         try:
-            self.logger.info(f'Typing text "{text}" into the WebElement with this locator: {locator}')
-            web_element = self.get_element(locator)
-            web_element.clear()
-            web_element.send_keys(text)
-            self.logger.info(f'The text "{text}" typed successfully into the WebElement with this locator: {locator}')
+            self.logger.info('Typing text "%s" into the WebElement with this locator: %s', text, locator)
+            web_element = self.get_element(locator, timeout)
+            try:
+                web_element.clear()
+                web_element.send_keys(text)
+            except StaleElementReferenceException:
+                self.logger.info('The cached WebElement with this locator %s is stale, resolving it again.', locator)
+                self.element_cache.evict_stale(locator)
+                web_element = self.get_element(locator)
+                web_element.clear()
+                web_element.send_keys(text)
+            self.logger.info('The text "%s" typed successfully into the WebElement with this locator: %s',
+                             text, locator)
         except ElementNotInteractableException as e:
-            self.logger.error(f'The WebElement with this locator isn\'t interactable to be typed. Error: {e}')
+            self.logger.error('The WebElement with this locator isn\'t interactable to be typed. Error: %s', e)
+            raise step_error(e, 'type_text', locator) from e
         except WebDriverException as e:
-            self.logger.error(f'An error occurred while trying to type the text into the WebElement. Error: {e}')
+            self.logger.error('An error occurred while trying to type the text into the WebElement. Error: %s', e)
+            raise step_error(e, 'type_text', locator) from e
 
-    def take_screenshot(self, screenshot_dir: str = 'screenshots') -> None:
+    @timed_step
+    def fill_form(self, fields: dict, keystrokes: tuple = ()) -> None:
         """
-        Captures a screenshot of the current browser window.
+        Fills several form fields in a single WebDriver round-trip.
 
-        :param screenshot_dir: Directory where the screenshot will be saved.
+        The values are set by one script that also fires the input/change events. Fields listed in ``keystrokes``,
+        fields the script can't fill (e.g., file inputs or link-text locators) and fields it didn't find fall back
+        to :meth:`type_text`.
+
+        :param fields: A dictionary {locator: text} where locator is a tuple (By, value).
+        :param keystrokes: Locators of the fields that need real keystrokes.
         :return: None.
-        :raises WebDriverException: if an error occurs while trying to take the screenshot.
+        :raises StepError: if a field couldn't be typed into.
         """
-        self.logger.info(f'********** {self.take_screenshot.__name__}() **********')
+        self.logger.info('********** %s() **********', self.fill_form.__name__)
+        scripted_fields = [locator for locator in fields if locator not in keystrokes]
+        fallback_fields = [locator for locator in fields if locator in keystrokes]
         try:
-            os.makedirs(screenshot_dir, exist_ok=True)
-            timestamp = datetime.now().strftime('%Y-%m-%d_%H-%M-%S')
-            screenshot_name = f'{timestamp}.png'
-            screenshot_path = os.path.join(screenshot_dir, screenshot_name)
-            self.driver.save_screenshot(screenshot_path)
-            self.logger.info(f'The screenshot was saved successfully at: {screenshot_path}.')
+            if scripted_fields:
+                self.logger.info('Filling %s fields with one script: %s', len(scripted_fields), scripted_fields)
+                statuses = self.driver.execute_script(
+                    _FILL_FORM_SCRIPT, [[by, value, str(fields[(by, value)])] for by, value in scripted_fields]
+                )
+                for locator, status in zip(scripted_fields, statuses):
+                    if status != 'ok':
+                        self.logger.info('The field with this locator %s couldn\'t be filled by script (%s), '
+                                         'falling back to typing.', locator, status)
+                        fallback_fields.append(locator)
         except WebDriverException as e:
-            self.logger.error(f'An error occurred while trying to save the screenshot. Error: {e}')
+            self.logger.warning('An error occurred while filling the form by script, falling back to typing. '
+                                'Error: %s', e)
+            fallback_fields = list(fields)
+        for locator in fallback_fields:
+            self.type_text(locator, fields[locator])
+        self.logger.info('The form was filled successfully: %s fields by script, %s by typing.',
+                         len(fields) - len(fallback_fields), len(fallback_fields))
+        self._capture_step('fill_form')
+
+    @timed_step
+    def snapshot(self, locators: dict, max_text: int = 200) -> dict:
+        """
+        Reads the state of the page and of a set of locators in a single WebDriver round-trip.
 
+        It replaces a get_title() plus one get_element()/get_elements() per locator when verifying a page, see
+        ``BaseTest.assert_snapshot``.
+
+        :param locators: A dictionary {name: locator} where locator is a tuple (By, value), e.g. the ``locators``
+                         of a page object.
+        :param max_text: Maximum length of the element texts.
+        :return: A dictionary {title, url, ready_state, elements: {name: {present, count, visible, enabled, text,
+                 value}}}, where the state describes the first matching element, value is the value of a form
+                 field (the checked state of a checkbox or radio, masked for a password) and an "error" key holds
+                 the error of a malformed locator.
+        :raises StepError: if the snapshot couldn't be taken.
+        """
+        self.logger.info('********** %s() **********', self.snapshot.__name__)
+        try:
+            snapshot = self.driver.execute_script(
+                _SNAPSHOT_SCRIPT, [[name, by, value] for name, (by, value) in locators.items()], max_text)
+        except WebDriverException as e:
+            self.logger.error('An error occurred while taking the snapshot of the page. Error: %s', e)
+            raise step_error(e, 'snapshot') from e
+        elements = snapshot['elements']
+        self.logger.info('Snapshot of %s: %s of %s locators present, %s visible.', snapshot['url'],
+                         sum(state['present'] for state in elements.values()), len(elements),
+                         sum(state['visible'] for state in elements.values()))
+        return snapshot
+
+    @timed_step
+    def wait_for_page_to_settle(self, quiet_ms: int = 300, timeout: float = None) -> None:
+        """
+        Waits until the page is loaded, has no pending fetch/XHR request and its DOM stopped changing.
+
+        :param quiet_ms: How long the DOM must stay unchanged, in milliseconds.
+        :param timeout: Maximum time in seconds to wait.
+        :return: None.
+        :raises StepTimeoutError: if the page didn't settle within the timeout.
+        :raises StepError: if another error occurs while waiting for the page.
+        """
+        self.logger.info('********** %s() **********', self.wait_for_page_to_settle.__name__)
+        try:
+            self.wait.wait_for_dom_quiescence(quiet_ms, timeout)
+        except TimeoutException as e:
+            self.logger.error('Timed out waiting for the page to settle. Error: %s', e)
+            raise step_error(e, 'wait_for_page_to_settle') from e
+        except WebDriverException as e:
+            self.logger.error('An error occurred while waiting for the page to settle. Error: %s', e)
+            raise step_error(e, 'wait_for_page_to_settle') from e
+
+    def take_screenshot(self, screenshot_dir: str = None, label: str = 'screenshot'):
+        """
+        Captures a screenshot of the current browser window.
+
+        Only the capture happens on the calling thread; the screenshot is encoded and written in the background
+        by the screenshot manager.
+
+        :param screenshot_dir: Directory where the screenshot will be saved (default is the per-run, per-worker,
+                               per-test directory of the screenshot manager).
+        :param label: Short label added to the file name.
+        :return: The path of the screenshot, or None if it couldn't be taken.
+        """
+        self.logger.info('********** %s() **********', self.take_screenshot.__name__)
+        screenshot_path = get_screenshot_manager().capture(self.driver, step_recorder.current_test, label,
+                                                           screenshot_dir)
+        self.logger.info('The screenshot was queued to be saved at: %s.', screenshot_path)
+        return screenshot_path
+
+    def _capture_step(self, step: str) -> None:
+        """Takes a screenshot after a step when the screenshot mode is "on-step"."""
+        screenshot_manager = get_screenshot_manager()
+        if screenshot_manager.mode == 'on-step':
+            screenshot_manager.capture(self.driver, step_recorder.current_test, step)
+
+    @timed_step
     def get_title(self) -> str:
         """
         Returns the title of the current browser window.
 
         :return: the title of the current browser window.
-        :raises WebDriverException: if an error occurs while trying to get the title of the current browser window.
+        :raises StepError: if an error occurs while trying to get the title of the current browser window.
         """
-        self.logger.info(f'********** {self.get_title.__name__}() **********')
+        self.logger.info('********** %s() **********', self.get_title.__name__)
         try:
             self.logger.info('Fetching the page title...')
             current_page_title = self.driver.title
-            self.logger.info(f'The page title was fetched successfully. Current page title: {current_page_title}')
+            self.logger.info('The page title was fetched successfully. Current page title: %s', current_page_title)
             return current_page_title
         except WebDriverException as e:
-            self.logger.error(f'An error occurred while trying to get the title of the current browser window. '
-                              f'Error: {e}')
+            self.logger.error('An error occurred while trying to get the title of the current browser window. '
+                              'Error: %s', e)
+            raise step_error(e, 'get_title') from e
+
+    @timed_step
+    def check_pages(self, urls: list, timeout: float = None, max_tabs: int = None) -> list:
+        """
+        Loads a batch of URLs concurrently in new tabs of the browser and collects the title, HTTP status and
+        navigation timing of each page.
 
+        Every tab is opened by a script, which doesn't wait for the page to load, so the pages of a batch load in
+        parallel and a batch takes about the wall time of its slowest page. When the browser profile blocks URLs,
+        each tab opens blank and blocks them before it navigates. The tabs are then polled until their
+        document reached "page_checks.ready_state", read in the same round-trip and closed. The browser is back
+        on its original tab afterwards, whose cached elements stay valid. When "web_vitals" is enabled, the metrics
+        are recorded and checked like after a navigation.
+
+        :param urls: The URLs to check.
+        :param timeout: Maximum time in seconds to wait for the pages of a batch (default is "page_checks.timeout").
+        :param max_tabs: The number of tabs open at the same time (default is "page_checks.max_tabs").
+        :return: One dictionary per URL, in order: {requested_url, url, title, status, ready_state, ttfb_ms,
+                 dom_content_loaded_ms, load_ms, ..., error}, where error is None, "blocked" (the browser didn't
+                 open the tab) or "timeout" (the page didn't load in time; its last ready state is kept).
+        :raises StepError: if the browser session failed while checking the pages.
+        """
+        self.logger.info('********** %s() **********', self.check_pages.__name__)
+        settings = get_config().section('page_checks')
+        timeout = settings.get('timeout', 30) if timeout is None else timeout
+        max_tabs = max(1, max_tabs or settings.get('max_tabs', 10))
+        ready_state = settings.get('ready_state', 'complete')
+        results = []
+        try:
+            original_handle = self.driver.current_window_handle
+            for start in range(0, len(urls), max_tabs):
+                batch = urls[start:start + max_tabs]
+                self.logger.info('Checking %s pages in new tabs: %s', len(batch), batch)
+                results.extend(self._check_batch(batch, original_handle, timeout, ready_state))
+        except WebDriverException as e:
+            self.logger.error('An error occurred while checking the pages in new tabs. Error: %s', e)
+            raise step_error(e, 'check_pages', f'{len(urls)} pages') from e
+        failed = [result['requested_url'] for result in results if result['error']]
+        if failed:
+            self.logger.warning('%s of %s pages could not be checked: %s', len(failed), len(results), failed)
+        self.logger.info('%s pages were checked.', len(results))
+        return results
+
+    def _check_batch(self, urls: list, original_handle: str, timeout: float, ready_state: str) -> list:
+        """Opens the URLs in new tabs, polls them until they are loaded and closes them."""
+        results = [{'requested_url': url, 'error': None} for url in urls]
+        tabs = {}
+        # the blocked URLs of the browser profile are per tab: a tab opens blank, blocks them, then navigates
+        block_in_tabs = blocks_urls(self.driver)
+        try:
+            handles = set(self.driver.window_handles)
+            for index, url in enumerate(urls):
+                if not self.driver.execute_script(_OPEN_TAB_SCRIPT, 'about:blank' if block_in_tabs else url,
+                                                  f'page-check-{index}'):
+                    results[index]['error'] = 'blocked'
+                    continue
+                previous_handles, handles = handles, set(self.driver.window_handles)
+                new_handles = handles - previous_handles
+                if not new_handles:
+                    results[index]['error'] = 'blocked'
+                    continue
+                handle = new_handles.pop()
+                tabs[handle] = index
+                if block_in_tabs:
+                    self.driver.switch_to.window(handle)
+                    block_urls(self.driver)
+                    self.driver.execute_script(_NAVIGATE_SCRIPT, url)
+            deadline = time.monotonic() + timeout
+            poll = self.wait.min_poll
+            while tabs:
+                for handle, index in list(tabs.items()):
+                    self.driver.switch_to.window(handle)
+                    page = self.driver.execute_script(_PAGE_CHECK_SCRIPT, ready_state, urls[index]) or {}
+                    results[index].update(page)
+                    if 'title' in page:
+                        self.driver.close()
+                        del tabs[handle]
+                remaining = deadline - time.monotonic()
+                if tabs and remaining <= 0:
+                    for index in tabs.values():
+                        results[index]['error'] = 'timeout'
+                    break
+                if tabs:
+                    time.sleep(min(poll, remaining))
+                    poll = min(self.wait.max_poll, poll * self.wait.backoff)
+        finally:
+            for handle in tabs:
+                try:
+                    self.driver.switch_to.window(handle)
+                    self.driver.close()
+                except WebDriverException as e:
+                    self.logger.warning('The tab of a page check could not be closed. Error: %s', e)
+            self.driver.switch_to.window(original_handle)
+        web_vitals_recorder = get_web_vitals_recorder()
+        for result in results:
+            if web_vitals_recorder is not None and 'title' in result:
+                metrics = {key: value for key, value in result.items()
+                           if key not in ('requested_url', 'title', 'ready_state', 'error')}
+                result['violations'] = web_vitals_recorder.record(metrics, self.page_object)['violations']
+        return results
+
+    @timed_step
     def navigate_to_url(self, url: str) -> None:
         """
         Navigates to the specified URL using the WebDriver.
 
+        When "web_vitals" is enabled, the navigation timing, resource timings, LCP and CLS of the page are collected
+        afterwards and appended to ``navigation_metrics``.
+
         :param url: the URL to navigate to.
         :return: None.
-        :raises WebDriverException: if an error occurs while trying to navigate to the URL.
+        :raises StepError: if an error occurs while trying to navigate to the URL (BrowserSessionError for network
+                           errors).
         """
-        self.logger.info(f'********** {self.navigate_to_url.__name__}() **********')
+        self.logger.info('********** %s() **********', self.navigate_to_url.__name__)
         try:
-            self.logger.info(f'Navigating to this url: {url}...')
+            self.logger.info('Navigating to this url: %s...', url)
+            self.element_cache.invalidate()
             self.driver.get(url)
-            self.logger.info(f'Successfully navigated to this url: {url}')
+            self.logger.info('Successfully navigated to this url: %s', url)
+            web_vitals_recorder = get_web_vitals_recorder()
+            if web_vitals_recorder is not None:
+                metrics = web_vitals_recorder.collect(self.driver, self.page_object)
+                if metrics is not None:
+                    self.navigation_metrics.append(metrics)
+            self._capture_step('navigate_to_url')
         except WebDriverException as e:
-            self.logger.error(f'An error occurred while trying to navigate to this url: {url}. Error: {e}')
+            self.logger.error('An error occurred while trying to navigate to this url: %s. Error: %s', url, e)
+            raise step_error(e, 'navigate_to_url', url) from e
@@ -0,0 +1,173 @@
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from .config_reader import DriverCacheSettings
+from .logger import setup_logger
+
+_DEFAULT_CACHE_DIR = Path(__file__).resolve().parent.parent / '.driver_cache'
+_MANIFEST_NAME = 'manifest.json'
+
+
+class DriverBinaryCache:
+    """
+    Local cache of driver binary paths (chromedriver, geckodriver, msedgedriver) keyed by browser and version.
+
+    A warm lookup only detects the locally installed browser version and reads the manifest, so it doesn't
+    make any network call. ``webdriver_manager`` is used on a cache miss or once the entry is older than the
+    TTL. In offline mode ``webdriver_manager`` is never called and the newest cached binary of the browser is
+    used when the exact version isn't cached (``driver_cache.offline``, LUMA_DRIVER_OFFLINE=1 or
+    LUMA_DRIVER_CACHE__OFFLINE=1).
+    """
+
+    def __init__(self, cache_dir: str = None, ttl_seconds: float = 7 * 24 * 3600, offline: bool = False):
+        self.cache_dir = Path(cache_dir) if cache_dir else _DEFAULT_CACHE_DIR
+        self.ttl_seconds = ttl_seconds
+        self.offline = offline
+        self.logger = setup_logger()
+        self.timings = []
+        self._lock = threading.Lock()
+
+    @property
+    def manifest_path(self) -> Path:
+        return self.cache_dir / _MANIFEST_NAME
+
+    def resolve(self, browser: str) -> str:
+        """
+        Returns the path of the driver binary for the installed version of the browser.
+
+        :param browser: the browser type (e.g., 'chrome', 'firefox', 'edge').
+        :return: the path of the driver binary.
+        :raises ValueError: if the browser isn't supported.
+        :raises FileNotFoundError: if the cache is offline and no binary is cached for the browser.
+        """
+        self.logger.info('********** %s() **********', self.resolve.__name__)
+        started = time.perf_counter()
+        with self._lock:
+            manifest = self._read_manifest()
+            browser_version = get_browser_version(browser)
+            entries = manifest.setdefault(browser, {})
+            entry = entries.get(browser_version or 'unknown')
+            source = 'cache'
+            if not self._is_usable(entry):
+                if self.offline:
+                    entry = self._newest_usable_entry(entries)
+                    if entry is None:
+                        raise FileNotFoundError(f'No cached driver binary for {browser} {browser_version} and the '
+                                                f'driver cache is in offline mode.')
+                    self.logger.warning('No cached driver for %s %s, using the newest cached one: %s', browser,
+                                        browser_version, entry['path'])
+                else:
+                    install_started = time.perf_counter()
+                    driver_path = _install_driver(browser)
+                    entry = {
+                        'path': driver_path,
+                        'resolved_at': time.time(),
+                        'install_ms': round((time.perf_counter() - install_started) * 1000, 1),
+                    }
+                    entries[browser_version or 'unknown'] = entry
+                    self._write_manifest(manifest)
+                    source = 'webdriver_manager'
+            elapsed_ms = round((time.perf_counter() - started) * 1000, 1)
+            saved_ms = max(entry.get('install_ms', 0.0) - elapsed_ms, 0.0) if source == 'cache' else 0.0
+            timing = {
+                'browser': browser,
+                'browser_version': browser_version,
+                'source': source,
+                'elapsed_ms': elapsed_ms,
+                'saved_ms': round(saved_ms, 1),
+            }
+            self.timings.append(timing)
+        self.logger.info('Resolved the %s driver from %s in %s ms (saved ~%s ms): %s', browser, source, elapsed_ms,
+                         timing['saved_ms'], entry['path'])
+        return entry['path']
+
+    def clear(self) -> None:
+        """
+        Forgets every cached entry. The binaries themselves are left on disk.
+
+        :return: None.
+        """
+        with self._lock:
+            if self.manifest_path.exists():
+                self.manifest_path.unlink()
+
+    def _is_usable(self, entry) -> bool:
+        if not entry or not os.path.exists(entry['path']):
+            return False
+        return self.offline or time.time() - entry['resolved_at'] < self.ttl_seconds
+
+    @staticmethod
+    def _newest_usable_entry(entries: dict):
+        usable = [entry for entry in entries.values() if os.path.exists(entry['path'])]
+        return max(usable, key=lambda entry: entry['resolved_at']) if usable else None
+
+    def _read_manifest(self) -> dict:
+        try:
+            with open(self.manifest_path) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+        except ValueError as e:
+            self.logger.warning('The driver cache manifest is corrupted and will be rebuilt. Error: %s', e)
+            return {}
+
+    def _write_manifest(self, manifest: dict) -> None:
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        temp_path = self.manifest_path.with_suffix(f'.{os.getpid()}.tmp')
+        with open(temp_path, 'w') as f:
+            json.dump(manifest, f, indent=2)
+        os.replace(temp_path, self.manifest_path)
+
+
+def get_browser_version(browser: str):
+    """
+    Detects the locally installed version of the browser without any network call.
+
+    :param browser: the browser type (e.g., 'chrome', 'firefox', 'edge').
+    :return: the browser version, or None if it couldn't be detected.
+    :raises ValueError: if the browser isn't supported.
+    """
+    from webdriver_manager.core.os_manager import ChromeType, OperationSystemManager
+    browser_types = {'chrome': ChromeType.GOOGLE, 'firefox': 'firefox', 'edge': ChromeType.MSEDGE}
+    if browser not in browser_types:
+        raise ValueError(f'Unsupported browser: {browser}')
+    try:
+        return OperationSystemManager().get_browser_version_from_os(browser_types[browser])
+    except Exception:
+        return None
+
+
+def _install_driver(browser: str) -> str:
+    if browser == 'chrome':
+        from webdriver_manager.chrome import ChromeDriverManager
+        return ChromeDriverManager().install()
+    if browser == 'firefox':
+        from webdriver_manager.firefox import GeckoDriverManager
+        return GeckoDriverManager().install()
+    if browser == 'edge':
+        from webdriver_manager.microsoft import EdgeChromiumDriverManager
+        return EdgeChromiumDriverManager().install()
+    raise ValueError(f'Unsupported browser: {browser}')
+
+
+_shared_cache = None
+
+
+def get_driver_binary_cache(settings: DriverCacheSettings = None) -> DriverBinaryCache:
+    """
+    Returns the process-wide driver binary cache, creating it on the first call.
+
+    :param settings: The "driver_cache" section of the configuration (used on the first call only).
+    :return: The shared DriverBinaryCache instance.
+    """
+    global _shared_cache
+    if _shared_cache is None:
+        settings = settings or DriverCacheSettings()
+        _shared_cache = DriverBinaryCache(
+            cache_dir=settings.dir,
+            ttl_seconds=settings.ttl_hours * 3600,
+            offline=bool(settings.offline),
+        )
+    return _shared_cache
@@ -0,0 +1,303 @@
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import TYPE_CHECKING, Callable
+from selenium.common.exceptions import WebDriverException
+from .element_cache import get_element_cache
+from .logger import setup_logger
+
+if TYPE_CHECKING:
+    from selenium.webdriver.remote.webdriver import WebDriver
+
+
+class _PooledDriver:
+    """Bookkeeping record for a single browser owned by the pool."""
+
+    def __init__(self, web_driver: 'WebDriver'):
+        self.web_driver = web_driver
+        self.leases = 0
+        self.created_at = time.monotonic()
+
+
+class DriverPool:
+    """
+    Session-wide pool of pre-warmed WebDriver instances.
+
+    Browsers are created by ``factory`` and handed out through :meth:`acquire` / :meth:`release`
+    (or the :meth:`lease` context manager). Between two leases the browser state is reset (cookies,
+    local/session storage and extra tabs). A browser is recycled once it reached ``max_leases``
+    leases or when its liveness probe fails.
+    """
+
+    def __init__(self, factory: Callable[[], 'WebDriver'], size: int = 1, max_leases: int = 25,
+                 blank_url: str = 'about:blank'):
+        self.factory = factory
+        self.size = max(1, size)
+        self.max_leases = max(1, max_leases)
+        self.blank_url = blank_url
+        self.logger = setup_logger()
+        self._idle = deque()
+        self._leased = {}
+        self._lock = threading.Lock()
+        self._available = threading.Condition(self._lock)
+        self._created = 0
+        self._recycled = 0
+        self._checkout_times = []
+        self._reset_times = []
+        self._closed = False
+
+    def warm_up(self, count: int = None) -> None:
+        """
+        Starts browsers up front so that the first leases don't pay the browser start-up cost.
+
+        :param count: Number of browsers to start (default is the pool size).
+        :return: None.
+        """
+        self.logger.info('********** %s() **********', self.warm_up.__name__)
+        count = self.size if count is None else min(count, self.size)
+        while True:
+            with self._lock:
+                if self._created >= count:
+                    break
+                self._created += 1
+            pooled_driver = self._create_driver()
+            with self._available:
+                if pooled_driver is None:
+                    self._created -= 1
+                    break
+                self._idle.append(pooled_driver)
+                self._available.notify()
+        self.logger.info('The driver pool is warmed up with %s browser(s).', len(self._idle))
+
+    def acquire(self, timeout: float = None) -> 'WebDriver':
+        """
+        Leases a browser from the pool, creating a new one if the pool isn't full yet.
+
+        :param timeout: Maximum time in seconds to wait for a free browser (default is to wait forever).
+        :return: A WebDriver instance with a clean state.
+        :raises TimeoutError: If no browser became available within the timeout.
+        :raises RuntimeError: If the pool is already shut down.
+        """
+        self.logger.info('********** %s() **********', self.acquire.__name__)
+        started = time.perf_counter()
+        pooled_driver = None
+        with self._available:
+            while pooled_driver is None:
+                if self._closed:
+                    raise RuntimeError('The driver pool is already shut down.')
+                if self._idle:
+                    pooled_driver = self._idle.popleft()
+                elif self._created < self.size:
+                    self._created += 1
+                    break
+                elif not self._available.wait(timeout):
+                    raise TimeoutError(f'No browser became available within {timeout} seconds.')
+        if pooled_driver is None:
+            pooled_driver = self._create_driver()
+        elif not self._is_alive(pooled_driver):
+            self.logger.warning('The pooled browser failed its liveness probe, recycling it.')
+            pooled_driver = self._recycle(pooled_driver)
+        if pooled_driver is None:
+            with self._available:
+                self._created -= 1
+                self._available.notify()
+            raise RuntimeError('The driver pool failed to start a new browser.')
+        pooled_driver.leases += 1
+        with self._lock:
+            self._leased[id(pooled_driver.web_driver)] = pooled_driver
+        elapsed = time.perf_counter() - started
+        self._checkout_times.append(elapsed)
+        self.logger.info('Browser checked out in %.1f ms (lease #%s).', elapsed * 1000, pooled_driver.leases)
+        return pooled_driver.web_driver
+
+    def release(self, web_driver: 'WebDriver') -> None:
+        """
+        Returns a leased browser to the pool, resetting or recycling it as needed.
+
+        :param web_driver: The WebDriver instance returned by :meth:`acquire`.
+        :return: None.
+        """
+        self.logger.info('********** %s() **********', self.release.__name__)
+        with self._lock:
+            pooled_driver = self._leased.pop(id(web_driver), None)
+        if pooled_driver is None:
+            self.logger.warning('The released browser was not leased from this pool, ignoring it.')
+            return
+        if self._closed:
+            self._quit(pooled_driver)
+            return
+        if pooled_driver.leases >= self.max_leases:
+            self.logger.info('The browser reached %s leases, recycling it.', self.max_leases)
+            pooled_driver = self._recycle(pooled_driver)
+        elif not self._reset(pooled_driver):
+            pooled_driver = self._recycle(pooled_driver)
+        with self._available:
+            if pooled_driver is None:
+                self._created -= 1
+            else:
+                self._idle.append(pooled_driver)
+            self._available.notify()
+
+    @contextmanager
+    def lease(self, timeout: float = None):
+        """
+        Context manager around :meth:`acquire` and :meth:`release`.
+
+        :param timeout: Maximum time in seconds to wait for a free browser.
+        :return: A WebDriver instance with a clean state.
+        """
+        web_driver = self.acquire(timeout)
+        try:
+            yield web_driver
+        finally:
+            self.release(web_driver)
+
+    def checkout(self, timeout: float = None) -> 'DriverLease':
+        """
+        Leases a browser behind a :class:`DriverLease` handle, which can swap it for a fresh one later on.
+
+        :param timeout: Maximum time in seconds to wait for a free browser.
+        :return: The DriverLease, to be returned with :meth:`DriverLease.release`.
+        """
+        return DriverLease(self, self.acquire(timeout))
+
+    def shutdown(self) -> None:
+        """
+        Quits every idle browser and refuses further leases. Leased browsers are quit on release.
+
+        :return: None.
+        """
+        self.logger.info('********** %s() **********', self.shutdown.__name__)
+        with self._available:
+            self._closed = True
+            idle_drivers = list(self._idle)
+            self._idle.clear()
+            self._available.notify_all()
+        for pooled_driver in idle_drivers:
+            self._quit(pooled_driver)
+        self.logger.info('The driver pool is shut down. Stats: %s', self.stats())
+
+    def stats(self) -> dict:
+        """
+        Returns timing and recycling statistics of the pool.
+
+        :return: A dictionary with the number of checkouts, resets, recycles and their timings in milliseconds.
+        """
+        return {
+            'checkouts': len(self._checkout_times),
+            'checkout_avg_ms': _average_ms(self._checkout_times),
+            'checkout_max_ms': _max_ms(self._checkout_times),
+            'resets': len(self._reset_times),
+            'reset_avg_ms': _average_ms(self._reset_times),
+            'reset_max_ms': _max_ms(self._reset_times),
+            'recycled': self._recycled,
+        }
+
+    def _create_driver(self):
+        started = time.perf_counter()
+        try:
+            web_driver = self.factory()
+        except Exception as e:
+            self.logger.error('An error occurred while starting a pooled browser. Error: %s', e)
+            return None
+        if web_driver is None:
+            self.logger.error('The driver factory did not return a browser.')
+            return None
+        self.logger.info('A new pooled browser started in %.1f ms.', (time.perf_counter() - started) * 1000)
+        return _PooledDriver(web_driver)
+
+    def _recycle(self, pooled_driver: _PooledDriver):
+        self._quit(pooled_driver)
+        self._recycled += 1
+        return self._create_driver()
+
+    def _quit(self, pooled_driver: _PooledDriver) -> None:
+        try:
+            pooled_driver.web_driver.quit()
+        except WebDriverException as e:
+            self.logger.warning('An error occurred while quitting a pooled browser. Error: %s', e)
+
+    @staticmethod
+    def _is_alive(pooled_driver: _PooledDriver) -> bool:
+        try:
+            pooled_driver.web_driver.current_window_handle
+            return True
+        except WebDriverException:
+            return False
+
+    def _reset(self, pooled_driver: _PooledDriver) -> bool:
+        """Clears cookies, storage and extra tabs. Returns False when the browser must be recycled."""
+        started = time.perf_counter()
+        web_driver = pooled_driver.web_driver
+        try:
+            handles = web_driver.window_handles
+            for handle in handles[1:]:
+                web_driver.switch_to.window(handle)
+                web_driver.close()
+            web_driver.switch_to.window(handles[0])
+            try:
+                web_driver.execute_script('window.localStorage.clear(); window.sessionStorage.clear();')
+            except WebDriverException:
+                # pages like about:blank or data: URLs don't expose storage
+                pass
+            web_driver.delete_all_cookies()
+            web_driver.get(self.blank_url)
+        except WebDriverException as e:
+            self.logger.warning('An error occurred while resetting a pooled browser. Error: %s', e)
+            return False
+        elapsed = time.perf_counter() - started
+        self._reset_times.append(elapsed)
+        self.logger.info('Browser state reset in %.1f ms.', elapsed * 1000)
+        return True
+
+
+class DriverLease:
+    """
+    Stable handle of a browser leased from a :class:`DriverPool`.
+
+    Attribute access is delegated to the leased WebDriver, so the handle can be used wherever a WebDriver is
+    expected, and ``close()`` still closes the current tab. :meth:`renew` returns the browser to the pool (which
+    resets it, or recycles it when it's dead) and leases another one, e.g. to retry a test on a fresh browser while
+    the fixtures keep the same handle. :meth:`release` ends the lease.
+    """
+
+    def __init__(self, pool: DriverPool, web_driver: 'WebDriver'):
+        self.pool = pool
+        self.web_driver = web_driver
+        self.renewals = 0
+
+    def __getattr__(self, name):
+        return getattr(self.web_driver, name)
+
+    def renew(self, timeout: float = None) -> None:
+        """
+        Swaps the leased browser for a fresh one.
+
+        :param timeout: Maximum time in seconds to wait for a free browser.
+        :return: None.
+        """
+        self.pool.release(self.web_driver)
+        self.web_driver = None
+        self.web_driver = self.pool.acquire(timeout)
+        self.renewals += 1
+        # elements resolved in the previous browser can't be used anymore
+        get_element_cache(self).invalidate()
+
+    def release(self) -> None:
+        """
+        Returns the leased browser to the pool.
+
+        :return: None.
+        """
+        if self.web_driver is not None:
+            self.pool.release(self.web_driver)
+            self.web_driver = None
+
+
+def _average_ms(samples: list) -> float:
+    return round(sum(samples) / len(samples) * 1000, 2) if samples else 0.0
+
+
+def _max_ms(samples: list) -> float:
+    return round(max(samples) * 1000, 2) if samples else 0.0
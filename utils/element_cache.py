@@ -0,0 +1,86 @@
+import weakref
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from selenium.webdriver.remote.webelement import WebElement
+
+
+class ElementCache:
+    """
+    Per-page cache of resolved WebElements keyed by locator.
+
+    The cache is cleared whenever the wrapper knows that the document changed (navigation, clicks). A document
+    change it doesn't know about surfaces as a ``StaleElementReferenceException`` on the cached element, which
+    the wrapper handles by evicting the locator and resolving it again.
+    """
+
+    def __init__(self):
+        self._elements = {}
+        self.hits = 0
+        self.misses = 0
+        self.stale = 0
+        self.invalidations = 0
+
+    def get(self, locator: tuple):
+        """
+        Returns the cached WebElement of the locator and counts the hit or miss.
+
+        :param locator: A tuple (By, value).
+        :return: The cached WebElement, or None on a miss.
+        """
+        web_element = self._elements.get(locator)
+        if web_element is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return web_element
+
+    def put(self, locator: tuple, web_element: 'WebElement') -> None:
+        if web_element is not None:
+            self._elements[locator] = web_element
+
+    def evict_stale(self, locator: tuple) -> None:
+        """Drops a locator whose cached WebElement turned out to be stale."""
+        self.stale += 1
+        self._elements.pop(locator, None)
+
+    def invalidate(self) -> None:
+        """Drops every cached WebElement, e.g. after a navigation."""
+        if self._elements:
+            self.invalidations += 1
+            self._elements.clear()
+
+    def stats(self) -> dict:
+        """
+        Returns the cache counters. Every hit is a ``find_element`` round-trip that was saved.
+
+        :return: A dictionary with the hits, misses, stale re-resolutions, invalidations and the hit ratio.
+        """
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'stale': self.stale,
+            'invalidations': self.invalidations,
+            'hit_ratio': round(self.hits / lookups, 3) if lookups else 0.0,
+        }
+
+
+_caches = weakref.WeakKeyDictionary()
+
+
+def get_element_cache(driver) -> ElementCache:
+    """
+    Returns the element cache of a WebDriver, shared by every wrapper (page objects, tests) of the same browser.
+
+    :param driver: The WebDriver instance.
+    :return: The ElementCache of the WebDriver.
+    """
+    try:
+        cache = _caches.get(driver)
+        if cache is None:
+            cache = _caches[driver] = ElementCache()
+        return cache
+    except TypeError:
+        # objects that can't be weakly referenced get a private cache
+        return ElementCache()
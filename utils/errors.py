@@ -0,0 +1,88 @@
+from selenium.common.exceptions import (ElementNotInteractableException, InvalidSessionIdException,
+                                        NoSuchElementException, NoSuchWindowException,
+                                        StaleElementReferenceException, TimeoutException, WebDriverException)
+
+# Fragments of WebDriver error messages that mean the browser or the network failed rather than the page.
+_TRANSIENT_MESSAGES = ('disconnected', 'unreachable', 'session deleted', 'invalid session id',
+                       'target window already closed', 'timed out receiving message from renderer', 'net::err_',
+                       'connection refused', 'connection reset')
+
+
+class StepError(Exception):
+    """
+    A step of CustomSeleniumWebDriver failed.
+
+    ``transient`` tells whether retrying the test on a fresh browser may succeed (timeouts, stale elements, lost
+    browser sessions) or whether it will fail the same way (missing or non-interactable elements, other errors).
+    """
+
+    transient = False
+
+    def __init__(self, action: str, target=None, cause: Exception = None):
+        self.action = action
+        self.target = target
+        self.cause = cause
+        message = f'{action} failed' if target is None else f'{action} failed on {target}'
+        if cause is not None:
+            detail = (getattr(cause, 'msg', None) or str(cause)).strip().splitlines() or ['']
+            message = f'{message}: {type(cause).__name__}: {detail[0]}'
+        super().__init__(message)
+
+
+class TransientStepError(StepError):
+    """A step failure that may not happen again on a fresh browser."""
+
+    transient = True
+
+
+class StepTimeoutError(TransientStepError):
+    """The element or page wasn't ready within the timeout."""
+
+
+class StaleElementError(TransientStepError):
+    """The element was detached from the document while the step used it."""
+
+
+class BrowserSessionError(TransientStepError):
+    """The browser, its window or its network connection went away."""
+
+
+class ElementNotFoundError(StepError):
+    """The element doesn't exist on the page."""
+
+
+class ElementNotInteractableError(StepError):
+    """The element exists but can't be clicked or typed into."""
+
+
+class WebDriverStepError(StepError):
+    """Any other WebDriver error."""
+
+
+def step_error(cause: Exception, action: str, target=None) -> StepError:
+    """
+    Wraps a WebDriver exception in the matching typed step error.
+
+    :param cause: The exception raised by Selenium.
+    :param action: The step name (e.g., "click").
+    :param target: The locator or URL of the step.
+    :return: The StepError to raise (``raise step_error(e, ...) from e``).
+    """
+    if isinstance(cause, StepError):
+        return cause
+    if isinstance(cause, TimeoutException):
+        error_type = StepTimeoutError
+    elif isinstance(cause, StaleElementReferenceException):
+        error_type = StaleElementError
+    elif isinstance(cause, (InvalidSessionIdException, NoSuchWindowException)):
+        error_type = BrowserSessionError
+    elif isinstance(cause, NoSuchElementException):
+        error_type = ElementNotFoundError
+    elif isinstance(cause, ElementNotInteractableException):
+        error_type = ElementNotInteractableError
+    elif isinstance(cause, WebDriverException) and any(message in str(cause).lower()
+                                                        for message in _TRANSIENT_MESSAGES):
+        error_type = BrowserSessionError
+    else:
+        error_type = WebDriverStepError
+    return error_type(action, target, cause)
@@ -0,0 +1,245 @@
+"""
+In-process stand-in for a Selenium WebDriver that answers instantly.
+
+It knows a few pages (URL, title and elements) and implements the WebDriver calls the framework makes: navigation,
+element lookups, clicks, typing, the fill-form, snapshot, web-vitals and page-check scripts, tabs, cookies and the
+script timeouts. It is used to measure the overhead of the framework itself without a browser (see
+``utils/benchmark.py``), and by the unit tests.
+"""
+from collections import Counter
+from types import SimpleNamespace
+from selenium.common.exceptions import NoSuchElementException, NoSuchWindowException
+from selenium.webdriver.common.by import By
+from selenium.webdriver.remote.webelement import WebElement
+from .custom_selenium_webdriver import (_FILL_FORM_SCRIPT, _NAVIGATE_SCRIPT, _OPEN_TAB_SCRIPT, _PAGE_CHECK_SCRIPT,
+                                       _SNAPSHOT_SCRIPT)
+from .web_vitals import _COLLECT_METRICS_SCRIPT
+
+
+class FakeWebElement(WebElement):
+    """An element (displayed and enabled by default); clicking it navigates when it has a ``navigates_to`` URL."""
+
+    def __init__(self, driver, element_id: str, tag_name: str = 'input', navigates_to: str = None,
+                 displayed: bool = True, enabled: bool = True):
+        super().__init__(driver, element_id)
+        self._tag_name = tag_name
+        self.navigates_to = navigates_to
+        self.displayed = displayed
+        self.enabled = enabled
+        self.value = ''
+
+    @property
+    def tag_name(self) -> str:
+        return self._tag_name
+
+    @property
+    def text(self) -> str:
+        return self.value
+
+    def is_displayed(self) -> bool:
+        self._parent.calls['is_displayed'] += 1
+        return self.displayed
+
+    def is_enabled(self) -> bool:
+        self._parent.calls['is_enabled'] += 1
+        return self.enabled
+
+    def click(self) -> None:
+        self._parent.calls['click'] += 1
+        if self.navigates_to:
+            self._parent.get(self.navigates_to)
+
+    def clear(self) -> None:
+        self._parent.calls['clear'] += 1
+        self.value = ''
+
+    def send_keys(self, *value) -> None:
+        self._parent.calls['send_keys'] += 1
+        self.value += ''.join(str(part) for part in value)
+
+    def get_attribute(self, name: str):
+        self._parent.calls['get_attribute'] += 1
+        return self.value if name == 'value' else None
+
+
+class FakeWebDriver:
+    """
+    Fake WebDriver serving the pages given as {url: {"title": ..., "elements": {(By, value): {...}}}}.
+
+    Every WebDriver command is counted in ``calls``, which is how many round-trips the framework would have made
+    to a real browser.
+    """
+
+    def __init__(self, pages: dict):
+        self.pages = {url.rstrip('/'): page for url, page in pages.items()}
+        self.calls = Counter()
+        self.timeouts = SimpleNamespace(script=30)
+        self.switch_to = SimpleNamespace(window=self._switch_to_window)
+        self.current_window_handle = 'window-0'
+        self._windows = {self.current_window_handle: 'about:blank'}
+        # how many page checks a new tab stays on its initial about:blank document, like a real browser
+        self.tab_load_polls = 0
+        self._loading_tabs = {}
+        # the resolved elements of each window
+        self._elements = {self.current_window_handle: {}}
+
+    @classmethod
+    def magento(cls, sign_in_page_url: str, sign_up_page_url: str, account_page_url: str = None):
+        """
+        Returns a fake browser serving the customer pages the page objects work with.
+
+        :param sign_in_page_url: The URL of the sign-in page.
+        :param sign_up_page_url: The URL of the sign-up page.
+        :param account_page_url: The page both forms lead to (default is ``<origin>/customer/account/``).
+        :return: The FakeWebDriver instance.
+        """
+        account_page_url = account_page_url or sign_in_page_url.split('/customer/')[0] + '/customer/account/'
+        return cls({
+            sign_in_page_url: {'title': 'Customer Login', 'elements': {
+                (By.ID, 'email'): {},
+                (By.ID, 'pass'): {},
+                (By.XPATH, '//button[@type="submit" and @class="action login primary"]'): {
+                    'tag_name': 'button', 'navigates_to': account_page_url},
+            }},
+            sign_up_page_url: {'title': 'Create New Customer Account', 'elements': {
+                (By.ID, 'firstname'): {},
+                (By.ID, 'lastname'): {},
+                (By.ID, 'email_address'): {},
+                (By.ID, 'password'): {},
+                (By.ID, 'password-confirmation'): {},
+                (By.XPATH, '//button[@type="submit" and @title="Create an Account"]'): {
+                    'tag_name': 'button', 'navigates_to': account_page_url},
+            }},
+            account_page_url: {'title': 'My Account', 'elements': {}},
+        })
+
+    @property
+    def current_url(self) -> str:
+        return self._windows[self.current_window_handle]
+
+    @current_url.setter
+    def current_url(self, url: str) -> None:
+        self._windows[self.current_window_handle] = url
+
+    @property
+    def window_handles(self) -> list:
+        self.calls['window_handles'] += 1
+        return list(self._windows)
+
+    @property
+    def page(self) -> dict:
+        return self.pages.get(self.current_url.rstrip('/'), {'title': '', 'elements': {}})
+
+    @property
+    def title(self) -> str:
+        self.calls['title'] += 1
+        return self.page['title']
+
+    def get(self, url: str) -> None:
+        self.calls['get'] += 1
+        self.current_url = url
+        # a new document: the elements of the previous page are gone
+        self._elements[self.current_window_handle] = {}
+
+    def find_element(self, by: str = By.ID, value: str = None) -> FakeWebElement:
+        self.calls['find_element'] += 1
+        return self._element((by, value))
+
+    def find_elements(self, by: str = By.ID, value: str = None) -> list:
+        self.calls['find_elements'] += 1
+        try:
+            return [self._element((by, value))]
+        except NoSuchElementException:
+            return []
+
+    def execute_script(self, script: str, *args):
+        self.calls['execute_script'] += 1
+        if script == _FILL_FORM_SCRIPT:
+            statuses = []
+            for by, value, text in args[0]:
+                try:
+                    self._element((by, value)).value = text
+                    statuses.append('ok')
+                except NoSuchElementException:
+                    statuses.append('missing')
+            return statuses
+        if script == _SNAPSHOT_SCRIPT:
+            return {'title': self.page['title'], 'url': self.current_url, 'ready_state': 'complete',
+                    'elements': {name: self._state((by, value)) for name, by, value in args[0]}}
+        if script == _COLLECT_METRICS_SCRIPT:
+            return self._metrics()
+        if script == _OPEN_TAB_SCRIPT:
+            handle = f'window-{self.calls["execute_script"]}'
+            self._windows[handle] = 'about:blank' if self.tab_load_polls else args[0]
+            self._elements[handle] = {}
+            if self.tab_load_polls:
+                self._loading_tabs[handle] = [args[0], self.tab_load_polls]
+            return True
+        if script == _NAVIGATE_SCRIPT:
+            if self.tab_load_polls:
+                self._loading_tabs[self.current_window_handle] = [args[0], self.tab_load_polls]
+            else:
+                self.get(args[0])
+            return None
+        if script == _PAGE_CHECK_SCRIPT:
+            loading_tab = self._loading_tabs.get(self.current_window_handle)
+            if loading_tab and loading_tab[1] == 0:
+                self.current_url = self._loading_tabs.pop(self.current_window_handle)[0]
+            elif loading_tab:
+                loading_tab[1] -= 1
+            if self.current_url == 'about:blank' and args[1] != 'about:blank':
+                return {'ready_state': 'loading'}
+            return {**self._metrics(), 'ready_state': 'complete', 'title': self.page['title']}
+        return None
+
+    def execute_async_script(self, script: str, *args):
+        self.calls['execute_async_script'] += 1
+        return True
+
+    def delete_all_cookies(self) -> None:
+        self.calls['delete_all_cookies'] += 1
+
+    def set_script_timeout(self, timeout: float) -> None:
+        self.timeouts.script = timeout
+
+    def get_screenshot_as_png(self) -> bytes:
+        self.calls['get_screenshot_as_png'] += 1
+        return b''
+
+    def close(self) -> None:
+        self.calls['close'] += 1
+        del self._windows[self.current_window_handle], self._elements[self.current_window_handle]
+        self._loading_tabs.pop(self.current_window_handle, None)
+
+    def quit(self) -> None:
+        self.calls['quit'] += 1
+
+    def _switch_to_window(self, handle: str) -> None:
+        self.calls['switch_to_window'] += 1
+        if handle not in self._windows:
+            raise NoSuchWindowException(f'No window with handle {handle}')
+        self.current_window_handle = handle
+
+    def _state(self, locator: tuple) -> dict:
+        try:
+            element = self._element(locator)
+        except NoSuchElementException:
+            return {'present': False, 'count': 0, 'visible': False, 'enabled': False, 'text': None, 'value': None}
+        return {'present': True, 'count': 1, 'visible': element.displayed, 'enabled': element.enabled,
+                'text': '' if element.tag_name == 'input' else element.value,
+                'value': element.value if element.tag_name == 'input' else None}
+
+    def _metrics(self) -> dict:
+        return {'url': self.current_url, 'ttfb_ms': 0.0, 'dom_content_loaded_ms': 0.0, 'load_ms': 0.0,
+                'transfer_size': 0, 'status': 200, 'resource_count': 0, 'resource_transfer_size': 0,
+                'slowest_resources': [], 'lcp_ms': None, 'cls': None}
+
+    def _element(self, locator: tuple) -> FakeWebElement:
+        elements = self._elements[self.current_window_handle]
+        element = elements.get(locator)
+        if element is None:
+            attributes = self.page['elements'].get(locator)
+            if attributes is None:
+                raise NoSuchElementException(f'Unable to locate element: {locator[0]}={locator[1]}')
+            element = elements[locator] = FakeWebElement(self, f'{locator[0]}={locator[1]}', **attributes)
+        return element
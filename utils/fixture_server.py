@@ -0,0 +1,295 @@
+import argparse
+import html
+import secrets
+import sys
+import threading
+from http.cookies import SimpleCookie
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from string import Template
+from urllib.parse import parse_qs, urlsplit
+from .config_reader import get_config
+from .logger import setup_logger
+
+_PROJECT_ROOT = Path(__file__).resolve().parent.parent
+_SESSION_COOKIE = 'PHPSESSID'
+
+_LAYOUT = Template("""<!doctype html>
+<html lang="en">
+<head><meta charset="utf-8"><title>$title</title></head>
+<body>
+<header class="page-header"><a class="logo" href="/">Luma</a></header>
+<main id="maincontent" class="page-main">
+<h1 class="page-title"><span class="base">$title</span></h1>
+$messages
+$content
+</main>
+</body>
+</html>
+""")
+
+_PAGES = {
+    'create': Template("""<form class="form create account form-create-account" action="/customer/account/createpost/"
+      method="post" id="form-validate">
+    <fieldset class="fieldset create info">
+        <input type="text" id="firstname" name="firstname" title="First Name" class="input-text">
+        <input type="text" id="lastname" name="lastname" title="Last Name" class="input-text">
+    </fieldset>
+    <fieldset class="fieldset create account">
+        <input type="email" name="email" id="email_address" title="Email" class="input-text">
+        <input type="password" name="password" id="password" title="Password" class="input-text">
+        <input type="password" name="password_confirmation" title="Confirm Password" id="password-confirmation"
+               class="input-text">
+    </fieldset>
+    <div class="actions-toolbar">
+        <button type="submit" class="action submit primary" title="Create an Account"><span>Create an Account</span>
+        </button>
+    </div>
+</form>"""),
+    'login': Template("""<form class="form form-login" action="/customer/account/loginPost/" method="post" id="login-form">
+    <fieldset class="fieldset login">
+        <input name="login[username]" type="email" id="email" class="input-text" title="Email">
+        <input name="login[password]" type="password" id="pass" class="input-text" title="Password">
+        <div class="actions-toolbar">
+            <button type="submit" class="action login primary" name="send" id="send2"><span>Sign In</span></button>
+        </div>
+    </fieldset>
+</form>"""),
+    'account': Template("""<div class="block block-dashboard-info">
+    <div class="box box-information">
+        <strong class="box-title"><span>Contact Information</span></strong>
+        <p class="box-content">$first_name $last_name<br>$email</p>
+    </div>
+</div>"""),
+}
+
+_TITLES = {
+    'create': 'Create New Customer Account',
+    'login': 'Customer Login',
+    'account': 'My Account',
+}
+
+
+class FixtureServer:
+    """
+    Local stand-in for the Magento customer pages, served from a background thread.
+
+    It serves the create account, login and "My Account" pages with the same element ids as the live site and
+    implements the create account and login form posts, keeping the accounts and sessions in memory. The pages
+    are templated; a recorded copy of a page can replace the template by putting ``<page>.html`` (``create``,
+    ``login`` or ``account``) in ``templates_dir``.
+
+    With ``auto_register`` a login with an unknown email creates the account, so the sign-in tests don't depend
+    on the sign-up test having run in the same process.
+    """
+
+    def __init__(self, host: str = '127.0.0.1', port: int = 0, templates_dir: str = None,
+                 auto_register: bool = True):
+        self.host = host
+        self.port = port
+        self.templates_dir = Path(templates_dir) if templates_dir else None
+        self.auto_register = auto_register
+        self.accounts = {}
+        self.sessions = {}
+        self.logger = setup_logger()
+        self._lock = threading.Lock()
+        self._server = None
+        self._thread = None
+
+    @property
+    def base_url(self) -> str:
+        return f'http://{self.host}:{self.port}'
+
+    def start(self) -> 'FixtureServer':
+        """
+        Starts serving on a daemon thread. With port 0 a free port is picked.
+
+        :return: The server itself, to chain with ``base_url``.
+        """
+        self.logger.info('********** %s() **********', self.start.__name__)
+        self._server = ThreadingHTTPServer((self.host, self.port), _make_handler(self))
+        self._server.daemon_threads = True
+        self.port = self._server.server_address[1]
+        self._thread = threading.Thread(target=self._server.serve_forever, name='fixture-server', daemon=True)
+        self._thread.start()
+        self.logger.info('The fixture server is serving the Magento pages on %s.', self.base_url)
+        return self
+
+    def stop(self) -> None:
+        """
+        Stops the server and waits for its thread.
+
+        :return: None.
+        """
+        if self._server is None:
+            return
+        self._server.shutdown()
+        self._server.server_close()
+        self._thread.join()
+        self._server = None
+        self.logger.info('The fixture server on %s stopped.', self.base_url)
+
+    def rewrite(self, url: str) -> str:
+        """
+        Points a live-site URL at the fixture server, keeping its path and query.
+
+        :param url: The URL, e.g. the "sign_in_page_url" of the config file.
+        :return: The URL on the fixture server.
+        """
+        parts = urlsplit(url)
+        return f'{self.base_url}{parts.path}' + (f'?{parts.query}' if parts.query else '')
+
+    def render(self, page: str, messages: str = '', **values) -> bytes:
+        escaped = {key: html.escape(str(value)) for key, value in values.items()}
+        recorded = self.templates_dir / f'{page}.html' if self.templates_dir else None
+        if recorded is not None and recorded.is_file():
+            return Template(recorded.read_text(encoding='utf-8')).safe_substitute(escaped).encode()
+        content = _PAGES[page].safe_substitute(escaped)
+        return _LAYOUT.substitute(title=_TITLES[page], messages=messages, content=content).encode()
+
+    def create_account(self, fields: dict):
+        """Registers an account from the create account form, returning an error message or None."""
+        email = fields.get('email', '').strip().lower()
+        password = fields.get('password', '')
+        if not all(fields.get(name) for name in ('firstname', 'lastname', 'email', 'password')):
+            return 'This is a required field.'
+        if password != fields.get('password_confirmation'):
+            return 'Please enter the same value again.'
+        with self._lock:
+            if email in self.accounts:
+                return 'There is already an account with this email address.'
+            self.accounts[email] = {'first_name': fields['firstname'], 'last_name': fields['lastname'],
+                                    'email': email, 'password': password}
+        return None
+
+    def authenticate(self, email: str, password: str):
+        """Returns the account matching the credentials (registering it with ``auto_register``), or None."""
+        email = email.strip().lower()
+        with self._lock:
+            account = self.accounts.get(email)
+            if account is None and self.auto_register and email and password:
+                local_part = email.split('@')[0]
+                account = self.accounts[email] = {'first_name': local_part, 'last_name': '', 'email': email,
+                                                  'password': password}
+        return account if account is not None and account['password'] == password else None
+
+    def open_session(self, email: str) -> str:
+        session_id = secrets.token_hex(16)
+        with self._lock:
+            self.sessions[session_id] = email
+        return session_id
+
+    def session_account(self, session_id: str):
+        with self._lock:
+            email = self.sessions.get(session_id)
+            return self.accounts.get(email) if email else None
+
+
+def _make_handler(server: FixtureServer):
+
+    class _Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def do_GET(self):
+            path = urlsplit(self.path).path.rstrip('/')
+            if path == '/customer/account/create':
+                self._send_page('create')
+            elif path == '/customer/account/login':
+                self._send_page('login')
+            elif path in ('/customer/account', '/customer/account/index'):
+                account = server.session_account(self._session_id())
+                if account is None:
+                    self._redirect('/customer/account/login/')
+                else:
+                    self._send_page('account', **account)
+            elif path == '':
+                self._redirect('/customer/account/login/')
+            else:
+                self._send(404, b'Not Found', 'text/plain')
+
+        def do_POST(self):
+            path = urlsplit(self.path).path.rstrip('/')
+            length = int(self.headers.get('Content-Length') or 0)
+            fields = {key: values[0] for key, values in parse_qs(self.rfile.read(length).decode()).items()}
+            if path == '/customer/account/createpost':
+                error = server.create_account(fields)
+                if error:
+                    self._send_page('create', messages=_error_message(error))
+                else:
+                    self._redirect('/customer/account/', server.open_session(fields['email'].strip().lower()))
+            elif path == '/customer/account/loginPost':
+                account = server.authenticate(fields.get('login[username]', ''), fields.get('login[password]', ''))
+                if account is None:
+                    self._send_page('login', messages=_error_message(
+                        'The account sign-in was incorrect or your account is disabled temporarily.'))
+                else:
+                    self._redirect('/customer/account/', server.open_session(account['email']))
+            else:
+                self._send(404, b'Not Found', 'text/plain')
+
+        def log_message(self, format, *args):
+            server.logger.debug('Fixture server: %s', format % args)
+
+        def _session_id(self):
+            cookie = SimpleCookie(self.headers.get('Cookie', ''))
+            return cookie[_SESSION_COOKIE].value if _SESSION_COOKIE in cookie else None
+
+        def _send_page(self, page, messages='', **values):
+            self._send(200, server.render(page, messages, **values), 'text/html; charset=UTF-8')
+
+        def _redirect(self, location, session_id=None):
+            headers = {'Location': location}
+            if session_id:
+                headers['Set-Cookie'] = f'{_SESSION_COOKIE}={session_id}; Path=/; HttpOnly; SameSite=Lax'
+            self._send(302, b'', 'text/plain', headers)
+
+        def _send(self, status, body, content_type, headers=None):
+            self.send_response(status)
+            self.send_header('Content-Type', content_type)
+            self.send_header('Content-Length', str(len(body)))
+            for name, value in (headers or {}).items():
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(body)
+
+    return _Handler
+
+
+def _error_message(text: str) -> str:
+    return f'<div class="messages"><div class="message-error error message"><div>{html.escape(text)}</div></div></div>'
+
+
+def create_fixture_server() -> FixtureServer:
+    """
+    Creates a fixture server configured by the "fixture_server" section of config.json.
+
+    :return: The (not yet started) FixtureServer instance.
+    """
+    settings = get_config().section('fixture_server')
+    templates_dir = settings.get('templates_dir')
+    return FixtureServer(
+        host=settings.get('host', '127.0.0.1'),
+        port=settings.get('port', 0),
+        templates_dir=_PROJECT_ROOT / templates_dir if templates_dir else None,
+        auto_register=settings.get('auto_register', True),
+    )
+
+
+def main(argv: list = None) -> int:
+    settings = get_config().section('fixture_server')
+    parser = argparse.ArgumentParser(description='Serve the local stand-in of the Magento customer pages.')
+    parser.add_argument('--host', default=settings.get('host', '127.0.0.1'))
+    parser.add_argument('--port', type=int, default=settings.get('port') or 8000)
+    parser.add_argument('--templates-dir', default=settings.get('templates_dir'))
+    args = parser.parse_args(argv)
+    server = FixtureServer(args.host, args.port, args.templates_dir, settings.get('auto_register', True)).start()
+    print(f'Serving the Magento customer pages on {server.base_url} (Ctrl+C to stop).')
+    try:
+        server._thread.join()
+    except KeyboardInterrupt:
+        server.stop()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
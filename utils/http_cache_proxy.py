@@ -0,0 +1,487 @@
+import argparse
+import hashlib
+import http.client
+import json
+import os
+import re
+import select
+import socket
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qsl, urlencode, urlsplit
+from .config_reader import get_config
+from .logger import setup_logger
+
+_PROJECT_ROOT = Path(__file__).resolve().parent.parent
+CACHE_MODES = ('off', 'record', 'replay')
+
+_HOP_BY_HOP_HEADERS = {'connection', 'keep-alive', 'proxy-authenticate', 'proxy-authorization', 'te', 'trailer',
+                       'transfer-encoding', 'upgrade', 'content-length', 'content-encoding', 'proxy-connection'}
+_TEXT_CONTENT_TYPES = ('text/', 'application/javascript', 'application/json', 'application/x-javascript',
+                       'image/svg+xml')
+_CACHEABLE_METHODS = ('GET', 'HEAD', 'POST')
+
+
+class ContentStore:
+    """
+    On-disk, content-addressed store of HTTP responses.
+
+    Bodies are stored once under ``objects/<sha256>`` however many requests return them, and each request key has
+    an entry under ``entries/`` with the status, the headers and the sha256 of its body. :meth:`evict` drops the
+    entries older than ``max_age_seconds``, then the least recently used ones until the store fits in
+    ``max_bytes``, and finally the bodies no entry references anymore.
+    """
+
+    def __init__(self, store_dir: str = None, max_age_seconds: float = 30 * 24 * 3600,
+                 max_bytes: int = 500 * 2 ** 20):
+        self.store_dir = Path(store_dir) if store_dir else _PROJECT_ROOT / '.http_cache'
+        self.max_age_seconds = max_age_seconds
+        self.max_bytes = max_bytes
+        self.logger = setup_logger()
+        self._lock = threading.Lock()
+
+    def get(self, key: str):
+        """
+        Returns the stored response of the request key.
+
+        :param key: The request key, see :func:`request_key`.
+        :return: A tuple (status, headers, body), or None on a miss.
+        """
+        entry_path = self._entry_path(key)
+        try:
+            with open(entry_path) as f:
+                entry = json.load(f)
+            body = self._object_path(entry['sha256']).read_bytes()
+        except (FileNotFoundError, ValueError, KeyError):
+            return None
+        os.utime(entry_path)
+        return entry['status'], entry['headers'], body
+
+    def put(self, key: str, url: str, status: int, headers: list, body: bytes) -> None:
+        """
+        Stores a response under the request key.
+
+        :param key: The request key, see :func:`request_key`.
+        :param url: The upstream URL (kept for inspection).
+        :param status: The HTTP status code.
+        :param headers: The response headers as a list of (name, value) pairs.
+        :param body: The response body.
+        :return: None.
+        """
+        digest = hashlib.sha256(body).hexdigest()
+        entry = {'url': url, 'status': status, 'headers': headers, 'sha256': digest, 'size': len(body),
+                 'stored_at': time.time()}
+        with self._lock:
+            object_path = self._object_path(digest)
+            if not object_path.exists():
+                _write_atomically(object_path, body)
+            _write_atomically(self._entry_path(key), json.dumps(entry).encode())
+
+    def evict(self) -> dict:
+        """
+        Evicts the expired entries, then the least recently used ones above the size limit, then the orphan bodies.
+
+        :return: A dictionary {entries, bytes, evicted_entries, evicted_objects} describing the store afterwards.
+        """
+        self.logger.info('********** %s() **********', self.evict.__name__)
+        with self._lock:
+            now = time.time()
+            entries = []
+            evicted_entries = 0
+            for entry_path in self.store_dir.glob('entries/*/*.json'):
+                try:
+                    with open(entry_path) as f:
+                        entry = json.load(f)
+                    last_access = entry_path.stat().st_mtime
+                except (OSError, ValueError):
+                    continue
+                if now - entry['stored_at'] > self.max_age_seconds:
+                    entry_path.unlink(missing_ok=True)
+                    evicted_entries += 1
+                else:
+                    entries.append((last_access, entry_path, entry))
+            entries.sort(key=lambda item: item[0], reverse=True)
+            referenced = set()
+            kept_entries = 0
+            total_bytes = 0
+            for last_access, entry_path, entry in entries:
+                added_bytes = 0 if entry['sha256'] in referenced else entry['size']
+                if total_bytes + added_bytes > self.max_bytes:
+                    entry_path.unlink(missing_ok=True)
+                    evicted_entries += 1
+                    continue
+                referenced.add(entry['sha256'])
+                kept_entries += 1
+                total_bytes += added_bytes
+            evicted_objects = 0
+            for object_path in self.store_dir.glob('objects/*/*'):
+                if object_path.name not in referenced:
+                    object_path.unlink(missing_ok=True)
+                    evicted_objects += 1
+        stats = {'entries': kept_entries, 'bytes': total_bytes, 'evicted_entries': evicted_entries,
+                 'evicted_objects': evicted_objects}
+        self.logger.info('HTTP cache eviction: %s', stats)
+        return stats
+
+    def _entry_path(self, key: str) -> Path:
+        return self.store_dir / 'entries' / key[:2] / f'{key}.json'
+
+    def _object_path(self, digest: str) -> Path:
+        return self.store_dir / 'objects' / digest[:2] / digest
+
+
+class CachingProxy:
+    """
+    Local record-and-replay proxy in front of the application.
+
+    The page URLs are rewritten to the proxy (see :meth:`rewrite`), which forwards the requests to the ``upstream``
+    origin and rewrites the absolute upstream URLs of text responses, redirects and cookies back to itself, so the
+    HTTPS pages and their resources are cached without intercepting TLS. The browser is also configured to use it
+    as its HTTP proxy (see :meth:`apply_to_options`): plain HTTP requests to other hosts go through it as well, and
+    HTTPS requests to other hosts are tunnelled untouched (refused in replay mode).
+
+    In "record" mode the GET/HEAD/POST responses of the ``hosts`` are fetched and stored in the content store. In
+    "replay" mode they are served from the store, after ``latency_ms`` of injected latency, and anything that
+    wasn't recorded gets a 504 instead of reaching the network.
+
+    A response is stored under the method, the URL, the form data and the cookies of its request (see
+    :meth:`key_of`), so the sign-up and sign-in forms replay their recorded outcome and the pages of a signed-in
+    customer don't answer the anonymous requests. The random ``ignore_form_fields`` (e.g. Magento's CSRF
+    "form_key") are left out, and only the names of the cookies count, except for the ``vary_cookies`` whose
+    value tells the customer contexts apart. The form flows only replay when they post the recorded data: record
+    and replay them with the same "test_data.seed" and "test_data.run_id".
+    """
+
+    def __init__(self, mode: str, upstream: str, store: ContentStore, hosts: tuple = (), latency_ms: float = 0,
+                 host: str = '127.0.0.1', port: int = 0, vary_cookies: tuple = ('X-Magento-Vary',),
+                 ignore_form_fields: tuple = ('form_key',)):
+        if mode not in CACHE_MODES[1:]:
+            raise ValueError(f'Unsupported HTTP cache mode: {mode}. Expected "record" or "replay".')
+        self.mode = mode
+        self.upstream = upstream.rstrip('/')
+        self.store = store
+        self.hosts = set(hosts) | {urlsplit(self.upstream).hostname}
+        self.latency_ms = latency_ms
+        self.host = host
+        self.port = port
+        self.vary_cookies = set(vary_cookies)
+        self.ignore_form_fields = set(ignore_form_fields)
+        self.logger = setup_logger()
+        self.counters = {'hits': 0, 'misses': 0, 'recorded': 0, 'passed_through': 0}
+        self._counters_lock = threading.Lock()
+        self._server = None
+        self._thread = None
+
+    @property
+    def base_url(self) -> str:
+        return f'http://{self.host}:{self.port}'
+
+    def start(self) -> 'CachingProxy':
+        """
+        Starts serving on a daemon thread. With port 0 a free port is picked.
+
+        :return: The proxy itself, to chain with ``base_url``.
+        """
+        self.logger.info('********** %s() **********', self.start.__name__)
+        self._server = ThreadingHTTPServer((self.host, self.port), _make_handler(self))
+        self._server.daemon_threads = True
+        self.port = self._server.server_address[1]
+        self._thread = threading.Thread(target=self._server.serve_forever, name='http-cache-proxy', daemon=True)
+        self._thread.start()
+        self.logger.info('The HTTP cache proxy (%s mode) for %s is listening on %s.', self.mode, self.upstream,
+                         self.base_url)
+        return self
+
+    def stop(self) -> None:
+        """
+        Stops the proxy and logs its hit/miss counters.
+
+        :return: None.
+        """
+        if self._server is None:
+            return
+        self._server.shutdown()
+        self._server.server_close()
+        self._thread.join()
+        self._server = None
+        self.logger.info('The HTTP cache proxy on %s stopped: %s', self.base_url, self.counters)
+
+    def rewrite(self, url: str) -> str:
+        """
+        Points an upstream URL at the proxy, keeping its path and query.
+
+        :param url: The URL, e.g. the "sign_in_page_url" of the config file.
+        :return: The URL on the proxy.
+        """
+        parts = urlsplit(url)
+        return f'{self.base_url}{parts.path}' + (f'?{parts.query}' if parts.query else '')
+
+    def apply_to_options(self, options, browser: str) -> None:
+        """
+        Routes the browser through the proxy.
+
+        :param options: The ChromeOptions, FirefoxOptions or EdgeOptions object.
+        :param browser: The browser type (e.g., 'chrome', 'firefox', 'edge').
+        :return: None.
+        """
+        if browser == 'firefox':
+            options.set_preference('network.proxy.type', 1)
+            for scheme in ('http', 'ssl'):
+                options.set_preference(f'network.proxy.{scheme}', self.host)
+                options.set_preference(f'network.proxy.{scheme}_port', self.port)
+        else:
+            options.add_argument(f'--proxy-server={self.base_url}')
+
+    def fetch(self, method: str, url: str, headers: list, body: bytes):
+        """
+        Returns the response of a request, from the store or from the network depending on the mode.
+
+        :param method: The HTTP method.
+        :param url: The absolute upstream URL.
+        :param headers: The request headers as a list of (name, value) pairs.
+        :param body: The request body.
+        :return: A tuple (status, headers, body).
+        """
+        cacheable = method in _CACHEABLE_METHODS and urlsplit(url).hostname in self.hosts
+        key = self.key_of(method, url, headers, body)
+        if self.mode == 'replay':
+            response = self.store.get(key) if cacheable else None
+            self._count('hits' if response else 'misses')
+            if response is None:
+                message = f'Not recorded: {method} {url}'
+                if method == 'POST':
+                    message += (' with this form data and these cookies. The form flows only replay the data they '
+                                'posted while recording: use the same "test_data.seed" and "test_data.run_id".')
+                self.logger.warning('HTTP cache miss in replay mode. %s', message)
+                return 504, [('Content-Type', 'text/plain')], message.encode()
+            if self.latency_ms:
+                time.sleep(self.latency_ms / 1000)
+            return response
+        response = _request_upstream(method, url, headers, body)
+        if cacheable and response[0] < 500:
+            self.store.put(key, url, *response)
+            self._count('recorded')
+        else:
+            self._count('passed_through')
+        return response
+
+    def key_of(self, method: str, url: str, headers: list, body: bytes) -> str:
+        """
+        Returns the key under which the response of a request is stored.
+
+        :param method: The HTTP method.
+        :param url: The absolute upstream URL.
+        :param headers: The request headers as a list of (name, value) pairs.
+        :param body: The request body.
+        :return: The request key, see :func:`request_key`.
+        """
+        content_type = ''
+        cookies = []
+        for name, value in headers:
+            if name.lower() == 'content-type':
+                content_type = value
+            elif name.lower() == 'cookie':
+                cookies.extend(cookie.strip().partition('=') for cookie in value.split(';') if cookie.strip())
+        if body and content_type.startswith('application/x-www-form-urlencoded'):
+            fields = parse_qsl(body.decode('utf-8', 'surrogateescape'), keep_blank_values=True)
+            body = urlencode([(name, value) for name, value in fields
+                              if name not in self.ignore_form_fields]).encode('utf-8', 'surrogateescape')
+        session = ';'.join(sorted(name + (f'={value}' if name in self.vary_cookies else '')
+                                  for name, _, value in cookies))
+        return request_key(method, url, body, session)
+
+    def _count(self, counter: str) -> None:
+        with self._counters_lock:
+            self.counters[counter] += 1
+
+
+def request_key(method: str, url: str, body: bytes = b'', session: str = '') -> str:
+    """Returns the key under which the response of a request is stored, see :meth:`CachingProxy.key_of`."""
+    request = f'{method} {url}\n{hashlib.sha256(body).hexdigest()}\n{session}'
+    return hashlib.sha256(request.encode('utf-8', 'surrogateescape')).hexdigest()
+
+
+def _request_upstream(method: str, url: str, headers: list, body: bytes):
+    parts = urlsplit(url)
+    connection_type = http.client.HTTPSConnection if parts.scheme == 'https' else http.client.HTTPConnection
+    connection = connection_type(parts.hostname, parts.port, timeout=30)
+    try:
+        path = (parts.path or '/') + (f'?{parts.query}' if parts.query else '')
+        request_headers = {name: value for name, value in headers if name.lower() not in _HOP_BY_HOP_HEADERS}
+        request_headers['Host'] = parts.netloc
+        request_headers['Accept-Encoding'] = 'identity'
+        connection.request(method, path, body=body or None, headers=request_headers)
+        response = connection.getresponse()
+        return response.status, response.getheaders(), response.read()
+    finally:
+        connection.close()
+
+
+def _write_atomically(path: Path, data: bytes) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    temp_path = path.with_name(f'{path.name}.{os.getpid()}.{threading.get_ident()}.tmp')
+    temp_path.write_bytes(data)
+    os.replace(temp_path, path)
+
+
+def _make_handler(proxy: CachingProxy):
+    upstream = proxy.upstream
+    escaped_upstream = upstream.replace('/', '\\/')
+
+    class _Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def do_CONNECT(self):
+            if proxy.mode == 'replay':
+                self.send_error(502, 'The HTTP cache proxy is in replay mode')
+                return
+            host, _, port = self.path.partition(':')
+            try:
+                upstream_socket = socket.create_connection((host, int(port or 443)), timeout=30)
+            except OSError as e:
+                self.send_error(502, str(e))
+                return
+            self.send_response(200, 'Connection Established')
+            self.end_headers()
+            proxy._count('passed_through')
+            _tunnel(self.connection, upstream_socket)
+            self.close_connection = True
+
+        def do_GET(self):
+            self._proxy()
+
+        do_HEAD = do_POST = do_PUT = do_DELETE = do_OPTIONS = do_PATCH = do_GET
+
+        def log_message(self, format, *args):
+            proxy.logger.debug('HTTP cache proxy: %s', format % args)
+
+        def _proxy(self):
+            reverse = not self.path.startswith(('http://', 'https://'))
+            url = f'{upstream}{self.path}' if reverse else self.path
+            length = int(self.headers.get('Content-Length') or 0)
+            body = self.rfile.read(length) if length else b''
+            headers = [(name, self._to_upstream(value) if reverse else value) for name, value in self.headers.items()]
+            try:
+                status, response_headers, response_body = proxy.fetch(self.command, url, headers, body)
+            except OSError as e:
+                proxy.logger.error('The HTTP cache proxy could not reach %s. Error: %s', url, e)
+                self.send_error(502, str(e))
+                return
+            content_type = next((value for name, value in response_headers if name.lower() == 'content-type'), '')
+            if reverse:
+                response_headers = [(name, self._from_upstream_header(name, value)) for name, value in response_headers]
+                if content_type.startswith(_TEXT_CONTENT_TYPES):
+                    response_body = self._from_upstream(response_body.decode('utf-8', 'surrogateescape')) \
+                        .encode('utf-8', 'surrogateescape')
+            self.send_response(status)
+            for name, value in response_headers:
+                if name.lower() not in _HOP_BY_HOP_HEADERS:
+                    self.send_header(name, value)
+            self.send_header('Content-Length', str(len(response_body)))
+            self.end_headers()
+            if self.command != 'HEAD':
+                self.wfile.write(response_body)
+
+        @staticmethod
+        def _to_upstream(value: str) -> str:
+            return value.replace(proxy.base_url, upstream)
+
+        @staticmethod
+        def _from_upstream(text: str) -> str:
+            return text.replace(upstream, proxy.base_url).replace(escaped_upstream, proxy.base_url.replace('/', '\\/'))
+
+        def _from_upstream_header(self, name: str, value: str) -> str:
+            if name.lower() == 'location':
+                return self._from_upstream(value)
+            if name.lower() == 'set-cookie':
+                return re.sub(r';\s*(domain=[^;]*|secure)(?=;|$)', '', value, flags=re.IGNORECASE)
+            return value
+
+    return _Handler
+
+
+def _tunnel(client_socket, upstream_socket) -> None:
+    sockets = [client_socket, upstream_socket]
+    try:
+        while True:
+            readable, _, errored = select.select(sockets, [], sockets, 60)
+            if errored or not readable:
+                return
+            for source in readable:
+                data = source.recv(65536)
+                if not data:
+                    return
+                (upstream_socket if source is client_socket else client_socket).sendall(data)
+    except OSError:
+        return
+    finally:
+        upstream_socket.close()
+
+
+def create_caching_proxy(mode: str = None, port: int = None):
+    """
+    Creates the caching proxy configured by the "http_cache" section of config.json.
+
+    :param mode: "record" or "replay", overriding "http_cache.mode".
+    :param port: The port to listen on, overriding "http_cache.port".
+    :return: The (not yet started) CachingProxy instance, or None when the mode is "off".
+    """
+    config = get_config()
+    settings = config.section('http_cache')
+    mode = mode or settings.get('mode', 'off')
+    if mode == 'off':
+        return None
+    upstream = urlsplit(settings.get('upstream') or config.sign_in_page_url)
+    return CachingProxy(
+        mode=mode,
+        upstream=f'{upstream.scheme}://{upstream.netloc}',
+        store=get_content_store(),
+        hosts=tuple(settings.get('hosts') or ()),
+        latency_ms=settings.get('latency_ms', 0),
+        host=settings.get('host', '127.0.0.1'),
+        port=settings.get('port', 0) if port is None else port,
+        vary_cookies=tuple(settings.get('vary_cookies', ('X-Magento-Vary',))),
+        ignore_form_fields=tuple(settings.get('ignore_form_fields', ('form_key',))),
+    )
+
+
+def get_content_store() -> ContentStore:
+    """
+    Creates the content store configured by the "http_cache" section of config.json.
+
+    :return: The ContentStore instance.
+    """
+    settings = get_config().section('http_cache')
+    store_dir = settings.get('dir')
+    return ContentStore(
+        store_dir=_PROJECT_ROOT / store_dir if store_dir else None,
+        max_age_seconds=settings.get('max_age_hours', 720) * 3600,
+        max_bytes=int(settings.get('max_mb', 500) * 2 ** 20),
+    )
+
+
+def main(argv: list = None) -> int:
+    parser = argparse.ArgumentParser(description='Record-and-replay HTTP cache proxy.')
+    subcommands = parser.add_subparsers(dest='command', required=True)
+    serve = subcommands.add_parser('serve', help='run the proxy in record or replay mode until interrupted')
+    serve.add_argument('--mode', choices=CACHE_MODES[1:], default='record')
+    serve.add_argument('--port', type=int, default=8080)
+    subcommands.add_parser('evict', help='evict the expired and least recently used responses')
+    args = parser.parse_args(argv)
+    if args.command == 'evict':
+        print(json.dumps(get_content_store().evict()))
+        return 0
+    proxy = create_caching_proxy(args.mode, args.port).start()
+    print(f'Proxying {proxy.upstream} on {proxy.base_url} in {proxy.mode} mode (Ctrl+C to stop).')
+    try:
+        proxy._thread.join()
+    except KeyboardInterrupt:
+        proxy.stop()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,14 +1,58 @@
+import atexit
 import os
 import logging
+import numbers
+import queue
 from datetime import datetime
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler, TimedRotatingFileHandler
+from .config_reader import get_config
 
+_DEFAULT_LOG_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'logs')
 
-def setup_logger(log_level=logging.INFO, log_dir='D:\\Projects\\PythonProjects\\selenium_automation_framework\\logs'):
+_listener = None
+
+
+# immutable values a record can keep as arguments; numbers.Number covers Decimal, Fraction and numpy scalars
+_IMMUTABLE_TYPES = (str, bytes, bool, numbers.Number, type(None))
+
+
+class _LazyQueueHandler(QueueHandler):
+    """
+    QueueHandler that enqueues the record without formatting it, so that the message is formatted on the listener
+    thread instead of the calling thread.
+
+    That's only done when every argument is immutable (numbers, strings, tuples of them). Otherwise (e.g., a
+    dictionary or a list the caller mutates afterwards) the message is formatted on the calling thread, so it shows
+    the arguments as they were when they were logged, with the placeholders of the format string (%d, %.2f, ...).
+    """
+
+    def prepare(self, record):
+        args = record.args.values() if isinstance(record.args, dict) else record.args or ()
+        if not all(_is_immutable(arg) for arg in args):
+            record.msg = record.getMessage()
+            record.args = None
+        return record
+
+
+def _is_immutable(value) -> bool:
+    if isinstance(value, tuple):
+        return all(isinstance(item, _IMMUTABLE_TYPES) for item in value)
+    return isinstance(value, _IMMUTABLE_TYPES)
+
+
+def setup_logger(log_level=logging.INFO, log_dir=None, non_blocking=None, rotation=None):
     """
     Sets up a logger with both console and file handlers.
 
+    In non-blocking mode the records are handed to a queue and written by a background QueueListener, so the
+    calling thread neither formats nor writes them. The file handler rotates by size or time. The console handler
+    can be turned off with "logging.console" (e.g., for the benchmarks). When "logging.structured.enabled" is on,
+    the records and step timings also go to the JSON-lines sink of ``utils/structured_log.py``.
+
     :param log_level: Logging level (e.g., logging.INFO).
-    :param log_dir: Directory where log files will be stored.
+    :param log_dir: Directory where log files will be stored (default is "logging.dir" in config.json or logs/).
+    :param non_blocking: Whether to write the records from a background thread (default is "logging.non_blocking").
+    :param rotation: Rotation of the log file, "size" or "time" (default is "logging.rotation").
     :return: Configured logger instance.
     """
     logger = logging.getLogger()
@@ -16,6 +60,10 @@ def setup_logger(log_level=logging.INFO, log_dir='D:\\Projects\\PythonProjects\\
     # to prevent multiple handlers from being added to the logger
     if not logger.hasHandlers():
         logger.setLevel(log_level)
+        settings = get_config().section('logging')
+        log_dir = log_dir or settings.get('dir') or _DEFAULT_LOG_DIR
+        non_blocking = settings.get('non_blocking', False) if non_blocking is None else non_blocking
+        rotation = rotation or settings.get('rotation', 'size')
 
         os.makedirs(log_dir, exist_ok=True)
 
@@ -29,13 +77,59 @@ def setup_logger(log_level=logging.INFO, log_dir='D:\\Projects\\PythonProjects\\
         console_handler.setFormatter(console_formatter)
 
         # File Handler
-        file_handler = logging.FileHandler(log_file, mode='a')
+        if rotation == 'time':
+            file_handler = TimedRotatingFileHandler(log_file, when=settings.get('when', 'midnight'),
+                                                    backupCount=settings.get('backup_count', 7))
+        else:
+            file_handler = RotatingFileHandler(log_file, mode='a', maxBytes=settings.get('max_bytes', 10 * 1024 ** 2),
+                                               backupCount=settings.get('backup_count', 7))
         file_handler.setLevel(log_level)
         file_formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
         file_handler.setFormatter(file_formatter)
 
         # Add Handlers
-        logger.addHandler(console_handler)
-        logger.addHandler(file_handler)
+        handlers = [console_handler, file_handler] if settings.get('console', True) else [file_handler]
+        structured_handler = None
+        if (settings.get('structured') or {}).get('enabled'):
+            # imported on demand, the structured sink is off by default
+            from .structured_log import attach_step_context, create_structured_handler, exclude_steps
+            structured_handler = create_structured_handler(log_dir)
+            for handler in handlers:
+                handler.addFilter(exclude_steps)
+            handlers.append(structured_handler)
+        if non_blocking:
+            entry_handler = _start_listener(logger, *handlers)
+        else:
+            for handler in handlers:
+                logger.addHandler(handler)
+            entry_handler = structured_handler
+        if structured_handler is not None:
+            attach_step_context(entry_handler)
 
     return logger
+
+
+def _start_listener(logger, *handlers):
+    global _listener
+    log_queue = queue.SimpleQueue()
+    queue_handler = _LazyQueueHandler(log_queue)
+    logger.addHandler(queue_handler)
+    _listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+    _listener.start()
+    atexit.register(stop_logging)
+    return queue_handler
+
+
+def stop_logging():
+    """
+    Flushes the pending records of the non-blocking mode, stops its background thread and closes its handlers
+    (nothing else references them, so they wouldn't be closed at exit otherwise).
+
+    :return: None.
+    """
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        for handler in _listener.handlers:
+            handler.close()
+        _listener = None
@@ -0,0 +1,237 @@
+"""
+Parallel cross-browser execution engine.
+
+Fans the collected tests out across a pool of pytest worker processes. Every worker owns a single browser type
+(passed through the LUMA_BROWSER environment variable) and therefore its own session driver pool. The tests of a
+browser are packed into its workers by their historical duration, longest first, keeping the test classes and
+their ``depends_on`` dependencies together. Once all workers finished, their JUnit results and output logs are
+merged into one report.
+
+Usage::
+
+    python -m utils.parallel_runner --browsers chrome firefox edge --workers-per-browser 2 --headless
+    python -m utils.parallel_runner --browsers chrome --remote-url http://localhost:4444/wd/hub -- -k sign_in
+    python -m utils.parallel_runner --browsers chrome --workers-per-browser 3 --changed-since origin/main
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+import xml.etree.ElementTree as ET
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from .config_reader import get_config
+from .logger import setup_logger
+from .test_history import get_test_history
+from .test_impact import schedule
+
+logger = setup_logger()
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+
+
+class WorkerResult:
+    """Outcome of a single pytest worker process."""
+
+    def __init__(self, worker_id: str, browser: str, node_ids: list, return_code: int, duration: float,
+                 junit_path: Path, output_path: Path):
+        self.worker_id = worker_id
+        self.browser = browser
+        self.node_ids = node_ids
+        self.return_code = return_code
+        self.duration = duration
+        self.junit_path = junit_path
+        self.output_path = output_path
+
+    def counts(self) -> dict:
+        """
+        Reads the test counters from the JUnit report of the worker.
+
+        :return: A dictionary with the number of tests, failures, errors and skipped tests.
+        """
+        counts = {'tests': 0, 'failures': 0, 'errors': 0, 'skipped': 0}
+        if not self.junit_path.exists():
+            return counts
+        root = ET.parse(self.junit_path).getroot()
+        suites = [root] if root.tag == 'testsuite' else root.findall('testsuite')
+        for suite in suites:
+            for key in counts:
+                counts[key] += int(suite.get(key, 0))
+        return counts
+
+
+def collect_test_plan(pytest_args: list = None) -> dict:
+    """
+    Collects the tests and their declared dependencies without running them.
+
+    :param pytest_args: Extra pytest arguments used for selection (e.g., -k, -m or --changed-since).
+    :return: A dictionary {tests: [node ids in collection order], dependencies: {node id: [node ids]}}.
+    :raises RuntimeError: If the collection failed.
+    """
+    logger.info('********** %s() **********', collect_test_plan.__name__)
+    with tempfile.TemporaryDirectory() as plan_dir:
+        plan_path = Path(plan_dir) / 'test_plan.json'
+        command = [sys.executable, '-m', 'pytest', '--collect-only', '-q', '-p', 'no:cacheprovider',
+                   '-o', 'addopts=', f'--test-plan={plan_path}', *(pytest_args or [])]
+        completed = subprocess.run(command, cwd=PROJECT_ROOT, capture_output=True, text=True)
+        if completed.returncode not in (0, 5) or not plan_path.exists():
+            raise RuntimeError(f'Test collection failed:\n{completed.stdout}\n{completed.stderr}')
+        with open(plan_path) as f:
+            test_plan = json.load(f)
+    logger.info('Collected %s tests.', len(test_plan['tests']))
+    return test_plan
+
+
+def run_worker(worker_id: str, browser: str, node_ids: list, report_dir: Path, headless: bool = False,
+               remote_url: str = None, pytest_args: list = None, run_id: str = None) -> WorkerResult:
+    """
+    Runs one pytest worker process for a bin of tests on a single browser.
+
+    :param worker_id: Unique identifier of the worker (e.g., ``chrome-0``).
+    :param browser: The browser type owned by the worker.
+    :param node_ids: The tests the worker must run, in running order.
+    :param report_dir: Directory of the merged report. The worker writes into its own sub-directory.
+    :param headless: Whether the worker starts its browsers in headless mode.
+    :param remote_url: Optional WebDriver hub URL.
+    :param pytest_args: Extra pytest arguments.
+    :param run_id: Identifier shared by every worker of the run (e.g., to keep generated emails unique).
+    :return: The result of the worker.
+    """
+    logger.info('Starting worker %s (%s) with %s tests.', worker_id, browser, len(node_ids))
+    worker_dir = report_dir / 'workers' / worker_id
+    worker_dir.mkdir(parents=True, exist_ok=True)
+    junit_path = worker_dir / 'junit.xml'
+    output_path = worker_dir / 'output.log'
+    env = dict(os.environ, LUMA_BROWSER=browser, LUMA_WORKER_ID=worker_id,
+               LUMA_LOGGING__DIR=str(worker_dir / 'logs'))
+    if run_id:
+        env['LUMA_RUN_ID'] = run_id
+    if headless:
+        env['LUMA_HEADLESS'] = '1'
+    if remote_url:
+        env['LUMA_REMOTE_URL'] = remote_url
+    command = [sys.executable, '-m', 'pytest', '-p', 'no:cacheprovider', f'--junitxml={junit_path}',
+               f'--html={worker_dir / "report.html"}', *(pytest_args or []), *node_ids]
+    started = time.perf_counter()
+    with open(output_path, 'w') as output:
+        completed = subprocess.run(command, cwd=PROJECT_ROOT, env=env, stdout=output, stderr=subprocess.STDOUT)
+    duration = time.perf_counter() - started
+    logger.info('Worker %s finished in %.1fs with exit code %s.', worker_id, duration, completed.returncode)
+    return WorkerResult(worker_id, browser, node_ids, completed.returncode, duration, junit_path, output_path)
+
+
+def merge_results(results: list, report_dir: Path) -> dict:
+    """
+    Merges the per-worker JUnit reports and output logs into one report.
+
+    :param results: The results of all workers.
+    :param report_dir: Directory where the merged ``junit.xml``, ``output.log`` and ``summary.json`` are written.
+    :return: The summary dictionary.
+    """
+    logger.info('********** %s() **********', merge_results.__name__)
+    merged = ET.Element('testsuites')
+    with open(report_dir / 'output.log', 'w') as merged_output:
+        for result in sorted(results, key=lambda item: item.worker_id):
+            if result.junit_path.exists():
+                root = ET.parse(result.junit_path).getroot()
+                for suite in ([root] if root.tag == 'testsuite' else root.findall('testsuite')):
+                    suite.set('name', result.worker_id)
+                    suite.set('hostname', result.browser)
+                    merged.append(suite)
+            if result.output_path.exists():
+                with open(result.output_path) as worker_output:
+                    for line in worker_output:
+                        merged_output.write(f'[{result.worker_id}] {line}')
+    ET.ElementTree(merged).write(report_dir / 'junit.xml', encoding='utf-8', xml_declaration=True)
+    workers = []
+    for result in results:
+        workers.append({
+            'worker_id': result.worker_id,
+            'browser': result.browser,
+            'node_ids': result.node_ids,
+            'return_code': result.return_code,
+            'duration_s': round(result.duration, 2),
+            **result.counts(),
+        })
+    summary = {
+        'workers': workers,
+        'tests': sum(worker['tests'] for worker in workers),
+        'failures': sum(worker['failures'] for worker in workers),
+        'errors': sum(worker['errors'] for worker in workers),
+        'skipped': sum(worker['skipped'] for worker in workers),
+        'passed': all(worker['return_code'] in (0, 5) for worker in workers),
+    }
+    with open(report_dir / 'summary.json', 'w') as f:
+        json.dump(summary, f, indent=2)
+    return summary
+
+
+def run_parallel(browsers: list, workers_per_browser: int = 1, max_processes: int = None, headless: bool = False,
+                 remote_url: str = None, report_dir: str = 'reports/parallel', pytest_args: list = None,
+                 changed_since: str = None) -> dict:
+    """
+    Runs the tests on every browser, packing each browser's run into several worker processes by duration.
+
+    :param browsers: The browser types of the matrix (e.g., ['chrome', 'firefox', 'edge']).
+    :param workers_per_browser: Number of worker processes (and driver pools) per browser.
+    :param max_processes: Maximum number of concurrently running workers (default is all of them).
+    :param headless: Whether the workers start their browsers in headless mode.
+    :param remote_url: Optional WebDriver hub URL shared by every worker.
+    :param report_dir: Directory of the merged report, relative to the project root.
+    :param pytest_args: Extra pytest arguments.
+    :param changed_since: Only run the tests affected by the changes since this git revision.
+    :return: The merged summary.
+    """
+    logger.info('********** %s() **********', run_parallel.__name__)
+    report_path = (PROJECT_ROOT / report_dir).resolve()
+    report_path.mkdir(parents=True, exist_ok=True)
+    selection_args = ['--changed-since', changed_since] if changed_since else []
+    test_plan = collect_test_plan([*(pytest_args or []), *selection_args])
+    bins = schedule(test_plan['tests'], get_test_history().durations(), workers_per_browser,
+                    test_plan['dependencies'], get_config().section('test_impact').get('default_duration'))
+    jobs = []
+    for browser in browsers:
+        for index, node_ids in enumerate(bins):
+            jobs.append((f'{browser}-{index}', browser.lower(), node_ids))
+    if not jobs:
+        logger.warning('No tests were collected, nothing to run.')
+        return merge_results([], report_path)
+    run_id = get_config().run_id or uuid.uuid4().hex[:8]
+    with ThreadPoolExecutor(max_workers=max_processes or len(jobs)) as executor:
+        futures = [executor.submit(run_worker, worker_id, browser, node_ids, report_path, headless, remote_url,
+                                   pytest_args, run_id)
+                   for worker_id, browser, node_ids in jobs]
+        results = [future.result() for future in futures]
+    summary = merge_results(results, report_path)
+    logger.info('Parallel run finished: %s tests, %s failures, %s errors. Report: %s', summary['tests'],
+                summary['failures'], summary['errors'], report_path)
+    return summary
+
+
+def main(argv: list = None) -> int:
+    config = get_config()
+    settings = config.parallel
+    parser = argparse.ArgumentParser(description='Run the tests in parallel across browsers.')
+    parser.add_argument('--browsers', nargs='+', default=list(settings.browsers))
+    parser.add_argument('--workers-per-browser', type=int, default=settings.workers_per_browser)
+    parser.add_argument('--max-processes', type=int, default=settings.max_processes)
+    parser.add_argument('--headless', action='store_true', default=config.headless)
+    parser.add_argument('--remote-url', default=config.remote_url)
+    parser.add_argument('--report-dir', default=settings.report_dir)
+    parser.add_argument('--changed-since', metavar='REF', default=None,
+                        help='only run the tests affected by the changes since this git revision')
+    parser.add_argument('pytest_args', nargs=argparse.REMAINDER,
+                        help='extra pytest arguments, separated from the runner options by "--"')
+    args = parser.parse_args(argv)
+    pytest_args = [arg for arg in args.pytest_args if arg != '--']
+    summary = run_parallel(args.browsers, args.workers_per_browser, args.max_processes, args.headless,
+                           args.remote_url, args.report_dir, pytest_args, args.changed_since)
+    return 0 if summary['passed'] else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,10 +1,31 @@
-from faker import Faker
+import itertools
+import re
+import threading
+import uuid
+from collections import deque
+from functools import lru_cache
+from typing import TYPE_CHECKING
+from .config_reader import get_config
+
+if TYPE_CHECKING:
+    from faker import Faker
+
+
+@lru_cache(maxsize=None)
+def _get_faker(locale: str, seed: int = None) -> 'Faker':
+    """Builds a Faker (and loads its providers) once per locale and seed."""
+    # Faker is only imported once test data is needed, it's one of the slowest imports of the suite
+    from faker import Faker
+    faker = Faker(locale)
+    if seed is not None:
+        faker.seed_instance(seed)
+    return faker
 
 
 class RandomDataGenerator:
 
-    def __init__(self, locale: str = 'en_US'):
-        self.faker = Faker(locale)
+    def __init__(self, locale: str = 'en_US', seed: int = None):
+        self.faker = _get_faker(locale, seed)
 
     def generate_random_first_name(self) -> str:
         """Generates a random first name."""
@@ -38,3 +59,92 @@ class RandomDataGenerator:
         :return: A randomly generated password.
         """
         return self.faker.password(length=length, special_chars=special_chars, upper_case=upper_case, digits=digits)
+
+
+class UserDataFactory:
+    """
+    Pool of pre-generated users (first name, last name, email, password).
+
+    Users are generated in batches of ``batch_size`` from a shared Faker. Emails are made unique across
+    parallel workers and runs by embedding the run id, the worker id and a per-process counter into the local
+    part. With a ``seed`` (and a fixed ``run_id``) every run produces the same users.
+    """
+
+    def __init__(self, locale: str = 'en_US', seed: int = None, batch_size: int = 50, run_id: str = None,
+                 worker_id: str = None, email_domain: str = 'example.com'):
+        self.generator = RandomDataGenerator(locale, seed)
+        if seed is not None:
+            # restart the sequence of the shared seeded Faker so that every factory yields the same users
+            self.generator.faker.seed_instance(seed)
+        self.batch_size = max(1, batch_size)
+        self.run_id = run_id or get_config().run_id or uuid.uuid4().hex[:8]
+        self.worker_id = worker_id or get_config().worker_id
+        self.email_domain = email_domain
+        self._counter = itertools.count(1)
+        self._pool = deque()
+        self._lock = threading.Lock()
+
+    def next_user(self) -> dict:
+        """
+        Returns the next user of the pool, generating a new batch when the pool is empty.
+
+        :return: A dictionary with the first_name, last_name, email and password of the user.
+        """
+        with self._lock:
+            if not self._pool:
+                self._pool.extend(self._generate(self.batch_size))
+            return self._pool.popleft()
+
+    def generate_users(self, count: int) -> list:
+        """
+        Generates ``count`` users at once, bypassing the pool.
+
+        :param count: Number of users to generate.
+        :return: A list of user dictionaries.
+        """
+        with self._lock:
+            return self._generate(count)
+
+    def _generate(self, count: int) -> list:
+        users = []
+        for _ in range(count):
+            first_name = self.generator.generate_random_first_name()
+            last_name = self.generator.generate_random_last_name()
+            local_part = _email_local_part(first_name, last_name)
+            users.append({
+                'first_name': first_name,
+                'last_name': last_name,
+                'email': f'{local_part}.{self.run_id}.{self.worker_id}.{next(self._counter)}@{self.email_domain}',
+                'password': self.generator.generate_random_password(),
+            })
+        return users
+
+
+def _email_local_part(first_name: str, last_name: str) -> str:
+    """Returns "first.last" transliterated to ASCII (e.g. for ru_RU or ja_JP names), or "user" if nothing is left."""
+    # the transliteration tables of Faker, which is already loaded to generate the names
+    from faker.decode import unidecode
+    local_part = re.sub(r'[^a-z0-9.]', '', unidecode(f'{first_name}.{last_name}').lower())
+    return re.sub(r'\.{2,}', '.', local_part).strip('.') or 'user'
+
+
+_shared_factory = None
+
+
+def get_user_factory() -> UserDataFactory:
+    """
+    Returns the process-wide user factory, configured by the "test_data" section of config.json.
+
+    :return: The shared UserDataFactory instance.
+    """
+    global _shared_factory
+    if _shared_factory is None:
+        settings = get_config().section('test_data')
+        _shared_factory = UserDataFactory(
+            locale=settings.get('locale', 'en_US'),
+            seed=settings.get('seed'),
+            batch_size=settings.get('batch_size', 50),
+            run_id=get_config().run_id,
+            email_domain=settings.get('email_domain', 'example.com'),
+        )
+    return _shared_factory
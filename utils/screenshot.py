@@ -0,0 +1,201 @@
+import hashlib
+import io
+import itertools
+import re
+import threading
+import uuid
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from selenium.common.exceptions import WebDriverException
+from .config_reader import get_config
+from .logger import setup_logger
+
+_PROJECT_ROOT = Path(__file__).resolve().parent.parent
+
+CAPTURE_MODES = ('always', 'on-failure', 'on-step', 'never')
+
+
+class ScreenshotManager:
+    """
+    Screenshot subsystem: the PNG bytes are grabbed on the test thread, while hashing, re-encoding and writing
+    happen on a background thread pool.
+
+    Frames whose perceptual hash (dHash) is within ``hash_distance`` bits of the previous frame of the same test
+    are skipped, in the order they were captured whichever worker hashes them first. Re-encoding to WebP/JPEG
+    and the perceptual hash need Pillow; without it the screenshots are written as PNG and only byte-identical
+    frames are skipped.
+
+    Files are written to ``<dir>/<run id>/<worker id>/<test>/<sequence>_<label>.<ext>``, so parallel workers
+    never collide.
+    """
+
+    def __init__(self, output_dir: str = None, mode: str = 'on-failure', image_format: str = 'png',
+                 quality: int = 80, dedupe: bool = True, hash_distance: int = 4, max_workers: int = 2,
+                 run_id: str = None):
+        if mode not in CAPTURE_MODES:
+            raise ValueError(f'Unsupported screenshot mode: {mode}. Expected one of {CAPTURE_MODES}.')
+        self.output_dir = Path(output_dir) if output_dir else _PROJECT_ROOT / 'screenshots'
+        self.mode = mode
+        self.image_format = image_format.lower()
+        self.quality = quality
+        self.dedupe = dedupe
+        self.hash_distance = hash_distance
+        self.run_id = run_id or get_config().run_id or uuid.uuid4().hex[:8]
+        self.worker_id = get_config().worker_id
+        self.logger = setup_logger()
+        self.skipped = 0
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='screenshot')
+        self._sequence = itertools.count(1)
+        # the (hash, saved path) futures of the last frame of each test
+        self._last_frames = {}
+        self._lock = threading.Lock()
+
+    def capture(self, driver, test: str = None, label: str = 'screenshot', output_dir: str = None,
+                wait: bool = False):
+        """
+        Grabs a screenshot and hands the encoding and writing to the background pool.
+
+        :param driver: The WebDriver instance.
+        :param test: The test node id the screenshot belongs to.
+        :param label: A short label added to the file name (e.g., "failure" or the step name).
+        :param output_dir: Directory overriding the configured one.
+        :param wait: Whether to wait for the screenshot to be written, e.g. to link it from a report.
+        :return: Without ``wait``, the path the screenshot will be written to (unless it's skipped as a duplicate).
+                 With ``wait``, the file showing the frame: its own path, or the path of the previous frame of the
+                 test when it was skipped as a duplicate. None if the screenshot couldn't be taken or written.
+        """
+        try:
+            png_bytes = driver.get_screenshot_as_png()
+        except WebDriverException as e:
+            self.logger.error('An error occurred while trying to take the screenshot. Error: %s', e)
+            return None
+        extension = 'jpg' if self.image_format == 'jpeg' else self.image_format
+        if extension != 'png' and _load_pillow() is None:
+            extension = 'png'
+        directory = (Path(output_dir) if output_dir else self.output_dir / self.run_id / self.worker_id /
+                     _sanitize(test or 'session'))
+        path = directory / f'{next(self._sequence):04d}_{_sanitize(label)}.{extension}'
+        frame = (Future(), Future())
+        with self._lock:
+            previous_frame = self._last_frames.get(test)
+            self._last_frames[test] = frame
+        self._executor.submit(self._write, png_bytes, previous_frame, frame, path)
+        return frame[1].result() if wait else path
+
+    def shutdown(self) -> None:
+        """
+        Waits for the pending screenshots to be written.
+
+        :return: None.
+        """
+        self._executor.shutdown(wait=True)
+        if self.skipped:
+            self.logger.info('%s near-identical screenshots were skipped.', self.skipped)
+
+    def _write(self, png_bytes: bytes, previous_frame: tuple, frame: tuple, path: Path) -> None:
+        """
+        Hashes a frame, publishes its hash for the next frame of the test, and writes it unless it's a duplicate of
+        the previous frame, whose hash may still be computed by another worker. The saved path of the frame is
+        published last: its own path, the previous frame's one for a duplicate, or None when it wasn't written.
+        """
+        frame_hash, saved_path = frame
+        previous_hash, previous_path = previous_frame or (None, None)
+        try:
+            pillow = _load_pillow()
+            image = pillow.open(io.BytesIO(png_bytes)) if pillow else None
+            frame_hash.set_result(_dhash(image) if image is not None else
+                                  int(hashlib.sha1(png_bytes).hexdigest(), 16))
+        except Exception as e:
+            # the next frame of the test can't be compared with this one, but must not wait for it
+            frame_hash.set_result(None)
+            saved_path.set_result(None)
+            self.logger.error('An error occurred while trying to read the screenshot %s. Error: %s', path, e)
+            return
+        written = None
+        try:
+            # the previous frame was submitted first, so it's hashed or being hashed: this never waits for long
+            previous = previous_hash.result() if self.dedupe and previous_hash is not None else None
+            if previous is not None:
+                if image is not None:
+                    duplicate = bin(frame_hash.result() ^ previous).count('1') <= self.hash_distance
+                else:
+                    duplicate = frame_hash.result() == previous
+                if duplicate:
+                    with self._lock:
+                        self.skipped += 1
+                    written = previous_path.result()
+                    return
+            path.parent.mkdir(parents=True, exist_ok=True)
+            if path.suffix == '.png' or image is None:
+                path.write_bytes(png_bytes)
+            else:
+                image = image.convert('RGB') if path.suffix == '.jpg' else image
+                image.save(path, quality=self.quality)
+            written = path
+            self.logger.info('The screenshot was saved successfully at: %s.', path)
+        except Exception as e:
+            self.logger.error('An error occurred while trying to save the screenshot %s. Error: %s', path, e)
+        finally:
+            saved_path.set_result(written)
+
+
+def _load_pillow():
+    try:
+        from PIL import Image
+        return Image
+    except ImportError:
+        return None
+
+
+def _dhash(image, size: int = 8) -> int:
+    """Difference hash: compares adjacent pixels of a (size + 1) x size grayscale thumbnail."""
+    pixels = list(image.convert('L').resize((size + 1, size)).getdata())
+    value = 0
+    for row in range(size):
+        for column in range(size):
+            left = pixels[row * (size + 1) + column]
+            right = pixels[row * (size + 1) + column + 1]
+            value = (value << 1) | (left > right)
+    return value
+
+
+def _sanitize(name: str) -> str:
+    return re.sub(r'[^A-Za-z0-9_.-]+', '_', name).strip('_')[:120] or 'screenshot'
+
+
+_shared_manager = None
+
+
+def get_screenshot_manager() -> ScreenshotManager:
+    """
+    Returns the process-wide screenshot manager, configured by the "screenshots" section of config.json.
+
+    :return: The shared ScreenshotManager instance.
+    """
+    global _shared_manager
+    if _shared_manager is None:
+        settings = get_config().section('screenshots')
+        output_dir = settings.get('dir')
+        _shared_manager = ScreenshotManager(
+            output_dir=_PROJECT_ROOT / output_dir if output_dir else None,
+            mode=settings.get('mode', 'on-failure'),
+            image_format=settings.get('format', 'png'),
+            quality=settings.get('quality', 80),
+            dedupe=settings.get('dedupe', True),
+            hash_distance=settings.get('hash_distance', 4),
+            max_workers=settings.get('workers', 2),
+            run_id=get_config().run_id,
+        )
+    return _shared_manager
+
+
+def shutdown_screenshot_manager() -> None:
+    """
+    Flushes and stops the process-wide screenshot manager, if it was started.
+
+    :return: None.
+    """
+    global _shared_manager
+    if _shared_manager is not None:
+        _shared_manager.shutdown()
+        _shared_manager = None
@@ -0,0 +1,203 @@
+import hashlib
+import json
+import os
+import time
+from pathlib import Path
+from urllib.parse import urlsplit
+from selenium.common.exceptions import WebDriverException
+from .config_reader import get_config
+from .logger import setup_logger
+
+_PROJECT_ROOT = Path(__file__).resolve().parent.parent
+
+_READ_STORAGE_SCRIPT = """
+const dump = (storage) => {
+    const items = {};
+    for (let index = 0; index < storage.length; index++) {
+        const key = storage.key(index);
+        items[key] = storage.getItem(key);
+    }
+    return items;
+};
+return {local: dump(window.localStorage), session: dump(window.sessionStorage)};
+"""
+
+_WRITE_STORAGE_SCRIPT = """
+for (const [key, value] of Object.entries(arguments[0])) window.localStorage.setItem(key, value);
+for (const [key, value] of Object.entries(arguments[1])) window.sessionStorage.setItem(key, value);
+"""
+
+
+class SessionCache:
+    """
+    On-disk cache of authenticated browser sessions (cookies, local storage and session storage) keyed by user
+    and base URL, so that tests can restore a logged-in state instead of signing in through the UI.
+    """
+
+    def __init__(self, cache_dir: str = None, ttl_seconds: float = 1800):
+        self.cache_dir = Path(cache_dir) if cache_dir else _PROJECT_ROOT / '.session_cache'
+        self.ttl_seconds = ttl_seconds
+        self.logger = setup_logger()
+
+    def capture(self, driver, user: str, base_url: str = None) -> None:
+        """
+        Captures the session state of the browser for the user. The browser must be on a page of the base URL.
+
+        :param driver: The WebDriver instance holding the authenticated session.
+        :param user: The user identifier (usually the email).
+        :param base_url: The base URL of the application (default is the origin of the current page).
+        :return: None.
+        :raises WebDriverException: if an error occurs while reading the session state.
+        """
+        self.logger.info('********** %s() **********', self.capture.__name__)
+        try:
+            base_url = base_url or get_origin(driver.current_url)
+            storage = driver.execute_script(_READ_STORAGE_SCRIPT)
+            entry = {
+                'user': user,
+                'base_url': base_url,
+                'captured_at': time.time(),
+                'cookies': driver.get_cookies(),
+                'local_storage': storage['local'],
+                'session_storage': storage['session'],
+            }
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            path = self._path(user, base_url)
+            temp_path = path.with_suffix(f'.{os.getpid()}.tmp')
+            with open(temp_path, 'w') as f:
+                json.dump(entry, f)
+            os.replace(temp_path, path)
+            self.logger.info('The session of %s on %s was captured (%s cookies).', user, base_url,
+                             len(entry['cookies']))
+        except WebDriverException as e:
+            self.logger.error('An error occurred while capturing the session of %s. Error: %s', user, e)
+
+    def restore(self, driver, user: str, base_url: str) -> bool:
+        """
+        Injects the cached session state of the user into the browser.
+
+        On Chromium the cookies are set through CDP, so no navigation is needed unless the session has storage
+        items. Otherwise the browser is navigated to the base URL first. The caller navigates to the target page.
+
+        :param driver: The WebDriver instance (fresh or pooled).
+        :param user: The user identifier (usually the email).
+        :param base_url: The base URL of the application.
+        :return: True if the session was restored, False if there's no valid cached session.
+        """
+        self.logger.info('********** %s() **********', self.restore.__name__)
+        entry = self._load(user, base_url)
+        if entry is None:
+            self.logger.info('No valid cached session for %s on %s.', user, base_url)
+            return False
+        try:
+            has_storage = entry['local_storage'] or entry['session_storage']
+            if not hasattr(driver, 'execute_cdp_cmd') or has_storage:
+                driver.get(base_url)
+            if hasattr(driver, 'execute_cdp_cmd'):
+                driver.execute_cdp_cmd('Network.enable', {})
+                driver.execute_cdp_cmd('Network.setCookies', {'cookies': [_to_cdp_cookie(cookie, base_url)
+                                                                          for cookie in entry['cookies']]})
+            else:
+                for cookie in entry['cookies']:
+                    driver.add_cookie(cookie)
+            if has_storage:
+                driver.execute_script(_WRITE_STORAGE_SCRIPT, entry['local_storage'], entry['session_storage'])
+            self.logger.info('The session of %s on %s was restored.', user, base_url)
+            return True
+        except WebDriverException as e:
+            self.logger.error('An error occurred while restoring the session of %s. Error: %s', user, e)
+            return False
+
+    def is_signed_in(self, driver, account_page_url: str, sign_in_page_url: str) -> bool:
+        """
+        Checks with the server that the browser holds a valid session, by loading a page that needs the login.
+
+        The restored cookies can be rejected although they didn't expire locally (e.g. the session expired on the
+        server or was revoked), in which case the application redirects the browser to the sign-in page.
+
+        :param driver: The WebDriver instance.
+        :param account_page_url: A page only signed-in users can open (e.g. the customer account page).
+        :param sign_in_page_url: The sign-in page the application redirects anonymous users to.
+        :return: True if the page opened, False if the browser ended up on the sign-in page.
+        """
+        self.logger.info('********** %s() **********', self.is_signed_in.__name__)
+        try:
+            driver.get(account_page_url)
+            current_path = urlsplit(driver.current_url).path.rstrip('/')
+        except WebDriverException as e:
+            self.logger.error('An error occurred while checking the session. Error: %s', e)
+            return False
+        # the sign-in page may carry a referer suffix, e.g. /customer/account/login/referer/<base64>/
+        signed_in = not current_path.startswith(urlsplit(sign_in_page_url).path.rstrip('/'))
+        self.logger.info('The browser is %s.', 'signed in' if signed_in else 'not signed in')
+        return signed_in
+
+    def invalidate(self, user: str, base_url: str) -> None:
+        """
+        Drops the cached session of the user, e.g. after the server rejected it.
+
+        :param user: The user identifier (usually the email).
+        :param base_url: The base URL of the application.
+        :return: None.
+        """
+        path = self._path(user, base_url)
+        if path.exists():
+            path.unlink()
+
+    def _load(self, user: str, base_url: str):
+        path = self._path(user, base_url)
+        try:
+            with open(path) as f:
+                entry = json.load(f)
+        except (FileNotFoundError, ValueError):
+            return None
+        now = time.time()
+        expired_cookie = any(cookie.get('expiry') and cookie['expiry'] <= now for cookie in entry['cookies'])
+        if now - entry['captured_at'] > self.ttl_seconds or expired_cookie:
+            self.logger.info('The cached session of %s on %s expired.', user, base_url)
+            path.unlink(missing_ok=True)
+            return None
+        return entry
+
+    def _path(self, user: str, base_url: str) -> Path:
+        digest = hashlib.sha256(f'{user}|{get_origin(base_url)}'.encode()).hexdigest()[:32]
+        return self.cache_dir / f'{digest}.json'
+
+
+def get_origin(url: str) -> str:
+    """Returns the scheme://host[:port] part of a URL."""
+    parts = urlsplit(url)
+    return f'{parts.scheme}://{parts.netloc}'
+
+
+def _to_cdp_cookie(cookie: dict, base_url: str) -> dict:
+    cdp_cookie = {
+        'name': cookie['name'],
+        'value': cookie['value'],
+        'domain': cookie.get('domain'),
+        'path': cookie.get('path', '/'),
+        'secure': cookie.get('secure', False),
+        'httpOnly': cookie.get('httpOnly', False),
+        'url': base_url,
+    }
+    if cookie.get('sameSite'):
+        cdp_cookie['sameSite'] = cookie['sameSite']
+    if cookie.get('expiry'):
+        cdp_cookie['expires'] = cookie['expiry']
+    return {key: value for key, value in cdp_cookie.items() if value is not None}
+
+
+_shared_cache = None
+
+
+def get_session_cache() -> SessionCache:
+    """
+    Returns the process-wide session cache, configured by the "session_cache" section of config.json.
+
+    :return: The shared SessionCache instance.
+    """
+    global _shared_cache
+    if _shared_cache is None:
+        settings = get_config().section('session_cache')
+        _shared_cache = SessionCache(settings.get('dir'), settings.get('ttl_minutes', 30) * 60)
+    return _shared_cache
@@ -0,0 +1,271 @@
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Callable
+from selenium.common.exceptions import NoSuchElementException, StaleElementReferenceException, TimeoutException
+from .config_reader import get_config
+from .logger import setup_logger
+from .step_timer import percentile, step_recorder
+
+_PROJECT_ROOT = Path(__file__).resolve().parent.parent
+
+# Resolves once the document is loaded, no fetch/XHR is pending and the DOM didn't change for `quietMs`.
+# The fetch/XHR hooks are installed on the first call for the current document, so requests that started
+# before that call are only covered through document.readyState.
+_DOM_QUIESCENCE_SCRIPT = """
+const quietMs = arguments[0];
+const done = arguments[arguments.length - 1];
+if (!window.__lumaPending) {
+    window.__lumaPending = {count: 0};
+    const pending = window.__lumaPending;
+    const originalFetch = window.fetch;
+    if (originalFetch) {
+        window.fetch = function () {
+            pending.count++;
+            return originalFetch.apply(this, arguments).finally(() => pending.count--);
+        };
+    }
+    const originalSend = XMLHttpRequest.prototype.send;
+    XMLHttpRequest.prototype.send = function () {
+        pending.count++;
+        this.addEventListener('loadend', () => pending.count--, {once: true});
+        return originalSend.apply(this, arguments);
+    };
+}
+let lastMutation = performance.now();
+const observer = new MutationObserver(() => { lastMutation = performance.now(); });
+observer.observe(document, {childList: true, subtree: true, attributes: true, characterData: true});
+const check = () => {
+    const quiet = performance.now() - lastMutation >= quietMs;
+    if (document.readyState === 'complete' && window.__lumaPending.count <= 0 && quiet) {
+        observer.disconnect();
+        done(true);
+    } else {
+        setTimeout(check, Math.min(50, quietMs));
+    }
+};
+check();
+"""
+
+
+class WaitStats:
+    """
+    Per-locator readiness times (seconds) persisted across runs in a local JSON stats file.
+
+    Only the most recent ``max_samples`` samples of each locator are kept.
+    """
+
+    def __init__(self, stats_file: str, max_samples: int = 50):
+        self.stats_file = Path(stats_file)
+        self.max_samples = max_samples
+        self._samples = self._read()
+        self._new_samples = {}
+        self._lock = threading.Lock()
+
+    def record(self, key: str, elapsed: float) -> None:
+        with self._lock:
+            samples = self._samples.setdefault(key, [])
+            samples.append(round(elapsed, 4))
+            del samples[:-self.max_samples]
+            self._new_samples.setdefault(key, []).append(round(elapsed, 4))
+
+    def p95(self, key: str):
+        """
+        Returns the 95th percentile readiness time of the locator.
+
+        :param key: The locator key.
+        :return: The p95 in seconds, or None if the locator has no samples yet.
+        """
+        samples = self._samples.get(key)
+        return percentile(samples, 95) if samples else None
+
+    def save(self) -> None:
+        """
+        Merges the samples recorded by this process into the stats file, so that parallel workers don't
+        overwrite each other's samples.
+
+        :return: None.
+        """
+        with self._lock:
+            if not self._new_samples:
+                return
+            merged = self._read()
+            for key, samples in self._new_samples.items():
+                merged_samples = merged.setdefault(key, [])
+                merged_samples.extend(samples)
+                del merged_samples[:-self.max_samples]
+            self.stats_file.parent.mkdir(parents=True, exist_ok=True)
+            temp_path = self.stats_file.with_suffix(f'.{os.getpid()}.tmp')
+            with open(temp_path, 'w') as f:
+                json.dump(merged, f, indent=1, sort_keys=True)
+            os.replace(temp_path, self.stats_file)
+            self._new_samples.clear()
+
+    def _read(self) -> dict:
+        try:
+            with open(self.stats_file) as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            return {}
+
+
+class SmartWait:
+    """
+    Wait engine with exponential poll back-off whose timeouts and poll intervals are derived from the p95
+    readiness time learned for each locator.
+
+    A locator without history starts polling at ``min_poll`` and backs off up to ``max_poll`` with the default
+    timeout. A known locator starts polling at a fraction of its p95, and its timeout grows to
+    ``timeout_factor`` times its p95 when that's longer than the default (up to ``max_timeout``).
+    """
+
+    def __init__(self, driver, stats: WaitStats = None, min_poll: float = 0.05, max_poll: float = 0.5,
+                 backoff: float = 1.5, default_timeout: float = 15, max_timeout: float = 60,
+                 timeout_factor: float = 3, page_object: str = None):
+        self.driver = driver
+        self.stats = stats
+        self.min_poll = min_poll
+        self.max_poll = max_poll
+        self.backoff = backoff
+        self.default_timeout = default_timeout
+        self.max_timeout = max_timeout
+        self.timeout_factor = timeout_factor
+        self.page_object = page_object
+        self.logger = setup_logger()
+
+    def timeout_for(self, key: str = None) -> float:
+        p95 = self.stats.p95(key) if self.stats and key else None
+        if p95 is None:
+            return self.default_timeout
+        return min(self.max_timeout, max(self.default_timeout, p95 * self.timeout_factor))
+
+    def initial_poll_for(self, key: str = None) -> float:
+        p95 = self.stats.p95(key) if self.stats and key else None
+        if p95 is None:
+            return self.min_poll
+        return min(self.max_poll, max(self.min_poll, p95 / 4))
+
+    def until(self, condition: Callable, key: str = None, timeout: float = None, message: str = ''):
+        """
+        Calls ``condition(driver)`` until it returns a truthy value.
+
+        :param condition: A callable taking the driver, e.g. an expected condition.
+        :param key: The key under which the readiness time is learned (usually the locator).
+        :param timeout: Maximum time in seconds to wait (default is the learned timeout).
+        :param message: Message of the TimeoutException.
+        :return: The truthy value returned by the condition.
+        :raises NoSuchElementException: If the condition never found its element within the timeout (a wrong
+                                        locator or a missing element rather than a slow page).
+        :raises TimeoutException: If the condition wasn't met within the timeout.
+        """
+        timeout = self.timeout_for(key) if timeout is None else timeout
+        poll = self.initial_poll_for(key)
+        started = time.monotonic()
+        deadline = started + timeout
+        never_found = True
+        while True:
+            try:
+                value = condition(self.driver)
+                never_found = False
+                if value:
+                    elapsed = time.monotonic() - started
+                    if self.stats and key:
+                        self.stats.record(key, elapsed)
+                    step_recorder.record('wait', elapsed, self.page_object, key)
+                    return value
+            except NoSuchElementException:
+                pass
+            except StaleElementReferenceException:
+                never_found = False
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                step_recorder.record('wait', time.monotonic() - started, self.page_object, key)
+                if never_found:
+                    raise NoSuchElementException(f'No element found after {timeout:.1f}s (key: {key}).')
+                raise TimeoutException(message or f'Condition not met after {timeout:.1f}s (key: {key}).')
+            time.sleep(min(poll, remaining))
+            poll = min(self.max_poll, poll * self.backoff)
+
+    def wait_for_dom_quiescence(self, quiet_ms: int = 300, timeout: float = None) -> None:
+        """
+        Waits until the page is loaded, has no pending fetch/XHR request and its DOM stopped changing.
+
+        :param quiet_ms: How long the DOM must stay unchanged, in milliseconds.
+        :param timeout: Maximum time in seconds to wait (default is the default timeout).
+        :return: None.
+        :raises TimeoutException: If the page didn't settle within the timeout.
+        """
+        timeout = self.default_timeout if timeout is None else timeout
+        previous_timeout = self.driver.timeouts.script
+        self.driver.set_script_timeout(timeout)
+        try:
+            started = time.monotonic()
+            self.driver.execute_async_script(_DOM_QUIESCENCE_SCRIPT, quiet_ms)
+            self.logger.info('The page settled after %.0f ms.', (time.monotonic() - started) * 1000)
+        finally:
+            self.driver.set_script_timeout(previous_timeout)
+
+
+def element_present(locator: tuple) -> Callable:
+    """Condition returning the element found by the locator once it is in the DOM."""
+    return lambda driver: driver.find_element(*locator)
+
+
+def element_clickable(target) -> Callable:
+    """
+    Condition returning the element once it is displayed and enabled. The target is a locator or an already
+    resolved WebElement.
+
+    Same as ``expected_conditions.element_to_be_clickable``, whose module imports the whole remote WebDriver
+    stack.
+    """
+    def condition(driver):
+        element = driver.find_element(*target) if isinstance(target, tuple) else target
+        return element if element.is_displayed() and element.is_enabled() else False
+    return condition
+
+
+def locator_key(locator: tuple) -> str:
+    """Returns the key under which the readiness times of a locator are learned."""
+    return f'{locator[0]}={locator[1]}'
+
+
+_shared_stats = None
+
+
+def get_wait_stats() -> WaitStats:
+    """
+    Returns the process-wide readiness stats, loading the stats file on the first call.
+
+    :return: The shared WaitStats instance.
+    """
+    global _shared_stats
+    if _shared_stats is None:
+        settings = get_config().section('smart_wait')
+        stats_file = settings.get('stats_file', '.wait_stats.json')
+        _shared_stats = WaitStats(_PROJECT_ROOT / stats_file, settings.get('max_samples', 50))
+    return _shared_stats
+
+
+def create_smart_wait(driver, page_object: str = None) -> SmartWait:
+    """
+    Creates a SmartWait for the driver, configured by the "smart_wait" section of config.json.
+
+    :param driver: The WebDriver instance.
+    :param page_object: The page object the waits are attributed to in the step timings.
+    :return: The SmartWait instance.
+    """
+    settings = get_config().section('smart_wait')
+    return SmartWait(
+        driver,
+        stats=get_wait_stats(),
+        min_poll=settings.get('min_poll', 0.05),
+        max_poll=settings.get('max_poll', 0.5),
+        backoff=settings.get('backoff', 1.5),
+        default_timeout=settings.get('default_timeout', 15),
+        max_timeout=settings.get('max_timeout', 60),
+        timeout_factor=settings.get('timeout_factor', 3),
+        page_object=page_object,
+    )
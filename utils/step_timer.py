@@ -0,0 +1,203 @@
+import contextvars
+import functools
+import html
+import json
+import logging
+import math
+import threading
+import time
+from pathlib import Path
+
+# Logger of one record per step, for the structured log sink (see utils/structured_log.py). It doesn't propagate,
+# so the steps only reach the handlers attached to it.
+STEP_LOGGER_NAME = 'luma.steps'
+_step_logger = logging.getLogger(STEP_LOGGER_NAME)
+_step_logger.propagate = False
+
+# The (action, page object, locator) of the step running in the current context, None outside of a step.
+current_step = contextvars.ContextVar('current_step', default=None)
+
+
+def percentile(values: list, pct: float) -> float:
+    """
+    Returns the nearest-rank percentile of the values.
+
+    :param values: The samples.
+    :param pct: The percentile, between 0 and 100.
+    :return: The percentile, or 0.0 when there are no samples.
+    """
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[max(0, min(len(ordered) - 1, math.ceil(pct / 100 * len(ordered)) - 1))]
+
+
+class StepRecorder:
+    """
+    Collects the duration of every WebDriver step (navigation, click, typing, lookup, wait) together with the
+    test, page object and locator it belongs to, and checks them against per-action budgets.
+    """
+
+    def __init__(self):
+        self.steps = []
+        self.budgets = {}
+        self.current_test = None
+        self._violations = {}
+        self._touches = {}
+        self._lock = threading.Lock()
+
+    def record(self, action: str, duration: float, page_object: str = None, locator: str = None,
+               touched: list = None) -> None:
+        """
+        Records one step and remembers it when it exceeded the budget of its action.
+
+        :param action: The step name (e.g., "click", "navigate_to_url", "wait").
+        :param duration: The step duration in seconds.
+        :param page_object: The page object that ran the step.
+        :param locator: The locator or URL the step worked on.
+        :param touched: The locators the step used, when it used several (e.g., the fields of fill_form).
+        :return: None.
+        """
+        step = {
+            'test': self.current_test,
+            'page_object': page_object,
+            'action': action,
+            'locator': locator,
+            'duration': duration,
+        }
+        budget = self.budgets.get(action)
+        with self._lock:
+            self.steps.append(step)
+            if budget is not None and duration > budget:
+                self._violations.setdefault(self.current_test, []).append(step)
+            if page_object is not None and self.current_test is not None:
+                self._touches.setdefault(self.current_test, set()).update(
+                    (page_object, name) for name in (touched or [locator]))
+        if _step_logger.handlers:
+            _step_logger.info('%s %s took %.3fs', action, locator, duration,
+                              extra={'test': self.current_test, 'action': action, 'page_object': page_object,
+                                     'locator': locator, 'duration': duration})
+
+    def pop_violations(self, test: str) -> list:
+        """
+        Returns and forgets the steps of the test that exceeded their budget.
+
+        :param test: The test node id.
+        :return: A list of step dictionaries.
+        """
+        with self._lock:
+            return self._violations.pop(test, [])
+
+    def pop_touches(self, test: str) -> set:
+        """
+        Returns and forgets the page objects and locators the steps of the test used.
+
+        :param test: The test node id.
+        :return: A set of (page object, locator description) tuples; the locator is the URL of a navigation
+            and None for page-level steps.
+        """
+        with self._lock:
+            return self._touches.pop(test, set())
+
+    def summary(self) -> dict:
+        """
+        Aggregates the step durations by test, page object, locator and action.
+
+        :return: A dictionary {dimension: {name: {count, total_ms, p50_ms, p95_ms, max_ms}}}.
+        """
+        with self._lock:
+            steps = list(self.steps)
+        summary = {}
+        for dimension in ('test', 'page_object', 'locator', 'action'):
+            groups = {}
+            for step in steps:
+                if dimension == 'locator' and step['locator'] is None:
+                    continue
+                key = f'{step["action"]} {step["locator"]}' if dimension == 'locator' else step[dimension]
+                groups.setdefault(key or '-', []).append(step['duration'])
+            summary[f'by_{dimension}'] = {key: _histogram(durations) for key, durations in groups.items()}
+        return summary
+
+    def export_json(self, path: str) -> None:
+        """
+        Writes the aggregated summary and the budgets to a JSON file.
+
+        :param path: The output path.
+        :return: None.
+        """
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        with open(path, 'w') as f:
+            json.dump({'budgets': self.budgets, **self.summary()}, f, indent=2)
+
+    def html_table(self, dimension: str = 'locator', limit: int = 25) -> str:
+        """
+        Renders the slowest entries of one dimension as an HTML table for the pytest-html report.
+
+        :param dimension: One of "test", "page_object", "locator" or "action".
+        :param limit: Maximum number of rows, slowest p95 first.
+        :return: The HTML fragment.
+        """
+        rows = sorted(self.summary()[f'by_{dimension}'].items(), key=lambda item: item[1]['p95_ms'], reverse=True)
+        cells = ''.join(
+            f'<tr><td>{html.escape(str(name))}</td><td>{stats["count"]}</td><td>{stats["p50_ms"]}</td>'
+            f'<td>{stats["p95_ms"]}</td><td>{stats["max_ms"]}</td></tr>'
+            for name, stats in rows[:limit]
+        )
+        return (f'<h2>Step timings by {dimension}</h2><table><tr><th>{dimension}</th><th>count</th><th>p50 (ms)</th>'
+                f'<th>p95 (ms)</th><th>max (ms)</th></tr>{cells}</table>')
+
+
+def _histogram(durations: list) -> dict:
+    return {
+        'count': len(durations),
+        'total_ms': round(sum(durations) * 1000, 2),
+        'p50_ms': round(percentile(durations, 50) * 1000, 2),
+        'p95_ms': round(percentile(durations, 95) * 1000, 2),
+        'max_ms': round(max(durations) * 1000, 2),
+    }
+
+
+step_recorder = StepRecorder()
+
+
+def timed_step(method):
+    """
+    Decorator timing a CustomSeleniumWebDriver method as a step. The first positional argument is recorded as
+    the locator (or URL) of the step, which is also the ``current_step`` of the records logged meanwhile.
+    """
+    action = method.__name__
+
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        target = args[0] if args else kwargs.get('locator', kwargs.get('url', kwargs.get('fields')))
+        page_object = getattr(self, 'page_object', None)
+        locator = _describe(target)
+        token = current_step.set((action, page_object, locator))
+        started = time.perf_counter()
+        try:
+            return method(self, *args, **kwargs)
+        finally:
+            duration = time.perf_counter() - started
+            current_step.reset(token)
+            step_recorder.record(action, duration, page_object, locator, _touched(target))
+
+    return wrapper
+
+
+def _touched(target):
+    # the locators of a {locator: text} or {name: locator} argument
+    if not isinstance(target, dict):
+        return None
+    return [_describe(item) for pair in target.items() for item in pair if isinstance(item, tuple)]
+
+
+def _describe(target):
+    if target is None:
+        return None
+    if isinstance(target, tuple) and len(target) == 2:
+        return f'{target[0]}={target[1]}'
+    if isinstance(target, dict):
+        return f'{len(target)} fields'
+    if isinstance(target, list):
+        return f'{len(target)} pages'
+    return str(target)
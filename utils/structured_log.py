@@ -0,0 +1,451 @@
+"""
+Structured JSON-lines log sink and the tool to query it.
+
+When "logging.structured.enabled" is on, ``setup_logger`` adds a :class:`StructuredLogHandler` that writes every
+record as one JSON line tagged with the run id, the worker, the test node id and the action, page object and
+locator of the step it was logged in, plus one "step" record with the duration of every WebDriver step. The lines
+go to gzip segments ``<dir>/<run id>/<worker>-<NNNN>.jsonl.gz`` rotated after "max_bytes" of uncompressed data.
+Each closed segment gets a sidecar ``<worker>-<NNNN>.idx.json`` (record count, time range, levels, tests, page
+objects, locators), which lets the query tool skip the segments that can't match without decompressing them.
+
+Usage::
+
+    python -m utils.structured_log runs
+    python -m utils.structured_log records --run 1a2b3c4d --level WARNING --test test_sign_in
+    python -m utils.structured_log aggregate --run 1a2b3c4d --by locator --sort p95_ms --top 10
+"""
+import argparse
+import gzip
+import json
+import logging
+import os
+import re
+import sys
+import uuid
+from datetime import datetime
+from pathlib import Path
+from typing import Iterator
+from .config_reader import get_config
+from .step_timer import STEP_LOGGER_NAME, _histogram, current_step, step_recorder
+
+_PROJECT_ROOT = Path(__file__).resolve().parent.parent
+_DEFAULT_DIR = _PROJECT_ROOT / 'logs' / 'structured'
+_SEGMENT_PATTERN = re.compile(r'^(?P<worker>.+)-(?P<number>\d{4,})\.jsonl\.gz$')
+_INDEXED_FIELDS = ('test', 'page_object', 'locator', 'action')
+_GROUP_FIELDS = ('run_id', 'worker', 'test', 'page_object', 'locator', 'action', 'level')
+_exception_formatter = logging.Formatter()
+
+
+class StructuredLogHandler(logging.Handler):
+    """
+    Handler writing the records as JSON lines to size-rotated gzip segments, with a sidecar index per segment.
+
+    The segment numbers continue after the existing segments of the worker, so a resumed run with the same run
+    id appends new segments instead of overwriting.
+    """
+
+    def __init__(self, log_dir: str, run_id: str = None, worker_id: str = None, max_bytes: int = 8 * 1024 ** 2,
+                 compress_level: int = 6, level: int = logging.NOTSET):
+        super().__init__(level)
+        self.run_id = run_id or get_config().run_id or uuid.uuid4().hex[:8]
+        self.worker_id = worker_id or get_config().worker_id
+        self.run_dir = Path(log_dir) / self.run_id
+        self.max_bytes = max_bytes
+        self.compress_level = compress_level
+        self._stream = None
+        self._segment = None
+        self._index = None
+        self._number = 0
+
+    def emit(self, record: logging.LogRecord) -> None:
+        try:
+            entry = self.to_dict(record)
+            line = json.dumps(entry, default=str) + '\n'
+            if self._stream is None:
+                self._open_segment()
+            self._stream.write(line)
+            self._add_to_index(entry, len(line))
+            if self._index['bytes'] >= self.max_bytes:
+                self._close_segment()
+        except Exception:
+            self.handleError(record)
+
+    def to_dict(self, record: logging.LogRecord) -> dict:
+        """
+        Returns the JSON-serializable entry of a record.
+
+        :param record: The log record, tagged with the test and step by :func:`attach_step_context`.
+        :return: A dictionary {ts, kind, level, logger, message, run_id, worker, test, action, page_object, locator}
+                 with the duration (seconds) of a step record and the traceback of an exception.
+        """
+        entry = {
+            'ts': round(record.created, 6),
+            'kind': 'step' if record.name == STEP_LOGGER_NAME else 'log',
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+            'run_id': self.run_id,
+            'worker': self.worker_id,
+            'test': getattr(record, 'test', None),
+            'action': getattr(record, 'action', None),
+            'page_object': getattr(record, 'page_object', None),
+            'locator': getattr(record, 'locator', None),
+        }
+        duration = getattr(record, 'duration', None)
+        if duration is not None:
+            entry['duration'] = round(duration, 6)
+        if record.exc_info:
+            entry['exception'] = _exception_formatter.formatException(record.exc_info)
+        return entry
+
+    def flush(self) -> None:
+        with self.lock:
+            if self._stream is not None:
+                self._stream.flush()
+
+    def close(self) -> None:
+        with self.lock:
+            self._close_segment()
+        super().close()
+
+    def _open_segment(self) -> None:
+        self.run_dir.mkdir(parents=True, exist_ok=True)
+        if not self._number:
+            numbers = [int(match['number']) for match in map(_SEGMENT_PATTERN.match, os.listdir(self.run_dir))
+                       if match and match['worker'] == self.worker_id]
+            self._number = max(numbers, default=0)
+        self._number += 1
+        self._segment = self.run_dir / f'{self.worker_id}-{self._number:04d}.jsonl.gz'
+        self._stream = gzip.open(self._segment, 'wt', compresslevel=self.compress_level, encoding='utf-8')
+        self._index = {'segment': self._segment.name, 'run_id': self.run_id, 'worker': self.worker_id,
+                       'records': 0, 'bytes': 0, 'first_ts': None, 'last_ts': None, 'levels': {},
+                       **{field: set() for field in _INDEXED_FIELDS}}
+
+    def _add_to_index(self, entry: dict, size: int) -> None:
+        index = self._index
+        index['records'] += 1
+        index['bytes'] += size
+        if index['first_ts'] is None:
+            index['first_ts'] = entry['ts']
+        index['last_ts'] = entry['ts']
+        index['levels'][entry['level']] = index['levels'].get(entry['level'], 0) + 1
+        for field in _INDEXED_FIELDS:
+            if entry[field] is not None:
+                index[field].add(entry[field])
+
+    def _close_segment(self) -> None:
+        if self._stream is None:
+            return
+        self._stream.close()
+        index = {key: sorted(value) if isinstance(value, set) else value for key, value in self._index.items()}
+        with open(_index_path(self._segment), 'w') as f:
+            json.dump(index, f)
+        self._stream = self._segment = self._index = None
+
+
+def _index_path(segment: Path) -> Path:
+    return segment.with_name(segment.name.replace('.jsonl.gz', '.idx.json'))
+
+
+def exclude_steps(record: logging.LogRecord) -> bool:
+    """Handler filter keeping the step records out of the console and the text log file."""
+    return record.name != STEP_LOGGER_NAME
+
+
+def _tag_with_step_context(record: logging.LogRecord) -> bool:
+    if not hasattr(record, 'test'):
+        record.test = step_recorder.current_test
+        record.action, record.page_object, record.locator = current_step.get() or (None, None, None)
+    return True
+
+
+def attach_step_context(handler: logging.Handler) -> None:
+    """
+    Makes a handler tag the records with the current test and step and receive the step records.
+
+    The handler must be the one the records reach on the logging thread (the queue handler in non-blocking mode),
+    since the current test and step are only known there.
+
+    :param handler: The handler the structured handler is reached through.
+    :return: None.
+    """
+    handler.addFilter(_tag_with_step_context)
+    logging.getLogger(STEP_LOGGER_NAME).addHandler(handler)
+
+
+def create_structured_handler(log_dir: str = None) -> StructuredLogHandler:
+    """
+    Creates a structured log handler configured by the "logging.structured" section of config.json.
+
+    :param log_dir: The directory of the text logs; the segments go to its "structured" subdirectory unless
+                    "logging.structured.dir" is set.
+    :return: The StructuredLogHandler instance.
+    """
+    return StructuredLogHandler(
+        _structured_dir(log_dir),
+        run_id=get_config().run_id,
+        max_bytes=_settings().get('max_bytes', 8 * 1024 ** 2),
+        compress_level=_settings().get('compress_level', 6),
+    )
+
+
+def _settings() -> dict:
+    return get_config().section('logging').get('structured') or {}
+
+
+def _structured_dir(log_dir: str = None) -> Path:
+    directory = _settings().get('dir')
+    if directory:
+        return Path(directory) if os.path.isabs(directory) else _PROJECT_ROOT / directory
+    log_dir = log_dir or get_config().section('logging').get('dir')
+    return Path(log_dir) / 'structured' if log_dir else _DEFAULT_DIR
+
+
+def read_indexes(log_dir: str, run_id: str = None) -> Iterator[tuple]:
+    """
+    Streams the segments of the structured log with their index.
+
+    :param log_dir: The structured log directory.
+    :param run_id: Only the segments of this run.
+    :return: An iterator of (segment path, index or None when the segment is still open or was interrupted).
+    """
+    root = Path(log_dir)
+    if run_id:
+        run_dirs = [root / run_id]
+    else:
+        run_dirs = sorted(path for path in root.iterdir() if path.is_dir()) if root.is_dir() else []
+    for run_dir in run_dirs:
+        for segment in sorted(run_dir.glob('*.jsonl.gz')):
+            try:
+                with open(_index_path(segment)) as f:
+                    index = json.load(f)
+            except (FileNotFoundError, ValueError):
+                index = None
+            yield segment, index
+
+
+class RecordFilter:
+    """
+    Criteria on the structured records: exact run and page object, substrings of the test, locator and message,
+    action, kind, minimum level and time range.
+    """
+
+    def __init__(self, run_id: str = None, test: str = None, page_object: str = None, locator: str = None,
+                 action: str = None, kind: str = None, level: str = None, since: float = None, until: float = None,
+                 grep: str = None):
+        self.run_id = run_id
+        self.test = test
+        self.page_object = page_object
+        self.locator = locator
+        self.action = action
+        self.kind = kind
+        self.min_level = _level_number(level) if level else None
+        self.since = since
+        self.until = until
+        self.grep = grep
+
+    def may_match(self, index: dict) -> bool:
+        """Tells, from its index, whether a segment can hold matching records."""
+        if index is None:
+            return True
+        if self.since is not None and index['last_ts'] is not None and index['last_ts'] < self.since:
+            return False
+        if self.until is not None and index['first_ts'] is not None and index['first_ts'] > self.until:
+            return False
+        if self.min_level is not None and not any(_level_number(level, 0) >= self.min_level
+                                                  for level in index['levels']):
+            return False
+        if self.page_object is not None and self.page_object not in index['page_object']:
+            return False
+        if self.action is not None and self.action not in index['action']:
+            return False
+        if self.test is not None and not any(self.test in test for test in index['test']):
+            return False
+        return self.locator is None or any(self.locator in locator for locator in index['locator'])
+
+    def matches(self, entry: dict) -> bool:
+        return ((self.run_id is None or entry['run_id'] == self.run_id)
+                and (self.kind is None or entry['kind'] == self.kind)
+                and (self.min_level is None or _level_number(entry['level'], 0) >= self.min_level)
+                and (self.since is None or entry['ts'] >= self.since)
+                and (self.until is None or entry['ts'] <= self.until)
+                and (self.page_object is None or entry['page_object'] == self.page_object)
+                and (self.action is None or entry['action'] == self.action)
+                and (self.test is None or self.test in (entry['test'] or ''))
+                and (self.locator is None or self.locator in (entry['locator'] or ''))
+                and (self.grep is None or self.grep in entry['message']))
+
+
+def iter_records(log_dir: str, record_filter: RecordFilter = None) -> Iterator[dict]:
+    """
+    Streams the matching records of the structured log, one segment line at a time.
+
+    A segment that is still being written, or was cut by an interrupted run, is read up to its last complete
+    line.
+
+    :param log_dir: The structured log directory.
+    :param record_filter: The criteria (default is every record).
+    :return: An iterator of record dictionaries, in segment order.
+    """
+    record_filter = record_filter or RecordFilter()
+    for segment, index in read_indexes(log_dir, record_filter.run_id):
+        if not record_filter.may_match(index):
+            continue
+        try:
+            with gzip.open(segment, 'rt', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        continue
+                    if record_filter.matches(entry):
+                        yield entry
+        except (EOFError, OSError) as e:
+            print(f'{segment}: read up to the truncated end ({e}).', file=sys.stderr)
+
+
+def aggregate(records: Iterator[dict], by: str = 'locator') -> dict:
+    """
+    Aggregates the records by one field: the number of records and levels of each group and, for its step
+    records, the duration histogram.
+
+    :param records: The records, e.g. from :func:`iter_records`.
+    :param by: One of "run_id", "worker", "test", "page_object", "locator", "action" or "level". The locator
+               groups are keyed by "<action> <locator>", as in the step timings report.
+    :return: A dictionary {group: {count, levels, steps, total_ms, p50_ms, p95_ms, max_ms}}.
+    """
+    groups = {}
+    for entry in records:
+        key = f'{entry["action"]} {entry["locator"]}' if by == 'locator' else entry[by]
+        if by == 'locator' and entry['locator'] is None:
+            continue
+        group = groups.setdefault(key or '-', {'count': 0, 'levels': {}, 'durations': []})
+        group['count'] += 1
+        group['levels'][entry['level']] = group['levels'].get(entry['level'], 0) + 1
+        if entry['kind'] == 'step' and 'duration' in entry:
+            group['durations'].append(entry['duration'])
+    return {key: {**(_histogram(group['durations']) if group['durations'] else {}), 'count': group['count'],
+                  'levels': group['levels'], 'steps': len(group['durations'])}
+            for key, group in groups.items()}
+
+
+def summarize_runs(log_dir: str) -> dict:
+    """
+    Summarizes the runs from the segment indexes only.
+
+    :param log_dir: The structured log directory.
+    :return: A dictionary {run id: {segments, records, bytes, workers, first_ts, last_ts, unindexed}}.
+    """
+    runs = {}
+    for segment, index in read_indexes(log_dir):
+        run = runs.setdefault(segment.parent.name, {'segments': 0, 'records': 0, 'bytes': 0, 'workers': set(),
+                                                    'first_ts': None, 'last_ts': None, 'unindexed': 0})
+        run['segments'] += 1
+        if index is None:
+            run['unindexed'] += 1
+            continue
+        run['records'] += index['records']
+        run['bytes'] += index['bytes']
+        run['workers'].add(index['worker'])
+        run['first_ts'] = min(filter(None, (run['first_ts'], index['first_ts'])), default=None)
+        run['last_ts'] = max(filter(None, (run['last_ts'], index['last_ts'])), default=None)
+    return {run_id: {**run, 'workers': sorted(run['workers'])} for run_id, run in runs.items()}
+
+
+def _level_number(name: str, default: int = None) -> int:
+    """
+    Returns the number of a level name (e.g. "warning" or "WARN").
+
+    :raises ValueError: If the level is unknown and there's no default.
+    """
+    number = logging.getLevelName(str(name).upper())
+    if isinstance(number, int):
+        return number
+    if default is None:
+        raise ValueError(f'Unknown log level: {name}. Expected one of DEBUG, INFO, WARNING, ERROR or CRITICAL.')
+    return default
+
+
+def _level(value: str) -> str:
+    try:
+        _level_number(value)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e)) from e
+    return value.upper()
+
+
+def _timestamp(value: str) -> float:
+    try:
+        return float(value)
+    except ValueError:
+        return datetime.fromisoformat(value).timestamp()
+
+
+def _format_time(timestamp: float) -> str:
+    return datetime.fromtimestamp(timestamp).isoformat(sep=' ', timespec='seconds') if timestamp else '-'
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description='Query the structured (JSON-lines) logs.')
+    parser.add_argument('--dir', default=None, help='The structured log directory (default from config.json).')
+    commands = parser.add_subparsers(dest='command', required=True)
+    commands.add_parser('runs', help='List the runs, from the segment indexes.')
+    records_parser = commands.add_parser('records', help='Print the matching records.')
+    aggregate_parser = commands.add_parser('aggregate', help='Aggregate the matching records by one field.')
+    for command_parser in (records_parser, aggregate_parser):
+        command_parser.add_argument('--run', default=None, help='Run id.')
+        command_parser.add_argument('--test', default=None, help='Substring of the test node id.')
+        command_parser.add_argument('--page-object', default=None)
+        command_parser.add_argument('--locator', default=None, help='Substring of the locator (or URL).')
+        command_parser.add_argument('--action', default=None, help='Step action, e.g. "click".')
+        command_parser.add_argument('--kind', choices=('log', 'step'), default=None)
+        command_parser.add_argument('--level', type=_level, default=None, help='Minimum level, e.g. "WARNING".')
+        command_parser.add_argument('--since', type=_timestamp, default=None, help='Epoch seconds or ISO time.')
+        command_parser.add_argument('--until', type=_timestamp, default=None, help='Epoch seconds or ISO time.')
+        command_parser.add_argument('--grep', default=None, help='Substring of the message.')
+    records_parser.add_argument('--limit', type=int, default=None)
+    records_parser.add_argument('--json', action='store_true', help='Print the records as JSON lines.')
+    aggregate_parser.add_argument('--by', choices=_GROUP_FIELDS, default='locator')
+    aggregate_parser.add_argument('--sort', choices=('count', 'total_ms', 'p50_ms', 'p95_ms', 'max_ms'),
+                                  default='p95_ms')
+    aggregate_parser.add_argument('--top', type=int, default=20)
+    aggregate_parser.add_argument('--json', action='store_true', help='Print the aggregates as JSON.')
+    args = parser.parse_args(argv)
+    log_dir = args.dir or _structured_dir()
+
+    if args.command == 'runs':
+        for run_id, run in sorted(summarize_runs(log_dir).items(), key=lambda item: item[1]['first_ts'] or 0):
+            print(f'{run_id:<12} {_format_time(run["first_ts"])} .. {_format_time(run["last_ts"])}  '
+                  f'{run["records"]:>8} records  {run["segments"]:>3} segments ({run["unindexed"]} unindexed)  '
+                  f'workers: {", ".join(run["workers"]) or "-"}')
+        return 0
+
+    record_filter = RecordFilter(args.run, args.test, args.page_object, args.locator, args.action, args.kind,
+                                 args.level, args.since, args.until, args.grep)
+    records = iter_records(log_dir, record_filter)
+    if args.command == 'records':
+        for count, entry in enumerate(records):
+            if args.limit is not None and count >= args.limit:
+                break
+            if args.json:
+                print(json.dumps(entry))
+            else:
+                context = ' '.join(str(entry[field]) for field in ('test', 'page_object', 'locator') if entry[field])
+                print(f'{_format_time(entry["ts"])} {entry["run_id"]}/{entry["worker"]} {entry["level"]:<8} '
+                      f'{entry["message"]}' + (f'  [{context}]' if context else ''))
+        return 0
+
+    groups = aggregate(records, args.by)
+    rows = sorted(groups.items(), key=lambda item: item[1].get(args.sort, 0), reverse=True)[:args.top]
+    if args.json:
+        print(json.dumps(dict(rows), indent=2))
+        return 0
+    for name, group in rows:
+        timings = (f'p50 {group["p50_ms"]:>9.1f} ms  p95 {group["p95_ms"]:>9.1f} ms  max {group["max_ms"]:>9.1f} ms  '
+                   f'total {group["total_ms"]:>10.1f} ms' if group['steps'] else '')
+        print(f'{group["count"]:>8} records  {group["steps"]:>6} steps  {timings}  {name}')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
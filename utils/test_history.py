@@ -0,0 +1,227 @@
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from .config_reader import get_config
+from .logger import setup_logger
+
+_PROJECT_ROOT = Path(__file__).resolve().parent.parent
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS outcomes (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    test TEXT NOT NULL,
+    outcome TEXT NOT NULL,
+    attempts INTEGER NOT NULL,
+    duration REAL NOT NULL,
+    error TEXT,
+    run_id TEXT,
+    worker TEXT,
+    recorded_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS outcomes_by_test ON outcomes (test, id);
+CREATE TABLE IF NOT EXISTS quarantine (
+    test TEXT PRIMARY KEY,
+    reason TEXT NOT NULL,
+    since REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS touches (
+    test TEXT NOT NULL,
+    page_object TEXT NOT NULL,
+    locator TEXT NOT NULL,
+    PRIMARY KEY (test, page_object, locator)
+);
+"""
+
+
+class TestHistory:
+    """
+    Local SQLite history of the test outcomes, used to detect flaky tests and quarantine them, and of the page
+    objects and locators each test touched, used to select the tests affected by a change.
+
+    A test is flaky when, over its last ``window`` runs (at least ``min_runs``), it needed a retry to pass or its
+    outcome flipped between passed and failed at a rate of ``flip_rate`` or more. Flaky tests are quarantined:
+    they still run, but their failures don't fail the build. A quarantined test is released once its last
+    ``release_after`` runs passed at the first attempt.
+
+    The database is shared by the parallel workers (WAL journal, one short transaction per outcome). It is
+    created by the first outcome recorded: until then the queries return nothing.
+    """
+
+    # not a test class, despite its name
+    __test__ = False
+
+    def __init__(self, db_path: str = None, window: int = 20, min_runs: int = 5, flip_rate: float = 0.2,
+                 release_after: int = 10, quarantine: bool = True):
+        self.db_path = Path(db_path) if db_path else _PROJECT_ROOT / '.test_history.sqlite'
+        self.window = window
+        self.min_runs = min_runs
+        self.flip_rate = flip_rate
+        self.release_after = release_after
+        self.quarantine_enabled = quarantine
+        self.run_id = get_config().run_id
+        self.worker_id = get_config().worker_id
+        self.logger = setup_logger()
+        self._lock = threading.Lock()
+        self._connection = None
+
+    def record(self, test: str, outcome: str, duration: float, attempts: int = 1, error: str = None) -> None:
+        """
+        Records the outcome of a test and updates its quarantine status.
+
+        :param test: The test node id.
+        :param outcome: "passed", "failed", "skipped" or "error".
+        :param duration: The duration of the test call in seconds (all attempts).
+        :param attempts: How many attempts the test needed.
+        :param error: A short description of the failure.
+        :return: None.
+        """
+        with self._lock, self._connect() as connection:
+            connection.execute(
+                'INSERT INTO outcomes (test, outcome, attempts, duration, error, run_id, worker, recorded_at) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                (test, outcome, attempts, duration, error, self.run_id, self.worker_id, time.time()),
+            )
+            if self.quarantine_enabled and outcome != 'skipped':
+                self._update_quarantine(connection, test)
+
+    def record_touches(self, test: str, touches: set, replace: bool = True) -> None:
+        """
+        Records the page objects and locators a test touched.
+
+        :param test: The test node id.
+        :param touches: A set of (page object, locator description or None) tuples.
+        :param replace: Whether the touches replace the recorded ones (a complete run) or are added to them
+                        (e.g., a failed run that stopped early).
+        :return: None.
+        """
+        with self._lock, self._connect() as connection:
+            if replace:
+                connection.execute('DELETE FROM touches WHERE test = ?', (test,))
+            connection.executemany('INSERT OR IGNORE INTO touches (test, page_object, locator) VALUES (?, ?, ?)',
+                                   [(test, page_object, locator or '') for page_object, locator in touches])
+
+    def touches(self) -> dict:
+        """
+        Returns the recorded touches of every test.
+
+        :return: A dictionary {test node id: {(page object, locator description or None)}}.
+        """
+        with self._lock:
+            connection = self._connect_existing()
+            rows = connection.execute('SELECT test, page_object, locator FROM touches').fetchall() if connection else []
+        touches = {}
+        for test, page_object, locator in rows:
+            touches.setdefault(test, set()).add((page_object, locator or None))
+        return touches
+
+    def flakiness(self, test: str) -> dict:
+        """
+        Returns the flakiness indicators of a test over its last ``window`` runs.
+
+        :param test: The test node id.
+        :return: A dictionary {runs, failures, retried_passes, flip_rate, flaky, clean_streak}.
+        """
+        with self._lock:
+            return self._flakiness(self._connect_existing(), test)
+
+    def quarantined(self) -> dict:
+        """
+        Returns the quarantined tests.
+
+        :return: A dictionary {test node id: reason}.
+        """
+        with self._lock:
+            connection = self._connect_existing()
+            return dict(connection.execute('SELECT test, reason FROM quarantine').fetchall()) if connection else {}
+
+    def durations(self) -> dict:
+        """
+        Returns the average duration of each test over its recorded runs.
+
+        :return: A dictionary {test node id: average duration in seconds}.
+        """
+        with self._lock:
+            connection = self._connect_existing()
+            if connection is None:
+                return {}
+            rows = connection.execute(
+                "SELECT test, AVG(duration) FROM outcomes WHERE outcome != 'skipped' GROUP BY test").fetchall()
+        return dict(rows)
+
+    def close(self) -> None:
+        with self._lock:
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._connection is None:
+            self.db_path.parent.mkdir(parents=True, exist_ok=True)
+            self._connection = sqlite3.connect(self.db_path, timeout=30, check_same_thread=False)
+            self._connection.execute('PRAGMA journal_mode=WAL')
+            self._connection.executescript(_SCHEMA)
+        return self._connection
+
+    def _connect_existing(self):
+        # reading never creates the database, e.g. when collecting the tests of a fresh checkout
+        if self._connection is None and not self.db_path.exists():
+            return None
+        return self._connect()
+
+    def _flakiness(self, connection, test: str) -> dict:
+        rows = connection.execute(
+            "SELECT outcome, attempts FROM outcomes WHERE test = ? AND outcome != 'skipped' ORDER BY id DESC LIMIT ?",
+            (test, self.window),
+        ).fetchall() if connection else []
+        outcomes = [outcome for outcome, _ in rows]
+        flips = sum(1 for newer, older in zip(outcomes, outcomes[1:]) if newer != older)
+        flip_rate = flips / (len(outcomes) - 1) if len(outcomes) > 1 else 0.0
+        retried_passes = sum(1 for outcome, attempts in rows if outcome == 'passed' and attempts > 1)
+        return {
+            'runs': len(rows),
+            'failures': sum(1 for outcome in outcomes if outcome != 'passed'),
+            'retried_passes': retried_passes,
+            'flip_rate': round(flip_rate, 3),
+            'flaky': len(rows) >= self.min_runs and (retried_passes > 0 or flip_rate >= self.flip_rate),
+            'clean_streak': next((index for index, (outcome, attempts) in enumerate(rows)
+                                  if outcome != 'passed' or attempts > 1), len(rows)),
+        }
+
+    def _update_quarantine(self, connection: sqlite3.Connection, test: str) -> None:
+        stats = self._flakiness(connection, test)
+        quarantined = connection.execute('SELECT 1 FROM quarantine WHERE test = ?', (test,)).fetchone()
+        if quarantined and stats['clean_streak'] >= self.release_after:
+            connection.execute('DELETE FROM quarantine WHERE test = ?', (test,))
+            self.logger.info('The test %s passed its last %s runs, releasing it from quarantine.', test,
+                             stats['clean_streak'])
+        elif not quarantined and stats['flaky'] and stats['clean_streak'] < self.release_after:
+            reason = (f'flaky: {stats["retried_passes"]} retried passes, flip rate {stats["flip_rate"]} over '
+                      f'{stats["runs"]} runs')
+            connection.execute('INSERT OR REPLACE INTO quarantine (test, reason, since) VALUES (?, ?, ?)',
+                               (test, reason, time.time()))
+            self.logger.warning('The test %s is quarantined (%s).', test, reason)
+
+
+_shared_history = None
+
+
+def get_test_history() -> TestHistory:
+    """
+    Returns the process-wide test history, configured by the "retry" section of config.json.
+
+    :return: The shared TestHistory instance.
+    """
+    global _shared_history
+    if _shared_history is None:
+        settings = get_config().section('retry')
+        history_db = settings.get('history_db')
+        _shared_history = TestHistory(
+            db_path=_PROJECT_ROOT / history_db if history_db else None,
+            window=settings.get('flaky_window', 20),
+            min_runs=settings.get('flaky_min_runs', 5),
+            flip_rate=settings.get('flip_rate_threshold', 0.2),
+            release_after=settings.get('release_after', 10),
+            quarantine=settings.get('quarantine', True),
+        )
+    return _shared_history
@@ -0,0 +1,291 @@
+"""
+Test-impact selection and duration-aware scheduling.
+
+The conftest records which page objects and locators every test touched (see ``StepRecorder.pop_touches``) in the
+test history. Given the changes since a git revision, :class:`ImpactAnalyzer` selects the tests those changes can
+affect, and :func:`schedule` packs the selected tests into parallel workers by their historical duration
+(longest first) while keeping the ``depends_on`` groups in one worker, dependencies first.
+
+Usage::
+
+    python -m pytest --changed-since origin/main
+    python -m utils.parallel_runner --browsers chrome --workers-per-browser 3 --changed-since origin/main
+"""
+import ast
+import heapq
+import json
+import subprocess
+from pathlib import Path
+from selenium.webdriver.common.by import By
+import pages
+from .config_reader import get_config
+from .logger import setup_logger
+from .step_timer import _describe
+
+_PROJECT_ROOT = Path(__file__).resolve().parent.parent
+
+# changes under these paths can affect any test
+_GLOBAL_PATHS = ('utils/', 'pytest.ini', 'requirements', 'pages/base_page.py', 'pages/registry.py',
+                 'pages/__init__.py', 'tests/conftest.py', 'tests/base_test.py', 'tests/__init__.py')
+
+
+class ImpactAnalyzer:
+    """
+    Selects the tests affected by the changes of the working tree since a git revision.
+
+    * a page module whose only changes are locator values affects the tests that touched those locators;
+    * any other change of a page module affects the tests that used one of its page objects;
+    * a changed page URL in config.json affects the tests that used that page, other config keys affect every
+      test unless they are listed in "test_impact.ignore_config_keys";
+    * a changed test module affects its own tests;
+    * the framework itself (utils/, conftest, base classes, pytest.ini) affects every test.
+
+    Tests without recorded touches (new tests, or tests that never ran) are always selected.
+    """
+
+    def __init__(self, ref: str, ignore_config_keys=(), config_file: str = 'config_files/config.json'):
+        self.ref = ref
+        self.ignore_config_keys = frozenset(ignore_config_keys)
+        self.config_file = config_file
+        self.logger = setup_logger()
+
+    def changed_files(self) -> list:
+        """
+        Returns the files changed since the revision, including the untracked ones.
+
+        :return: A sorted list of paths relative to the project root.
+        :raises RuntimeError: If git failed (e.g., the revision doesn't exist).
+        """
+        changed = _git('diff', '--name-only', self.ref).splitlines()
+        changed += _git('ls-files', '--others', '--exclude-standard').splitlines()
+        return sorted({path for path in changed if path})
+
+    def select(self, node_ids: list, touches: dict, dependencies: dict = None) -> list:
+        """
+        Returns the tests affected by the changes, with the tests they depend on.
+
+        :param node_ids: The collected test node ids, in collection order.
+        :param touches: The recorded touches {test node id: {(page object, locator description)}}.
+        :param dependencies: The declared dependencies {test node id: [node ids or prefixes]}.
+        :return: The selected node ids, in collection order.
+        """
+        self.logger.info('********** %s() **********', self.select.__name__)
+        selected = set()
+        for path in self.changed_files():
+            affected = self._affected_by(path, node_ids, touches)
+            if affected:
+                self.logger.info('%s affects %s tests.', path, len(affected))
+            selected |= affected
+        selected |= {node_id for node_id in node_ids if node_id not in touches}
+        selected = _with_dependencies(selected, node_ids, dependencies or {})
+        self.logger.info('%s of %s tests are affected by the changes since %s.', len(selected), len(node_ids),
+                         self.ref)
+        return [node_id for node_id in node_ids if node_id in selected]
+
+    def _affected_by(self, path: str, node_ids: list, touches: dict) -> set:
+        if path.startswith(_GLOBAL_PATHS) and path.endswith(('.py', '.ini', '.txt')):
+            return set(node_ids)
+        if path == self.config_file:
+            return self._affected_by_config(node_ids, touches)
+        if path.startswith('pages/') and path.endswith('.py'):
+            return self._affected_by_page_module(path, node_ids, touches)
+        if path.startswith('tests/') and path.endswith('.py'):
+            return {node_id for node_id in node_ids if node_id.split('::')[0] == path}
+        return set()
+
+    def _affected_by_page_module(self, path: str, node_ids: list, touches: dict) -> set:
+        module = path[:-len('.py')].replace('/', '.')
+        page_classes = [page for page in pages.registered_pages().values() if page.__module__ == module]
+        if not page_classes:
+            # a helper module of the page objects
+            return set(node_ids)
+        page_objects = {page.__name__ for page in page_classes}
+        old_module = _declared_locators(_git_show(self.ref, path))
+        new_module = _declared_locators(_read(_PROJECT_ROOT / path))
+        if old_module is None or new_module is None or old_module[0] != new_module[0]:
+            return _touching(touches, lambda page_object, locator: page_object in page_objects)
+        old_locators, new_locators = old_module[1], new_module[1]
+        changed = set()
+        for class_name in old_locators.keys() | new_locators.keys():
+            old, new = old_locators.get(class_name, {}), new_locators.get(class_name, {})
+            changed |= {(class_name, locator) for name in old.keys() | new.keys() if old.get(name) != new.get(name)
+                        for locator in (old.get(name), new.get(name)) if locator is not None}
+        return _touching(touches, lambda page_object, locator: (page_object, locator) in changed)
+
+    def _affected_by_config(self, node_ids: list, touches: dict) -> set:
+        try:
+            old = json.loads(_git_show(self.ref, self.config_file) or '{}')
+            new = json.loads(_read(_PROJECT_ROOT / self.config_file) or '{}')
+        except ValueError:
+            return set(node_ids)
+        keys = {key for key in old.keys() | new.keys() if old.get(key) != new.get(key)} - self.ignore_config_keys
+        url_keys = {page.url_key: page.__name__ for page in pages.registered_pages().values()}
+        if keys - url_keys.keys():
+            return set(node_ids)
+        page_objects = {url_keys[key] for key in keys}
+        return _touching(touches, lambda page_object, locator: page_object in page_objects)
+
+
+def schedule(node_ids: list, durations: dict, workers: int, dependencies: dict = None,
+             default_duration: float = None) -> list:
+    """
+    Packs the tests into ``workers`` bins of about the same total duration (longest processing time first).
+
+    The tests of a class stay together (they share the class-scoped browser), and so do the classes linked by a
+    ``depends_on`` marker; such a group is ordered dependencies first.
+
+    :param node_ids: The test node ids, in collection order.
+    :param durations: The historical durations {test node id: seconds}.
+    :param workers: The number of bins.
+    :param dependencies: The declared dependencies {test node id: [node ids or prefixes]}.
+    :param default_duration: The duration of a test without history (default is the mean of the known ones).
+    :return: A list of non-empty bins, each a list of node ids in running order.
+    """
+    if not node_ids:
+        return []
+    known = [durations[node_id] for node_id in node_ids if node_id in durations]
+    if default_duration is None:
+        default_duration = sum(known) / len(known) if known else 1.0
+    units = {}
+    for node_id in node_ids:
+        units.setdefault(_unit(node_id), []).append(node_id)
+    parents = {unit: unit for unit in units}
+
+    def root(unit):
+        while parents[unit] != unit:
+            parents[unit] = parents[parents[unit]]
+            unit = parents[unit]
+        return unit
+
+    unit_dependencies = {unit: [] for unit in units}
+    for node_id, targets in (dependencies or {}).items():
+        if node_id not in node_ids:
+            continue
+        for target in _expand(targets, node_ids):
+            if _unit(target) != _unit(node_id):
+                unit_dependencies[_unit(node_id)].append(_unit(target))
+                parents[root(_unit(target))] = root(_unit(node_id))
+    groups = {}
+    visited = set()
+
+    def visit(unit):
+        # depth-first, so that a unit comes after the units it depends on
+        if unit in visited:
+            return
+        visited.add(unit)
+        for dependency in unit_dependencies[unit]:
+            visit(dependency)
+        groups.setdefault(root(unit), []).extend(units[unit])
+
+    for unit in units:
+        visit(unit)
+    weighted = sorted(((sum(durations.get(node_id, default_duration) for node_id in group), index, group)
+                       for index, group in enumerate(groups.values())), key=lambda item: (-item[0], item[1]))
+    bins = [(0.0, index, []) for index in range(max(1, workers))]
+    for duration, _, group in weighted:
+        load, index, tests = heapq.heappop(bins)
+        tests.extend(group)
+        heapq.heappush(bins, (load + duration, index, tests))
+    return [tests for _, _, tests in sorted(bins, key=lambda item: item[1]) if tests]
+
+
+def create_impact_analyzer(ref: str) -> ImpactAnalyzer:
+    """
+    Creates an impact analyzer configured by the "test_impact" section of config.json.
+
+    :param ref: The git revision the changes are computed against (e.g., "origin/main" or "HEAD~1").
+    :return: The ImpactAnalyzer instance.
+    """
+    settings = get_config().section('test_impact')
+    return ImpactAnalyzer(ref, ignore_config_keys=settings.get('ignore_config_keys', ()))
+
+
+def _unit(node_id: str) -> str:
+    parts = node_id.split('::')
+    return '::'.join(parts[:2]) if len(parts) > 2 else node_id
+
+
+def _expand(targets, node_ids: list) -> list:
+    return [node_id for target in targets for node_id in node_ids
+            if node_id == target or node_id.startswith(f'{target}::')]
+
+
+def _with_dependencies(selected: set, node_ids: list, dependencies: dict) -> set:
+    pending = list(selected)
+    while pending:
+        for dependency in _expand(dependencies.get(pending.pop(), ()), node_ids):
+            if dependency not in selected:
+                selected.add(dependency)
+                pending.append(dependency)
+    return selected
+
+
+def _touching(touches: dict, predicate) -> set:
+    return {test for test, touched in touches.items() if any(predicate(*touch) for touch in touched)}
+
+
+def _declared_locators(source: str):
+    """
+    Splits a page module into its skeleton (the dump of its syntax tree without the literal locators) and the
+    locators declared by its page classes {class name: {locator name: description}}. Two versions of the module
+    whose skeletons are equal only differ by their locators. Returns None when the module can't be analysed.
+
+    The module isn't executed: only the ``"name": (By.<STRATEGY>, "value")`` entries of a ``locators`` dictionary
+    are read as locators, any other entry is left in the skeleton.
+    """
+    try:
+        tree = ast.parse(source or '')
+    except SyntaxError:
+        return None
+    declared = {}
+    for node in tree.body:
+        if not isinstance(node, ast.ClassDef):
+            continue
+        for statement in node.body:
+            if (isinstance(statement, ast.Assign) and isinstance(statement.value, ast.Dict)
+                    and any(isinstance(target, ast.Name) and target.id == 'locators' for target in statement.targets)):
+                locators = declared.setdefault(node.name, {})
+                others = ast.Dict(keys=[], values=[])
+                for key, value in zip(statement.value.keys, statement.value.values):
+                    locator = _literal_locator(value)
+                    if isinstance(key, ast.Constant) and isinstance(key.value, str) and locator is not None:
+                        locators[key.value] = _describe(locator)
+                    else:
+                        others.keys.append(key)
+                        others.values.append(value)
+                statement.value = others
+    return ast.dump(tree), declared
+
+
+def _literal_locator(node):
+    """Returns the locator of a ``(By.<STRATEGY>, "value")`` node, or None for any other node."""
+    if not (isinstance(node, ast.Tuple) and len(node.elts) == 2):
+        return None
+    strategy, value = node.elts
+    if not (isinstance(strategy, ast.Attribute) and isinstance(strategy.value, ast.Name) and strategy.value.id == 'By'
+            and isinstance(value, ast.Constant) and isinstance(value.value, str)):
+        return None
+    by = getattr(By, strategy.attr, None)
+    return (by, value.value) if isinstance(by, str) else None
+
+
+def _git(*args) -> str:
+    completed = subprocess.run(['git', *args], cwd=_PROJECT_ROOT, capture_output=True, text=True)
+    if completed.returncode != 0:
+        raise RuntimeError(f'git {" ".join(args)} failed: {completed.stderr.strip()}')
+    return completed.stdout
+
+
+def _git_show(ref: str, path: str):
+    try:
+        return _git('show', f'{ref}:{path}')
+    except RuntimeError:
+        # the file didn't exist at the revision
+        return None
+
+
+def _read(path: Path):
+    try:
+        return path.read_text()
+    except FileNotFoundError:
+        return None
@@ -0,0 +1,177 @@
+import json
+import threading
+import time
+import uuid
+from pathlib import Path
+from urllib.parse import urlsplit
+from selenium.common.exceptions import WebDriverException
+from .config_reader import get_config
+from .logger import setup_logger
+from .step_timer import step_recorder
+
+_PROJECT_ROOT = Path(__file__).resolve().parent.parent
+
+# Collects the navigation timing, a resource timing summary, LCP and CLS of the current page in one call.
+# The buffered LCP / layout-shift entries are read synchronously through takeRecords(); browsers that don't
+# support an entry type report null for it.
+_COLLECT_METRICS_SCRIPT = """
+const round = (value) => value == null ? null : Math.round(value * 10) / 10;
+const takeRecords = (type) => {
+    try {
+        const observer = new PerformanceObserver(() => {});
+        observer.observe({type: type, buffered: true});
+        const records = observer.takeRecords();
+        observer.disconnect();
+        return records;
+    } catch (e) {
+        return null;
+    }
+};
+const metrics = {url: location.href};
+const navigation = performance.getEntriesByType('navigation')[0];
+if (navigation) {
+    metrics.ttfb_ms = round(navigation.responseStart);
+    metrics.dom_content_loaded_ms = round(navigation.domContentLoadedEventEnd);
+    metrics.load_ms = round(navigation.loadEventEnd);
+    metrics.transfer_size = navigation.transferSize;
+    metrics.status = navigation.responseStatus === undefined ? null : navigation.responseStatus;
+} else {
+    const timing = performance.timing;
+    metrics.ttfb_ms = timing.responseStart - timing.navigationStart;
+    metrics.dom_content_loaded_ms = timing.domContentLoadedEventEnd - timing.navigationStart;
+    metrics.load_ms = timing.loadEventEnd - timing.navigationStart;
+    metrics.transfer_size = null;
+    metrics.status = null;
+}
+const resources = performance.getEntriesByType('resource');
+metrics.resource_count = resources.length;
+metrics.resource_transfer_size = resources.reduce((total, entry) => total + (entry.transferSize || 0), 0);
+metrics.slowest_resources = resources
+    .slice().sort((a, b) => b.duration - a.duration).slice(0, 5)
+    .map((entry) => ({name: entry.name, initiator: entry.initiatorType, duration_ms: round(entry.duration)}));
+const lcpEntries = takeRecords('largest-contentful-paint');
+const lastLcp = lcpEntries && lcpEntries.length ? lcpEntries[lcpEntries.length - 1] : null;
+metrics.lcp_ms = lastLcp ? round(lastLcp.renderTime || lastLcp.loadTime || lastLcp.startTime) : null;
+const shifts = takeRecords('layout-shift');
+metrics.cls = shifts ? Math.round(shifts.filter((entry) => !entry.hadRecentInput)
+    .reduce((total, entry) => total + entry.value, 0) * 10000) / 10000 : null;
+return metrics;
+"""
+
+_THRESHOLD_METRICS = ('ttfb_ms', 'dom_content_loaded_ms', 'load_ms', 'lcp_ms', 'cls', 'resource_transfer_size')
+
+
+class WebVitalsRecorder:
+    """
+    Collects the browser performance metrics after each navigation, checks them against the thresholds of the
+    page URL and appends them to the time-series file of the run (one JSON line per navigation).
+
+    Thresholds are configured per page in the "web_vitals.thresholds" section of config.json, keyed by a full
+    URL or a URL path (the longest matching path prefix wins).
+    """
+
+    def __init__(self, thresholds: dict = None, time_series_dir: str = None, run_id: str = None):
+        self.thresholds = thresholds or {}
+        self.time_series_dir = Path(time_series_dir) if time_series_dir else _PROJECT_ROOT / 'reports' / 'web_vitals'
+        self.run_id = run_id or get_config().run_id or uuid.uuid4().hex[:8]
+        self.worker_id = get_config().worker_id
+        self.logger = setup_logger()
+        self._violations = {}
+        self._lock = threading.Lock()
+
+    @property
+    def time_series_path(self) -> Path:
+        return self.time_series_dir / f'{self.run_id}.jsonl'
+
+    def collect(self, driver, page_object: str = None):
+        """
+        Collects the metrics of the page the browser is on, records them and checks their thresholds.
+
+        :param driver: The WebDriver instance.
+        :param page_object: The page object that triggered the navigation.
+        :return: The metrics dictionary (with a "violations" list), or None if they couldn't be collected.
+        """
+        try:
+            metrics = driver.execute_script(_COLLECT_METRICS_SCRIPT)
+        except WebDriverException as e:
+            self.logger.warning('The navigation metrics could not be collected. Error: %s', e)
+            return None
+        return self.record(metrics, page_object)
+
+    def record(self, metrics: dict, page_object: str = None) -> dict:
+        """
+        Records metrics collected by the caller (e.g., by a multi-tab page check) and checks their thresholds.
+
+        :param metrics: The metrics dictionary, as returned by the collect script.
+        :param page_object: The page object that triggered the navigation.
+        :return: The metrics dictionary, with a "violations" list.
+        """
+        metrics['violations'] = self.check(metrics)
+        record = {
+            'timestamp': time.time(),
+            'run_id': self.run_id,
+            'worker': self.worker_id,
+            'test': step_recorder.current_test,
+            'page_object': page_object,
+            **metrics,
+        }
+        with self._lock:
+            self.time_series_dir.mkdir(parents=True, exist_ok=True)
+            with open(self.time_series_path, 'a') as f:
+                f.write(json.dumps(record) + '\n')
+            if metrics['violations']:
+                self._violations.setdefault(step_recorder.current_test, []).extend(metrics['violations'])
+        if metrics['violations']:
+            self.logger.warning('The page %s exceeded its performance thresholds: %s', metrics['url'],
+                                metrics['violations'])
+        return metrics
+
+    def check(self, metrics: dict) -> list:
+        """
+        Compares the metrics with the thresholds of their page.
+
+        :param metrics: The metrics dictionary of one navigation.
+        :return: A list of human-readable threshold violations.
+        """
+        thresholds = self.thresholds_for(metrics['url'])
+        violations = []
+        for metric in _THRESHOLD_METRICS:
+            limit = thresholds.get(metric)
+            value = metrics.get(metric)
+            if limit is not None and value is not None and value > limit:
+                violations.append(f'{metric}={value} > {limit}')
+        return violations
+
+    def thresholds_for(self, url: str) -> dict:
+        if url in self.thresholds:
+            return self.thresholds[url]
+        path = urlsplit(url).path
+        matches = [key for key in self.thresholds if key.startswith('/') and path.startswith(key)]
+        return self.thresholds[max(matches, key=len)] if matches else {}
+
+    def pop_violations(self, test: str) -> list:
+        with self._lock:
+            return self._violations.pop(test, [])
+
+
+_shared_recorder = None
+
+
+def get_web_vitals_recorder():
+    """
+    Returns the process-wide web vitals recorder, or None when "web_vitals.enabled" is off.
+
+    :return: The shared WebVitalsRecorder instance or None.
+    """
+    global _shared_recorder
+    settings = get_config().section('web_vitals')
+    if not settings.get('enabled', False):
+        return None
+    if _shared_recorder is None:
+        time_series_dir = settings.get('time_series_dir')
+        _shared_recorder = WebVitalsRecorder(
+            thresholds=settings.get('thresholds'),
+            time_series_dir=_PROJECT_ROOT / time_series_dir if time_series_dir else None,
+            run_id=get_config().run_id,
+        )
+    return _shared_recorder